@@ -0,0 +1,461 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the IMDB Movie Graph package.
+
+Generates seeded synthetic catalogs (see imdb_graph/data/synthetic.py) and
+times every stage of the pipeline on each of them: building the graph,
+detecting communities, saving and loading it as JSON and binary, preparing the
+similar movies of every node, and rendering a visualization with a cold and a
+warm layout cache. Each stage also records its peak resident memory: on Linux
+the kernel's high-water mark is reset before every stage, elsewhere the
+process-wide peak is recorded. --trace-memory adds the peak memory traced by
+tracemalloc, which is more precise but slows Python-heavy stages severalfold.
+
+Results are written as JSON, and a previous results file can be compared
+against to catch regressions:
+
+    python benchmark.py                              # 1k, 10k and 100k movies
+    python benchmark.py --sizes 1000,5000 --output run.json
+    python benchmark.py --compare data/benchmarks/baseline.json
+
+The similarity graph gets dense quickly, so the number of edges of a catalog
+is first estimated from a sample of movie pairs, and catalogs over the edge
+budget (--max-edges) are recorded as skipped instead of exhausting memory.
+
+--startup instead checks how fast the CLI starts: `python -X importtime` lists
+the modules each quick command imports, which must stay within an import time
+budget and never include the heavy dependencies:
+
+    python benchmark.py --startup                    # Exit code 1 over budget
+"""
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from imdb_graph.core.csr import CSRMovieGraph
+from imdb_graph.core.graph import calculate_similarity_weight
+from imdb_graph.core.graph_utils import load_graph, prepare_similar_movies
+from imdb_graph.data.synthetic import generate_movies
+from imdb_graph.main import THRESHOLD
+from imdb_graph.utils.constants import DATA_DIR
+from imdb_graph.visualization.visualize import create_movie_network
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+BENCHMARK_DIR = DATA_DIR / "benchmarks"
+RESULTS_VERSION = 1
+DEFAULT_SIZES = (1000, 10000, 100000)
+RENDER_LIMIT = 500            # Movies in the rendered visualization
+MAX_EDGES = 20_000_000        # Larger estimated graphs are skipped
+ESTIMATE_SAMPLES = 20000      # Movie pairs scored to estimate the edge count
+REGRESSION_TOLERANCE = 0.25   # Slowdown or memory growth reported as a regression
+MIN_SECONDS = 0.05            # Smaller time differences are noise
+MIN_MEGABYTES = 1.0           # Smaller memory differences are noise
+
+# CLI invocations that must start fast, as arguments to python -m imdb_graph.main
+STARTUP_COMMANDS = (("--help",), ("build", "--help"), ("visualize", "--help"), ("unknown",))
+STARTUP_IMPORT_BUDGET_MS = 30     # Import time of the package beyond a bare interpreter
+STARTUP_WALL_BUDGET_MS = 100      # Whole process, best of the runs
+STARTUP_RUNS = 5
+# Modules that only the commands doing real work may import
+HEAVY_MODULES = ("numpy", "pyvis", "jinja2", "networkx", "requests", "dotenv")
+
+def _get_option(name, default=None):
+    """Get the value following a command-line option.
+
+    Args:
+        name (str): Option name, e.g. "--sizes"
+        default: Value when the option is not given
+
+    Returns:
+        str: Option value, or the default
+    """
+    for i, arg in enumerate(sys.argv):
+        if arg == name and i + 1 < len(sys.argv):
+            return sys.argv[i + 1]
+    return default
+
+def reset_peak_rss():
+    """Reset the peak resident memory of the process, where the kernel allows it.
+
+    Returns:
+        bool: True if the next peak_rss_mb() covers only what runs from now on
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+def peak_rss_mb():
+    """Get the peak resident memory of the process.
+
+    Returns:
+        float: Megabytes, or None where the platform does not report it
+    """
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def estimate_edges(movies, threshold, samples=ESTIMATE_SAMPLES, seed=0):
+    """Estimate the number of edges of a catalog's graph from random movie pairs.
+
+    Args:
+        movies (list): Movie dictionaries
+        threshold (int): Similarity score an edge must exceed
+        samples (int): Number of pairs to score
+        seed (int): Random seed
+
+    Returns:
+        int: Estimated number of edges
+    """
+    count = len(movies)
+    if count < 2:
+        return 0
+    rng = random.Random(seed)
+    hits = 0
+    for _ in range(samples):
+        i, j = rng.sample(range(count), 2)
+        if calculate_similarity_weight(movies[i], movies[j]) > threshold:
+            hits += 1
+    return int(hits / samples * count * (count - 1) / 2)
+
+def measure(results, size, stage, func, trace_memory=False, verbose=False):
+    """Run one stage, and append its time and memory to the results.
+
+    Args:
+        results (list): Records of the stages run so far
+        size (int): Number of movies in the catalog
+        stage (str): Stage name
+        func (callable): Runs the stage and returns (value, dict of extra fields)
+        trace_memory (bool): Also record the peak memory traced by tracemalloc
+        verbose (bool): Show what the stage prints
+
+    Returns:
+        The stage's value
+    """
+    gc.collect()
+    per_stage = reset_peak_rss()
+    if trace_memory:
+        tracemalloc.start()
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    start = time.perf_counter()
+    with output:
+        value, extra = func()
+    seconds = time.perf_counter() - start
+
+    record = {"size": size, "stage": stage, "seconds": round(seconds, 4),
+              "peak_rss_mb": peak_rss_mb(), "rss_scope": "stage" if per_stage else "process"}
+    if trace_memory:
+        record["peak_traced_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 1)
+        tracemalloc.stop()
+    record.update(extra)
+    results.append(record)
+    memory = f", peak RSS {record['peak_rss_mb']} MB" if record["peak_rss_mb"] is not None else ""
+    if trace_memory:
+        memory += f", traced {record['peak_traced_mb']} MB"
+    print(f"  {stage:<16} {seconds:8.3f} s{memory}")
+    return value
+
+def benchmark_size(size, workdir, seed=0, threshold=THRESHOLD, render_limit=RENDER_LIMIT,
+                   max_edges=MAX_EDGES, trace_memory=False, verbose=False):
+    """Benchmark every stage on one synthetic catalog.
+
+    Args:
+        size (int): Number of movies
+        workdir (Path): Directory for the saved graphs and pages
+        seed (int): Seed of the synthetic catalog
+        threshold (int): Similarity score an edge must exceed
+        render_limit (int): Movies in the rendered visualization
+        max_edges (int): Catalogs estimated to have more edges are skipped
+        trace_memory (bool): Also record the tracemalloc peak of every stage
+        verbose (bool): Show what the stages print
+
+    Returns:
+        list: One record per stage
+    """
+    results = []
+    run = lambda stage, func: measure(results, size, stage, func, trace_memory, verbose)
+    print(f"\n{size} movies")
+
+    movies = run("generate", lambda: (generate_movies(size, seed), {}))
+    estimate = estimate_edges(movies, threshold, seed=seed)
+    if estimate > max_edges:
+        print(f"  skipped: about {estimate:,} edges, over the budget of {max_edges:,} (--max-edges)")
+        results.append({"size": size, "stage": "build", "skipped": True, "estimated_edges": estimate})
+        return results
+
+    def build():
+        graph = CSRMovieGraph.build_from_stream(iter(movies), threshold=threshold)
+        return graph, {"edges": graph.get_num_edges(), "estimated_edges": estimate}
+
+    graph = run("build", build)
+    del movies
+    run("communities", lambda: (graph.detect_communities(), {}))
+
+    json_path = workdir / "json" / "movie_graph.json"
+    binary_path = workdir / "binary" / "movie_graph.bin"
+    os.makedirs(json_path.parent, exist_ok=True)
+    os.makedirs(binary_path.parent, exist_ok=True)
+    run("save_json", lambda: (graph.save_to_json(json_path), {"bytes": json_path.stat().st_size}))
+    run("save_binary", lambda: (graph.save_to_binary(binary_path),
+                                {"bytes": binary_path.stat().st_size}))
+    del graph
+
+    # Separate directories, so loading the JSON path does not pick up the binary copy
+    loaded = run("load_json", lambda: (load_graph(json_path), {}))
+    del loaded
+    loaded = run("load_binary", lambda: (load_graph(binary_path), {}))
+    run("similar_movies", lambda: (prepare_similar_movies(loaded["adj_list"], loaded.get("top_k")),
+                                   {}))
+    del loaded
+
+    # The first render computes the layout, the second one reads it from the cache
+    page = workdir / "graph.html"
+    cache_dir = workdir / "layout_cache"
+    render = lambda: (create_movie_network(render_limit, page, graph_path=binary_path,
+                                           layout_cache_dir=cache_dir),
+                      {"movies": min(render_limit, size), "bytes": page.stat().st_size})
+    run("render", render)
+    run("render_cached", render)
+    return results
+
+def run_benchmarks(sizes=DEFAULT_SIZES, seed=0, threshold=THRESHOLD, render_limit=RENDER_LIMIT,
+                   max_edges=MAX_EDGES, trace_memory=False, verbose=False):
+    """Benchmark every stage on synthetic catalogs of the given sizes.
+
+    Args:
+        sizes (list): Numbers of movies
+        seed (int): Seed of the synthetic catalogs
+        threshold (int): Similarity score an edge must exceed
+        render_limit (int): Movies in the rendered visualization
+        max_edges (int): Catalogs estimated to have more edges are skipped
+        trace_memory (bool): Also record the tracemalloc peak of every stage
+        verbose (bool): Show what the stages print
+
+    Returns:
+        dict: Environment, settings and one record per size and stage
+    """
+    settings = {"sizes": list(sizes), "seed": seed, "threshold": threshold,
+                "render_limit": render_limit, "max_edges": max_edges,
+                "trace_memory": trace_memory}
+    results = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as workdir:
+            results.extend(benchmark_size(size, Path(workdir), seed, threshold, render_limit,
+                                          max_edges, trace_memory, verbose))
+    return {"version": RESULTS_VERSION, "created": datetime.now().isoformat(timespec="seconds"),
+            "environment": environment(), "settings": settings, "results": results}
+
+def environment():
+    """Describe the machine and code the benchmark ran on.
+
+    Returns:
+        dict: Python, NumPy and platform versions, CPU count and git commit
+    """
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, cwd=Path(__file__).parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {"python": platform.python_version(), "numpy": np.__version__,
+            "platform": platform.platform(), "cpus": os.cpu_count(), "commit": commit}
+
+def compare_results(baseline, current, tolerance=REGRESSION_TOLERANCE):
+    """Compare two benchmark runs stage by stage.
+
+    A stage regresses when it got slower, or its peak memory grew, by more than
+    the tolerance and by more than the noise floor.
+
+    Args:
+        baseline (dict): Earlier results, as written by run_benchmarks
+        current (dict): New results
+        tolerance (float): Allowed relative growth
+
+    Returns:
+        list: (size, stage, metric, baseline value, current value) of every regression
+    """
+    earlier = {(r["size"], r["stage"]): r for r in baseline["results"] if not r.get("skipped")}
+    regressions = []
+    print(f"\n{'size':>7} {'stage':<16} {'before':>9} {'after':>9} {'change':>8}")
+    for record in current["results"]:
+        before = earlier.get((record["size"], record["stage"]))
+        if before is None or record.get("skipped"):
+            continue
+        change = record["seconds"] / before["seconds"] - 1 if before["seconds"] else 0.0
+        print(f"{record['size']:>7} {record['stage']:<16} {before['seconds']:>8.3f}s "
+              f"{record['seconds']:>8.3f}s {change:>+7.0%}")
+        for metric, floor in (("seconds", MIN_SECONDS), ("peak_rss_mb", MIN_MEGABYTES),
+                              ("peak_traced_mb", MIN_MEGABYTES)):
+            old, new = before.get(metric), record.get(metric)
+            if old is None or new is None:
+                continue
+            if new > old * (1 + tolerance) and new - old > floor:
+                regressions.append((record["size"], record["stage"], metric, old, new))
+    return regressions
+
+def imported_modules(args):
+    """Run Python with -X importtime and read the modules it imported.
+
+    Args:
+        args (list): Arguments after `python -X importtime`
+
+    Returns:
+        dict: Module name -> import time of the module itself, in milliseconds
+    """
+    process = subprocess.run([sys.executable, "-X", "importtime", *args], capture_output=True,
+                             text=True, cwd=Path(__file__).parent)
+    modules = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        if self_us.strip().isdigit():
+            modules[name.strip()] = int(self_us) / 1000
+    return modules
+
+def wall_time_ms(args, runs=STARTUP_RUNS):
+    """Time a Python process from start to exit.
+
+    Args:
+        args (list): Arguments after `python`
+        runs (int): Number of runs, the fastest counts
+
+    Returns:
+        float: Milliseconds
+    """
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], capture_output=True, cwd=Path(__file__).parent)
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def check_startup(commands=STARTUP_COMMANDS, import_budget_ms=STARTUP_IMPORT_BUDGET_MS,
+                  wall_budget_ms=STARTUP_WALL_BUDGET_MS, runs=STARTUP_RUNS):
+    """Check that quick CLI commands start within the startup budget.
+
+    The modules a bare interpreter imports (site and its .pth hooks) are not
+    counted against the import budget.
+
+    Args:
+        commands (tuple): Argument tuples for python -m imdb_graph.main
+        import_budget_ms (float): Largest import time of the remaining modules
+        wall_budget_ms (float): Largest process run time, None to skip timing
+        runs (int): Timed runs per command
+
+    Returns:
+        tuple: (list of per-command records, list of problem descriptions)
+    """
+    baseline = imported_modules(["-c", "pass"])
+    records, problems = [], []
+    print(f"{'command':<24} {'imports':>8} {'modules':>8} {'wall':>8}")
+    for command in commands:
+        args = ["-m", "imdb_graph.main", *command]
+        modules = imported_modules(args)
+        extra = {name: ms for name, ms in modules.items() if name not in baseline}
+        heavy = sorted(name for name in extra
+                       if any(name == root or name.startswith(root + ".") for root in HEAVY_MODULES))
+        record = {"command": " ".join(command), "import_ms": round(sum(extra.values()), 2),
+                  "modules": len(extra), "heavy_modules": heavy,
+                  "wall_ms": round(wall_time_ms(args, runs), 1) if wall_budget_ms else None}
+        records.append(record)
+        wall = f"{record['wall_ms']:.1f}ms" if record["wall_ms"] is not None else "-"
+        print(f"{record['command']:<24} {record['import_ms']:>6.1f}ms {record['modules']:>8} {wall:>8}")
+        if heavy:
+            problems.append(f"{record['command']}: imports {', '.join(heavy[:5])}")
+        if record["import_ms"] > import_budget_ms:
+            problems.append(f"{record['command']}: imports take {record['import_ms']}ms, "
+                            f"budget {import_budget_ms}ms")
+        if wall_budget_ms and record["wall_ms"] > wall_budget_ms:
+            problems.append(f"{record['command']}: runs in {record['wall_ms']}ms, "
+                            f"budget {wall_budget_ms}ms")
+    return records, problems
+
+def write_results(results, path):
+    """Write benchmark results as JSON.
+
+    Args:
+        results (dict): Results of run_benchmarks
+        path (str or Path): Output file
+
+    Returns:
+        Path: The written file
+    """
+    path = Path(path)
+    os.makedirs(path.parent, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    return path
+
+def main():
+    """Run the benchmarks from the command line."""
+    if "--startup" in sys.argv:
+        _, problems = check_startup()
+        for problem in problems:
+            print(f"Over budget: {problem}")
+        if problems:
+            return 1
+        print("CLI startup within budget.")
+        return 0
+
+    try:
+        sizes = [int(size) for size in _get_option("--sizes", ",".join(map(str, DEFAULT_SIZES))).split(",")]
+        seed = int(_get_option("--seed", 0))
+        threshold = int(_get_option("--threshold", THRESHOLD))
+        render_limit = int(_get_option("--render-limit", RENDER_LIMIT))
+        max_edges = int(_get_option("--max-edges", MAX_EDGES))
+        tolerance = float(_get_option("--tolerance", REGRESSION_TOLERANCE))
+    except ValueError:
+        print("Error: --sizes expects comma-separated numbers, and --seed, --threshold, "
+              "--render-limit, --max-edges and --tolerance numbers.")
+        return 2
+
+    results = run_benchmarks(sizes, seed, threshold, render_limit, max_edges,
+                             trace_memory="--trace-memory" in sys.argv,
+                             verbose="--verbose" in sys.argv)
+    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    output = write_results(results, _get_option("--output", BENCHMARK_DIR / f"benchmark_{timestamp}.json"))
+    print(f"\nResults written to {output}")
+
+    baseline_path = _get_option("--compare")
+    if baseline_path is not None:
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_results(baseline, results, tolerance)
+        for size, stage, metric, old, new in regressions:
+            print(f"Regression: {stage} at {size} movies, {metric} {old} -> {new}")
+        if regressions:
+            return 1
+        print("No regressions.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
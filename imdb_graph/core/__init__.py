@@ -1,9 +1,37 @@
 """
 Core module for the IMDB Movie Graph package.
 Contains the main graph implementation and utilities.
+
+The names below are imported from their submodules on first use, so importing
+one submodule (e.g. imdb_graph.core.graph_utils) does not load all the others.
 """
+import importlib
+
+# Public name -> submodule defining it
+_EXPORTS = {
+    'MovieGraph': 'graph',
+    'CSRMovieGraph': 'csr',
+    'load_graph': 'graph_utils',
+    'prepare_similar_movies': 'graph_utils',
+    'GraphQuery': 'query',
+    'PersonalizedPageRank': 'pagerank',
+    'community_summaries': 'community',
+    'label_propagation': 'community',
+    'SubgraphSelector': 'subgraph',
+    'CastOverlapIndex': 'cast_overlap',
+    'ScoreStore': 'score_store',
+}
+
+__all__ = ['MovieGraph', 'CSRMovieGraph', 'GraphQuery', 'PersonalizedPageRank', 'load_graph',
+           'prepare_similar_movies', 'label_propagation', 'community_summaries',
+           'SubgraphSelector', 'CastOverlapIndex', 'ScoreStore']
 
-from .graph import MovieGraph
-from .graph_utils import load_graph, prepare_similar_movies
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
+    globals()[name] = value  # Later lookups skip __getattr__
+    return value
 
-__all__ = ['MovieGraph', 'load_graph', 'prepare_similar_movies']
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,254 @@
+"""
+Binary, memory-mappable graph file format.
+
+Layout (little-endian, every section aligned to 8 bytes):
+
+    header      magic, version, weight type, node/entry counts and section offsets
+    top-k       k and the offsets of the top-k sections
+    communities offset of the community section, 0 if there is none
+    scoring     threshold and genre, rating, director, cast and year weights of
+                the edges, NaN when unknown
+    offsets     int64[num_nodes + 1], start of each node's neighbors
+    neighbors   int32[num_entries]
+    weights     uint8 or float32[num_entries]
+    node index  int64[num_nodes + 1], start of each node's data in the string table
+    top counts  int32[num_nodes], entries of each node in the top-k index
+    top ids     int32[num_nodes * k], heaviest neighbors first
+    top weights uint8 or float32[num_nodes * k]
+    communities int32[num_nodes], community id of every node
+    strings     UTF-8 JSON encoding of each node's movie data
+
+Files written with another version are rejected; loaders fall back to the JSON
+graph next to them until the graph is rebuilt.
+
+Opening a file only maps it and reads the header, so loading is O(1) and
+neighbor lookups only touch the pages they need.
+"""
+import json
+import math
+import mmap
+import os
+import struct
+from pathlib import Path
+
+import numpy as np
+
+from imdb_graph.utils import trace
+
+MAGIC = b"IMDBGRF1"
+VERSION = 4
+BINARY_SUFFIX = ".bin"
+
+# magic, version, weight type, num_nodes, num_entries, then five section offsets
+HEADER = struct.Struct("<8sIIQQQQQQQ")
+# k, then the top counts, top ids and top weights section offsets
+TOP_K_HEADER = struct.Struct("<QQQQ")
+# Offset of the community section
+COMMUNITY_HEADER = struct.Struct("<Q")
+# Edge threshold, then the weight of each of SCORING_COMPONENTS
+SCORING_HEADER = struct.Struct("<6d")
+SCORING_COMPONENTS = ("genre", "rating", "director", "cast", "year")
+WEIGHT_TYPES = {0: np.dtype(np.uint8), 1: np.dtype(np.float32)}
+
+def binary_path_for(path):
+    """Return the binary graph path that sits alongside a JSON graph path.
+
+    Args:
+        path (str or Path): Path to the JSON graph file
+
+    Returns:
+        Path: Same path with the binary suffix
+    """
+    return Path(path).with_suffix(BINARY_SUFFIX)
+
+def is_binary_graph(path):
+    """Check whether a file starts with the binary graph magic bytes.
+
+    Args:
+        path (str or Path): Path to check
+
+    Returns:
+        bool: True if the file exists and is a binary graph
+    """
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+def binary_graph_version(path):
+    """Read the format version of a binary graph file without mapping it.
+
+    Args:
+        path (str or Path): Path to a binary graph file
+
+    Returns:
+        int: The version in the header, or None if the file is not a binary graph
+    """
+    try:
+        with open(path, "rb") as f:
+            header = f.read(len(MAGIC) + 4)
+    except OSError:
+        return None
+    if len(header) < len(MAGIC) + 4 or header[:len(MAGIC)] != MAGIC:
+        return None
+    return struct.unpack_from("<I", header, len(MAGIC))[0]
+
+def _as_number(value):
+    # Read back whole floats as the ints they were written from
+    return int(value) if value.is_integer() else value
+
+def _align(position):
+    return (position + 7) & ~7
+
+def save_binary_graph(graph, path):
+    """Write a graph to the binary format.
+
+    Args:
+        graph (MovieGraph): Graph to save, frozen into CSR form if needed
+        path (str or Path): Output file path
+
+    Returns:
+        None
+    """
+    with trace.span("save_binary", path=str(path)) as span:
+        _write_binary_graph(graph.freeze(), path)
+        span.count("bytes_written", os.path.getsize(path))
+
+def _write_binary_graph(graph, path):
+    # Encode the sections of a frozen graph and write them through a temporary file
+    weight_type = 0 if graph.weights.dtype == np.uint8 else 1
+    weight_dtype = WEIGHT_TYPES[weight_type].newbyteorder("<")
+    index = graph.top_k_index
+    if index is None:
+        from imdb_graph.core.topk import TopKIndex
+
+        index = TopKIndex.from_csr(graph.offsets, graph.neighbors, graph.weights)
+    index.freeze()
+
+    blobs = [json.dumps(data, separators=(",", ":")).encode("utf-8")
+             for data in graph.nodes_data]
+    node_index = np.zeros(len(blobs) + 1, dtype=np.int64)
+    node_index[1:] = np.cumsum([len(blob) for blob in blobs], dtype=np.int64)
+
+    sections = [
+        graph.offsets.astype("<i8"),
+        graph.neighbors.astype("<i4"),
+        graph.weights.astype(weight_dtype),
+        node_index.astype("<i8"),
+        index.counts.astype("<i4"),
+        index.neighbors.astype("<i4"),
+        # Top-k weights are a subset of the graph weights, so the type fits
+        index.weights.astype(weight_dtype),
+    ]
+    if graph.communities is not None:
+        sections.append(np.asarray(graph.communities).astype("<i4"))
+    positions = []
+    position = HEADER.size + TOP_K_HEADER.size + COMMUNITY_HEADER.size + SCORING_HEADER.size
+    for section in sections:
+        position = _align(position)
+        positions.append(position)
+        position += section.nbytes
+    strings_position = _align(position)
+
+    # Write to a temporary file first, the old file may still be mapped
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, weight_type, len(graph.nodes_data),
+                            len(graph.neighbors), *positions[:4], strings_position))
+        f.write(TOP_K_HEADER.pack(index.k, *positions[4:7]))
+        f.write(COMMUNITY_HEADER.pack(positions[7] if len(positions) > 7 else 0))
+        scoring = graph.scoring or {'threshold': math.nan, 'weights': {}}
+        f.write(SCORING_HEADER.pack(scoring['threshold'],
+                                    *(scoring['weights'].get(name, math.nan)
+                                      for name in SCORING_COMPONENTS)))
+        for section, section_position in zip(sections, positions):
+            f.write(b"\0" * (section_position - f.tell()))
+            f.write(section.tobytes())
+        f.write(b"\0" * (strings_position - f.tell()))
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp_path, path)
+
+class MappedNodeData:
+    """Sequence of movie data decoded on demand from a mapped string table.
+
+    Args:
+        buffer (mmap.mmap): Mapped graph file
+        index (numpy.ndarray): Start of each node's data, relative to `base`
+        base (int): File offset of the string table
+    """
+
+    def __init__(self, buffer, index, base):
+        self.buffer = buffer
+        self.index = index
+        self.base = base
+
+    def __len__(self):
+        return len(self.index) - 1
+
+    def __getitem__(self, node_id):
+        if isinstance(node_id, slice):
+            return [self[i] for i in range(*node_id.indices(len(self)))]
+        if node_id < 0:
+            node_id += len(self)
+        start = self.base + int(self.index[node_id])
+        end = self.base + int(self.index[node_id + 1])
+        return json.loads(self.buffer[start:end])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+def load_binary_graph(path):
+    """Memory-map a binary graph file.
+
+    Args:
+        path (str or Path): Path to the binary graph file
+
+    Returns:
+        CSRMovieGraph: Graph whose arrays and node data are backed by the mapping
+    """
+    from imdb_graph.core.csr import CSRMovieGraph
+    from imdb_graph.core.topk import TopKIndex
+
+    with open(path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    (magic, version, weight_type, num_nodes, num_entries, offsets_pos, neighbors_pos,
+     weights_pos, index_pos, strings_pos) = HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        buffer.close()
+        raise ValueError(f"{path} is not a binary movie graph")
+    if version != VERSION:
+        buffer.close()
+        raise ValueError(f"{path} is a version {version} binary movie graph, this code reads "
+                         f"version {VERSION}; rebuild the graph to rewrite it")
+    weight_dtype = WEIGHT_TYPES[weight_type].newbyteorder("<")
+
+    graph = CSRMovieGraph(0)
+    graph.offsets = np.frombuffer(buffer, dtype="<i8", count=num_nodes + 1, offset=offsets_pos)
+    graph.neighbors = np.frombuffer(buffer, dtype="<i4", count=num_entries, offset=neighbors_pos)
+    graph.weights = np.frombuffer(buffer, dtype=weight_dtype, count=num_entries,
+                                  offset=weights_pos)
+    index = np.frombuffer(buffer, dtype="<i8", count=num_nodes + 1, offset=index_pos)
+    graph.nodes_data = MappedNodeData(buffer, index, strings_pos)
+
+    k, counts_pos, top_ids_pos, top_weights_pos = TOP_K_HEADER.unpack_from(buffer, HEADER.size)
+    graph.top_k_index = TopKIndex.from_arrays(
+        np.frombuffer(buffer, dtype="<i4", count=num_nodes, offset=counts_pos),
+        np.frombuffer(buffer, dtype="<i4", count=num_nodes * k,
+                      offset=top_ids_pos).reshape(num_nodes, k),
+        np.frombuffer(buffer, dtype=weight_dtype, count=num_nodes * k,
+                      offset=top_weights_pos).reshape(num_nodes, k))
+    (communities_pos,) = COMMUNITY_HEADER.unpack_from(buffer, HEADER.size + TOP_K_HEADER.size)
+    if communities_pos:
+        graph.communities = np.frombuffer(buffer, dtype="<i4", count=num_nodes,
+                                          offset=communities_pos)
+    threshold, *weights = SCORING_HEADER.unpack_from(
+        buffer, HEADER.size + TOP_K_HEADER.size + COMMUNITY_HEADER.size)
+    if not math.isnan(threshold):
+        graph.scoring = {'threshold': _as_number(threshold),
+                         'weights': {name: _as_number(weight)
+                                     for name, weight in zip(SCORING_COMPONENTS, weights)}}
+    graph.mapping = buffer  # Keep the mapping alive as long as the graph
+    return graph
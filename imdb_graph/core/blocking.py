@@ -0,0 +1,188 @@
+"""
+Blocked candidate generation for building the movie graph.
+
+An edge needs a similarity score above the threshold, and the score is a sum of
+a few fixed components. Every qualifying pair therefore satisfies at least one
+minimal combination of components whose weights clear the threshold. For each
+such combination the index enumerates pairs through inverted indexes on genre,
+director and year/rating buckets, plus the exact shared cast pairs of a
+CastOverlapIndex, so only pairs that can possibly clear the threshold are ever
+scored.
+"""
+import math
+from bisect import bisect_right
+from collections import defaultdict
+from itertools import combinations, product
+
+from imdb_graph.core.cast_overlap import CastOverlapIndex
+from imdb_graph.core.graph import (
+    MIN_SHARED_CAST,
+    RATING_TOLERANCE,
+    YEAR_TOLERANCE,
+    calculate_similarity_weight,
+)
+from imdb_graph.core.similarity import COMPONENT_WEIGHTS
+from imdb_graph.utils import trace
+
+# Components with a single value per movie, blocked together through a cell index
+SCALAR_COMPONENTS = ('director', 'rating', 'year')
+
+def minimal_blocks(threshold, weights=COMPONENT_WEIGHTS):
+    """Find the minimal combinations of components whose weights clear the threshold.
+
+    Any pair scoring above the threshold satisfies every component of at least
+    one of the returned combinations.
+
+    Args:
+        threshold (float): Edge threshold, an edge needs score > threshold
+        weights (dict): Mapping of component name to its weight
+
+    Returns:
+        list: Tuples of component names
+    """
+    names = list(weights)
+    blocks = []
+    for size in range(len(names) + 1):
+        for combo in combinations(names, size):
+            total = sum(weights[c] for c in combo)
+            if total > threshold and all(total - weights[c] <= threshold for c in combo):
+                blocks.append(combo)
+    return blocks
+
+def _bucket(value, width):
+    # Values within `width` of each other always land in the same or adjacent buckets
+    return math.floor(value / width)
+
+def _cell_key(movie, scalars):
+    key = []
+    for component in scalars:
+        if component == 'director':
+            key.append(movie['director'])
+        elif movie[component] is None:
+            return None  # The component can never fire for this movie
+        elif component == 'rating':
+            key.append(_bucket(movie['rating'], RATING_TOLERANCE))
+        else:
+            key.append(_bucket(movie['year'], YEAR_TOLERANCE))
+    return tuple(key)
+
+def _neighbor_keys(key, scalars):
+    options = []
+    for component, value in zip(scalars, key):
+        if component == 'director':
+            options.append((value,))
+        else:
+            options.append((value - 1, value, value + 1))
+    return product(*options)
+
+def _posting_lists(value_sets):
+    index = defaultdict(list)
+    for i, values in enumerate(value_sets):
+        for value in values:
+            index[value].append(i)
+    return index
+
+class BlockingIndex:
+    """Inverted indexes that enumerate candidate pairs able to clear a threshold.
+
+    Args:
+        movies (list): List of movie data dictionaries
+        threshold (float): Minimum similarity score (exclusive) to create an edge
+    """
+
+    def __init__(self, movies, threshold):
+        self.movies = movies
+        self.threshold = threshold
+        self.blocks = minimal_blocks(threshold)
+        self.genres = [set(m['genres']) for m in movies]
+        self.casts = [set(m['cast']) for m in movies]
+        self.genre_index = _posting_lists(self.genres)
+        # Later movies sharing enough cast members with each movie, counted once up front
+        self.cast_partners = [[] for _ in movies]
+        if any('cast' in block for block in self.blocks):
+            for i, j, _ in CastOverlapIndex.from_casts(self.casts).pairs():
+                self.cast_partners[i].append(j)
+
+        # One cell index per distinct combination of scalar components in use
+        self.cell_indexes = {}
+        for block in self.blocks:
+            scalars = tuple(c for c in SCALAR_COMPONENTS if c in block)
+            if scalars and scalars not in self.cell_indexes:
+                cells = defaultdict(list)
+                for i, movie in enumerate(movies):
+                    key = _cell_key(movie, scalars)
+                    if key is not None:
+                        cells[key].append(i)
+                self.cell_indexes[scalars] = cells
+
+    def _matches(self, component, i, j):
+        m1, m2 = self.movies[i], self.movies[j]
+        if component == 'genre':
+            return not self.genres[i].isdisjoint(self.genres[j])
+        if component == 'director':
+            return m1['director'] == m2['director']
+        if component == 'cast':
+            return len(self.casts[i] & self.casts[j]) >= MIN_SHARED_CAST
+        if m1[component] is None or m2[component] is None:
+            return False
+        tolerance = RATING_TOLERANCE if component == 'rating' else YEAR_TOLERANCE
+        return abs(m1[component] - m2[component]) <= tolerance
+
+    def _driver(self, i, block):
+        """Pick the cheapest set of posting lists that covers every match of the block."""
+        options = []
+        scalars = tuple(c for c in SCALAR_COMPONENTS if c in block)
+        if scalars:
+            key = _cell_key(self.movies[i], scalars)
+            if key is None:
+                return []
+            cells = self.cell_indexes[scalars]
+            options.append([cells[k] for k in _neighbor_keys(key, scalars) if k in cells])
+        if 'genre' in block:
+            options.append([self.genre_index[g] for g in self.genres[i]])
+        if 'cast' in block:
+            options.append([self.cast_partners[i]])
+        return min(options, key=lambda lists: sum(len(posting) for posting in lists))
+
+    def candidates(self, i):
+        """Return the sorted ids j > i that may score above the threshold with movie i.
+
+        Args:
+            i (int): Movie index
+
+        Returns:
+            list: Candidate movie indices in ascending order
+        """
+        if () in self.blocks:
+            # Every pair clears the threshold
+            return list(range(i + 1, len(self.movies)))
+
+        found = set()
+        for block in self.blocks:
+            for posting in self._driver(i, block):
+                for j in posting[bisect_right(posting, i):]:
+                    if j not in found and all(self._matches(c, i, j) for c in block):
+                        found.add(j)
+        return sorted(found)
+
+    def edges(self, start=0, stop=None):
+        """Yield the edges (i, j, score) for rows start <= i < stop.
+
+        Edges come out in the same order as the exhaustive pairwise loop.
+
+        Args:
+            start (int): First row to score
+            stop (int, optional): Row to stop before, defaults to all rows
+
+        Yields:
+            tuple: (i, j, score) with i < j and score > threshold
+        """
+        if stop is None:
+            stop = len(self.movies)
+        for i in range(start, stop):
+            candidates = self.candidates(i)
+            trace.count("pairs_scored", len(candidates))
+            for j in candidates:
+                score = calculate_similarity_weight(self.movies[i], self.movies[j])
+                if score > self.threshold:
+                    yield i, j, score
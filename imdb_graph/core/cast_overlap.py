@@ -0,0 +1,187 @@
+"""
+Exact shared-cast pair index.
+
+The cast component of calculate_similarity_weight needs two movies to share at
+least MIN_SHARED_CAST actors. Instead of comparing cast lists pair by pair,
+every person keeps a sorted posting list of their movies, and the pairs of a
+movie are counted from the postings of its cast: each (movie, other movie,
+shared actor) incidence is generated once, and pairs seen at least
+MIN_SHARED_CAST times are kept. The work is proportional to the number of
+incidences, that is the pairs sharing any actor weighted by how many they
+share, and pairs without a common actor are never touched.
+
+Postings are stored in one array ordered by (person, movie), so the part of
+a posting inside a range of movies is found with a single vectorized
+searchsorted for all the postings of a block of rows.
+"""
+import numpy as np
+
+from imdb_graph.core.graph import MIN_SHARED_CAST
+
+# Upper bound on the incidences materialized per block of rows
+BLOCK_INCIDENCES = 1 << 22
+
+class CastOverlapIndex:
+    """Person -> movies posting lists that find the movie pairs sharing cast members.
+
+    Args:
+        cast (numpy.ndarray): Dense person ids of every movie, row after row,
+            unique within a row
+        cast_offsets (numpy.ndarray): Start of each movie's persons in `cast`,
+            one entry per movie plus one
+        num_people (int, optional): Number of distinct persons, defaults to max id + 1
+        min_shared (int): Shared cast members a pair needs
+    """
+
+    def __init__(self, cast, cast_offsets, num_people=None, min_shared=MIN_SHARED_CAST):
+        self.cast = np.asarray(cast, dtype=np.int64)
+        self.cast_offsets = np.asarray(cast_offsets, dtype=np.int64)
+        self.num_movies = len(self.cast_offsets) - 1
+        if num_people is None:
+            num_people = int(self.cast.max()) + 1 if self.cast.size else 0
+        self.min_shared = min_shared
+
+        owners = np.repeat(np.arange(self.num_movies, dtype=np.int64), np.diff(self.cast_offsets))
+        # Postings ordered by person, then by movie since owners ascend
+        order = np.argsort(self.cast, kind='stable')
+        self.posting_movies = owners[order]
+        self.posting_offsets = np.zeros(num_people + 1, dtype=np.int64)
+        self.posting_offsets[1:] = np.cumsum(np.bincount(self.cast, minlength=num_people))
+        # Sort keys of the postings, and where each cast entry sits among them
+        self.posting_keys = self.cast[order] * max(self.num_movies, 1) + self.posting_movies
+        self.position = np.empty(len(order), dtype=np.int64)
+        self.position[order] = np.arange(len(order), dtype=np.int64)
+
+    @classmethod
+    def from_casts(cls, casts, min_shared=MIN_SHARED_CAST):
+        """Index cast lists of person names.
+
+        Args:
+            casts (iterable): Cast list (or set) of every movie
+            min_shared (int): Shared cast members a pair needs
+
+        Returns:
+            CastOverlapIndex: The index, movies numbered in the given order
+        """
+        people = {}
+        values, offsets = [], [0]
+        for cast in casts:
+            values.extend(people.setdefault(name, len(people)) for name in dict.fromkeys(cast))
+            offsets.append(len(values))
+        return cls(np.array(values, dtype=np.int64), np.array(offsets, dtype=np.int64),
+                   len(people), min_shared)
+
+    def movies_with(self, person):
+        # Sorted indices of the movies featuring a person
+        return self.posting_movies[self.posting_offsets[person]:self.posting_offsets[person + 1]]
+
+    def _lower_bound(self, persons, movie):
+        # Position of the first posting of each person at or after `movie`
+        return np.searchsorted(self.posting_keys, persons * max(self.num_movies, 1) + movie)
+
+    def _incidences(self, lo, hi, col_start, col_stop, later_only=False):
+        # (row, other movie) once per shared person, for rows lo <= i < hi and
+        # other movies col_start <= j < col_stop, j != i (j > i with later_only)
+        entries = slice(self.cast_offsets[lo], self.cast_offsets[hi])
+        persons = self.cast[entries]
+        position = self.position[entries]
+        rows = np.repeat(np.arange(lo, hi, dtype=np.int64), np.diff(self.cast_offsets[lo:hi + 1]))
+        first = self._lower_bound(persons, col_start)
+        last = self._lower_bound(persons, col_stop)
+        # Each posting splits around the row's own entry into earlier and later movies
+        segments = [(np.maximum(position + 1, first), last)]
+        if not later_only:
+            segments.append((first, np.minimum(position, last)))
+        starts = np.concatenate([start for start, _ in segments])
+        counts = np.maximum(np.concatenate([stop - start for start, stop in segments]), 0)
+        rows = np.repeat(np.tile(rows, len(segments)), counts)
+        ends = np.cumsum(counts)
+        positions = np.arange(int(ends[-1]) if len(ends) else 0, dtype=np.int64)
+        positions += np.repeat(starts - (ends - counts), counts)
+        return rows, self.posting_movies[positions]
+
+    def _count(self, rows, cols, min_shared):
+        # Unique (row, col) pairs seen at least min_shared times, in row then column order
+        keys, shared = np.unique(rows * max(self.num_movies, 1) + cols, return_counts=True)
+        keep = shared >= min_shared
+        keys = keys[keep]
+        return keys // max(self.num_movies, 1), keys % max(self.num_movies, 1), shared[keep]
+
+    def block_pairs(self, lo, hi, col_start, col_stop, min_shared=None):
+        """Find the pairs of a block of rows and columns that share enough cast members.
+
+        Args:
+            lo (int): First row
+            hi (int): Row to stop before
+            col_start (int): First column
+            col_stop (int): Column to stop before
+            min_shared (int, optional): Shared cast members needed, defaults to the index's
+
+        Returns:
+            tuple: (rows, cols, shared) arrays ordered by row then column, never
+            pairing a movie with itself
+        """
+        rows, cols = self._incidences(lo, hi, col_start, col_stop)
+        return self._count(rows, cols, self.min_shared if min_shared is None else min_shared)
+
+    def pair_arrays(self, lo, hi, min_shared=None):
+        """Find the pairs (i, j), lo <= i < hi and j > i, that share enough cast members.
+
+        Args:
+            lo (int): First row
+            hi (int): Row to stop before
+            min_shared (int, optional): Shared cast members needed, defaults to the index's
+
+        Returns:
+            tuple: (rows, cols, shared) arrays ordered by row then column
+        """
+        rows, cols = self._incidences(lo, hi, lo + 1, self.num_movies, later_only=True)
+        return self._count(rows, cols, self.min_shared if min_shared is None else min_shared)
+
+    def _later_incidences(self):
+        # Running total of the incidences of rows before each row, for sizing blocks
+        later = self.posting_offsets[self.cast + 1] - self.position - 1
+        owners = np.repeat(np.arange(self.num_movies, dtype=np.int64), np.diff(self.cast_offsets))
+        totals = np.zeros(self.num_movies + 1, dtype=np.int64)
+        totals[1:] = np.cumsum(np.bincount(owners, weights=later, minlength=self.num_movies))
+        return totals
+
+    def pairs(self, start=0, stop=None, block_incidences=BLOCK_INCIDENCES):
+        """Yield every pair (i, j), start <= i < stop and i < j, sharing enough cast members.
+
+        Rows are processed in blocks holding at most about `block_incidences`
+        incidences, so memory stays bounded however popular an actor is.
+
+        Args:
+            start (int): First row
+            stop (int, optional): Row to stop before, defaults to all rows
+            block_incidences (int): Incidences per block
+
+        Yields:
+            tuple: (i, j, shared) of Python ints, ordered by i then j
+        """
+        if stop is None:
+            stop = self.num_movies
+        totals = self._later_incidences()
+        lo = start
+        while lo < stop:
+            # Largest block within the budget, at least one row
+            hi = int(np.searchsorted(totals, totals[lo] + block_incidences, side='right')) - 1
+            hi = min(max(hi, lo + 1), stop)
+            rows, cols, shared = self.pair_arrays(lo, hi)
+            yield from zip(rows.tolist(), cols.tolist(), shared.tolist())
+            lo = hi
+
+    def shared_with(self, movie, min_shared=1):
+        """List the movies sharing cast members with a movie.
+
+        Args:
+            movie (int): Movie index
+            min_shared (int): Shared cast members needed
+
+        Returns:
+            list: (movie index, shared count) pairs, most shared first, then by index
+        """
+        _, cols, shared = self.block_pairs(movie, movie + 1, 0, self.num_movies, min_shared)
+        order = np.lexsort((cols, -shared))
+        return list(zip(cols[order].tolist(), shared[order].tolist()))
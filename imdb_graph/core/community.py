@@ -0,0 +1,126 @@
+"""
+Community detection by weighted label propagation.
+
+Every node starts in its own community and repeatedly adopts the label with
+the largest total edge weight among its neighbors. Each round is a handful of
+NumPy sorts over the CSR arrays, and only a random share of the nodes move per
+round so labels cannot flip back and forth between two groups forever. A node
+keeps its label when it is among the best, which makes the process settle,
+unless a tied label belongs to a larger community: without that, sparse
+clusters with uniform weights freeze into fragments. Communities are numbered
+by decreasing size.
+"""
+from collections import Counter
+
+import numpy as np
+
+MAX_ROUNDS = 50
+UPDATE_FRACTION = 0.8  # Share of nodes allowed to change label per round
+
+def label_propagation(graph, max_rounds=MAX_ROUNDS, seed=0):
+    """Find communities with weighted label propagation.
+
+    Args:
+        graph (MovieGraph): Graph to partition, frozen into CSR form if needed
+        max_rounds (int): Round cap
+        seed (int): Seed of the random choice of nodes updated each round
+
+    Returns:
+        numpy.ndarray: int32 community id of every node, 0 being the largest
+    """
+    graph = graph.freeze()
+    offsets = np.asarray(graph.offsets, dtype=np.int64)
+    num_nodes = len(offsets) - 1
+    neighbors = np.asarray(graph.neighbors, dtype=np.int64)
+    weights = np.asarray(graph.weights, dtype=np.float64)
+    rows = np.repeat(np.arange(num_nodes, dtype=np.int64), np.diff(offsets))
+    labels = np.arange(num_nodes, dtype=np.int64)
+    rng = np.random.default_rng(seed)
+
+    for _ in range(max_rounds):
+        if not len(neighbors):
+            break
+        # Total weight of every (node, neighbor label) pair
+        pair_keys = rows * num_nodes + labels[neighbors]
+        order = np.argsort(pair_keys)
+        sorted_keys = pair_keys[order]
+        new_key = np.r_[True, sorted_keys[1:] != sorted_keys[:-1]]
+        keys = sorted_keys[new_key]
+        totals = np.bincount(np.cumsum(new_key) - 1, weights=weights[order])
+        key_nodes, key_labels = keys // num_nodes, keys % num_nodes
+
+        # Heaviest label of every node; keys are sorted by node then label, so
+        # each node is one contiguous segment. Ties go to the larger community,
+        # then to the smaller label
+        starts = np.flatnonzero(np.r_[True, key_nodes[1:] != key_nodes[:-1]])
+        lengths = np.diff(np.r_[starts, len(keys)])
+        is_best = totals == np.repeat(np.maximum.reduceat(totals, starts), lengths)
+        community_sizes = np.bincount(labels, minlength=num_nodes)
+        sizes = np.where(is_best, community_sizes[key_labels], -1)
+        is_best &= sizes == np.repeat(np.maximum.reduceat(sizes, starts), lengths)
+        candidates = np.flatnonzero(is_best)
+        first = np.r_[True, key_nodes[candidates][1:] != key_nodes[candidates][:-1]]
+        best = candidates[first]
+        nodes, best_labels, best_totals = key_nodes[best], key_labels[best], totals[best]
+
+        # Keep the current label when it is as heavy as the best one, unless
+        # the best one belongs to a strictly larger community
+        current_keys = nodes * num_nodes + labels[nodes]
+        position = np.minimum(np.searchsorted(keys, current_keys), len(keys) - 1)
+        current_totals = np.where(keys[position] == current_keys, totals[position], 0.0)
+        grows = community_sizes[best_labels] > community_sizes[labels[nodes]]
+        wants = (((current_totals < best_totals) | ((current_totals == best_totals) & grows))
+                 & (best_labels != labels[nodes]))
+        if not wants.any():
+            break
+        moving = wants & (rng.random(len(nodes)) < UPDATE_FRACTION)
+        labels[nodes[moving]] = best_labels[moving]
+
+    # Renumber communities by decreasing size, then by smallest member
+    unique_labels, first_member, inverse, sizes = np.unique(
+        labels, return_index=True, return_inverse=True, return_counts=True)
+    rank = np.empty(len(unique_labels), dtype=np.int32)
+    rank[np.lexsort((first_member, -sizes))] = np.arange(len(unique_labels), dtype=np.int32)
+    return rank[inverse]
+
+def community_summaries(communities, nodes_data, degrees=None, limit=None):
+    """Describe each community by its size and most common traits.
+
+    Args:
+        communities (numpy.ndarray): Community id of every node
+        nodes_data (list or MovieTable): Movie data for every node
+        degrees (numpy.ndarray, optional): Node degrees, used to pick example movies
+        limit (int, optional): Only summarize the largest `limit` communities
+
+    Returns:
+        list: One dictionary per community, largest first
+    """
+    communities = np.asarray(communities)
+    count = int(communities.max()) + 1 if len(communities) else 0
+    if limit is not None:
+        count = min(count, limit)
+    # Members of every community as contiguous runs of one sort
+    by_community = np.argsort(communities, kind="stable")
+    bounds = np.searchsorted(communities[by_community], np.arange(count + 1))
+    summaries = []
+    for community in range(count):
+        members = by_community[bounds[community]:bounds[community + 1]]
+        if degrees is not None:
+            # Best connected members first
+            members = members[np.argsort(-np.asarray(degrees)[members], kind="stable")]
+        movies = [nodes_data[i] for i in members.tolist()]
+        movies = [movie for movie in movies if movie is not None]
+        genres = Counter(g for movie in movies for g in movie.get("genres", []))
+        directors = Counter(movie.get("director") for movie in movies if movie.get("director"))
+        years = [movie["year"] for movie in movies if movie.get("year") is not None]
+        ratings = [movie["rating"] for movie in movies if movie.get("rating") is not None]
+        summaries.append({
+            "community": community,
+            "size": len(members),
+            "top_genres": [g for g, _ in genres.most_common(3)],
+            "top_directors": [d for d, _ in directors.most_common(3)],
+            "years": [min(years), max(years)] if years else None,
+            "mean_rating": round(sum(ratings) / len(ratings), 2) if ratings else None,
+            "examples": [movie.get("title") for movie in movies[:5]],
+        })
+    return summaries
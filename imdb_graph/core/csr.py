@@ -0,0 +1,272 @@
+"""
+Compressed-sparse-row storage for the movie graph.
+
+Each undirected edge is stored once per endpoint as an int32 neighbor id and a
+uint8 weight (float32 when weights are not small integers), with an offsets
+array marking where each node's neighbors start. This takes roughly 10 bytes
+per edge instead of two Python tuples inside Python lists.
+"""
+from array import array
+
+import numpy as np
+
+from imdb_graph.core.graph import THRESHOLD, TOP_K, MovieGraph, _pad_table, build_edges
+from imdb_graph.core.movie_table import MovieTable
+from imdb_graph.utils import trace
+
+def _weight_array(values):
+    """Store weights as uint8 when they are all small integers, float32 otherwise."""
+    weights = np.asarray(values, dtype=np.float64)
+    if weights.size == 0 or (np.all(weights == np.round(weights))
+                             and weights.min() >= 0 and weights.max() <= 255):
+        return weights.astype(np.uint8)
+    return weights.astype(np.float32)
+
+class AdjacencyView:
+    """Read-only list-of-lists view over a CSR graph, for code expecting adj_list.
+
+    Args:
+        graph (CSRMovieGraph): The graph to expose
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __len__(self):
+        return len(self.graph.nodes_data)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.graph.get_neighbors(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        return self.graph.get_neighbors(index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.graph.get_neighbors(i)
+
+class CSRMovieGraph(MovieGraph):
+    """MovieGraph backed by compressed-sparse-row arrays.
+
+    Edges added after freezing are kept in a small overflow table until the
+    next call to freeze().
+
+    Args:
+        num_nodes (int): Number of nodes in the graph
+    """
+
+    def __init__(self, num_nodes):
+        self.nodes_data = [None] * num_nodes
+        self.offsets = np.zeros(num_nodes + 1, dtype=np.int64)
+        self.neighbors = np.zeros(0, dtype=np.int32)
+        self.weights = np.zeros(0, dtype=np.uint8)
+        self._pending = {}
+        self.top_k_index = None
+        self.communities = None
+        self.scoring = None
+
+    @property
+    def adj_list(self):
+        return AdjacencyView(self)
+
+    @classmethod
+    def from_adjacency(cls, adj_list, nodes_data):
+        """Freeze a list-of-lists adjacency into CSR form.
+
+        Args:
+            adj_list (list): Neighbor lists of (neighbor_id, weight) pairs
+            nodes_data (list): Movie data for every node
+
+        Returns:
+            CSRMovieGraph: The frozen graph
+        """
+        graph = cls(len(nodes_data))
+        graph.nodes_data = nodes_data if isinstance(nodes_data, MovieTable) else list(nodes_data)
+        counts = [len(neighbors) for neighbors in adj_list]
+        graph.offsets[1:] = np.cumsum(counts, dtype=np.int64)
+        graph.neighbors = np.array([n[0] for neighbors in adj_list for n in neighbors],
+                                   dtype=np.int32)
+        graph.weights = _weight_array([n[1] for neighbors in adj_list for n in neighbors])
+        return graph
+
+    @classmethod
+    def from_edges(cls, num_nodes, edges, nodes_data=None):
+        """Build CSR arrays directly from an undirected edge stream.
+
+        Neighbors keep the order in which their edges arrive, exactly as if
+        each edge had been passed to MovieGraph.add_edge.
+
+        Args:
+            num_nodes (int): Number of nodes in the graph
+            edges (iterable): (i, j, weight) edges
+            nodes_data (list, optional): Movie data for every node
+
+        Returns:
+            CSRMovieGraph: The frozen graph
+        """
+        graph = cls(num_nodes)
+        if nodes_data is not None:
+            graph.nodes_data = nodes_data if isinstance(nodes_data, MovieTable) else list(nodes_data)
+        graph._set_edges(edges)
+        return graph
+
+    @classmethod
+    def from_edge_arrays(cls, nodes_data, sources, targets, weights, top_k=TOP_K):
+        """Build CSR arrays from parallel arrays of undirected edges.
+
+        Neighbors keep the order of the edges in the arrays, as in from_edges.
+
+        Args:
+            nodes_data (list): Movie data for every node, or a MovieTable
+            sources (numpy.ndarray): First endpoint of every edge
+            targets (numpy.ndarray): Second endpoint of every edge
+            weights (numpy.ndarray): Weight of every edge
+            top_k (int): Number of most similar neighbors to index per node, 0 for no index
+
+        Returns:
+            CSRMovieGraph: The frozen graph
+        """
+        graph = cls(len(nodes_data))
+        graph.nodes_data = nodes_data if isinstance(nodes_data, MovieTable) else list(nodes_data)
+        graph._set_edge_arrays(sources, targets, weights, top_k)
+        return graph
+
+    def _set_edges(self, edges, top_k=None):
+        sources, targets, weights = array('q'), array('q'), array('d')
+        # Edges are usually generated lazily, so this span includes the scoring
+        with trace.span("score_pairs") as span:
+            for i, j, weight in edges:
+                sources.append(i)
+                targets.append(j)
+                weights.append(weight)
+            span.count("edges", len(sources))
+        num_edges = len(sources)
+        self._set_edge_arrays(
+            np.frombuffer(sources, dtype=np.int64) if num_edges else np.zeros(0, np.int64),
+            np.frombuffer(targets, dtype=np.int64) if num_edges else np.zeros(0, np.int64),
+            np.frombuffer(weights, dtype=np.float64) if num_edges else np.zeros(0),
+            top_k)
+
+    def _set_edge_arrays(self, sources, targets, weights, top_k=None):
+        from imdb_graph.core.topk import TopKIndex
+
+        num_edges = len(sources)
+        with trace.span("csr_arrays", nodes=len(self.nodes_data)):
+            # Interleave both directions so a stable sort keeps insertion order per node
+            src = np.empty(2 * num_edges, dtype=np.int64)
+            dst = np.empty(2 * num_edges, dtype=np.int64)
+            src[0::2], src[1::2] = sources, targets
+            dst[0::2], dst[1::2] = targets, sources
+            order = np.argsort(src, kind='stable')
+
+            num_nodes = len(self.nodes_data)
+            self.offsets = np.zeros(num_nodes + 1, dtype=np.int64)
+            self.offsets[1:] = np.cumsum(np.bincount(src, minlength=num_nodes))
+            self.neighbors = dst[order].astype(np.int32)
+            self.weights = _weight_array(np.repeat(weights, 2)[order])
+            self._pending = {}
+            # Neighbors are in insertion order, so the top k can be picked by sorting
+            self.top_k_index = (TopKIndex.from_csr(self.offsets, self.neighbors, self.weights, top_k)
+                                if top_k else None)
+
+    def _grow_adjacency(self, count):
+        # Add `count` nodes without neighbors
+        self.offsets = np.concatenate([self.offsets, np.full(count, self.offsets[-1])])
+        if self.top_k_index is not None:
+            self.top_k_index.grow(count)
+
+    def add_edge(self, id1, id2, weight):
+        # New edges go to the overflow table until the next freeze()
+        self._pending.setdefault(id1, []).append((id2, weight))
+        self._pending.setdefault(id2, []).append((id1, weight))
+        if self.top_k_index is not None:
+            self.top_k_index.add_edge(id1, id2, weight)
+
+    def get_neighbors(self, node_id):
+        # Return the neighbors of the given node as (id, weight) pairs
+        start, end = self.offsets[node_id], self.offsets[node_id + 1]
+        neighbors = list(zip(self.neighbors[start:end].tolist(),
+                             self.weights[start:end].tolist()))
+        return neighbors + self._pending.get(node_id, [])
+
+    def get_degree(self, node_id):
+        # Return the number of neighbors without materializing them
+        degree = int(self.offsets[node_id + 1] - self.offsets[node_id])
+        return degree + len(self._pending.get(node_id, []))
+
+    def get_num_edges(self):
+        # Each edge is stored once per endpoint
+        pending = sum(len(neighbors) for neighbors in self._pending.values())
+        return (len(self.neighbors) + pending) // 2
+
+    def build_graph(self, movies, threshold=THRESHOLD, method="blocked", workers=1, top_k=TOP_K):
+        """Build the graph straight into CSR arrays without an intermediate adjacency list.
+
+        Args:
+            movies (list): List of movie data dictionaries, or a MovieTable
+            threshold (float): Minimum similarity score to create an edge
+            method (str): Build strategy, "blocked", "vectorized" or "pairwise"
+            workers (int, optional): Number of worker processes, None to use every CPU
+            top_k (int): Number of most similar neighbors to index per node, 0 for no index
+
+        Returns:
+            None
+        """
+        from imdb_graph.core.similarity import component_weights
+
+        table = movies if isinstance(movies, MovieTable) else MovieTable(movies)
+        num_nodes = len(self.nodes_data)
+        self.nodes_data = table
+        with trace.span("build_graph", method=method, movies=len(table)):
+            self._set_edges(build_edges(table, threshold, method, workers), top_k)
+        self.scoring = {'threshold': threshold, 'weights': component_weights()}
+        if len(table) < num_nodes:
+            self.nodes_data = _pad_table(table, num_nodes)
+            self._grow_adjacency(num_nodes - len(table))
+
+    @classmethod
+    def build_from_stream(cls, movies, threshold=THRESHOLD, workers=1, top_k=TOP_K):
+        """Build a graph from a stream of movies without keeping the raw dicts.
+
+        Movies are interned into a columnar MovieTable as they arrive, so peak
+        memory is bounded by the table rather than the list of movie dicts.
+
+        Args:
+            movies (iterable): Movie data dictionaries, e.g. from iter_movies
+            threshold (float): Minimum similarity score to create an edge
+            workers (int, optional): Number of worker processes, None to use every CPU
+            top_k (int): Number of most similar neighbors to index per node, 0 for no index
+
+        Returns:
+            CSRMovieGraph: The built graph
+        """
+        from imdb_graph.core.similarity import MovieFeatures, component_weights
+
+        with trace.span("build_graph", method="vectorized", workers=workers or 0):
+            with trace.span("intern_movies") as span:
+                features = MovieFeatures()
+                for movie in movies:
+                    features.append(movie)
+                features.finalize()
+                span.count("movies", features.num_movies)
+
+            graph = cls(0)
+            graph.nodes_data = features.table
+            graph._set_edges(build_edges(None, threshold, "vectorized", workers, features=features),
+                             top_k)
+        graph.scoring = {'threshold': threshold, 'weights': component_weights()}
+        return graph
+
+    def freeze(self):
+        """Merge edges added since the last freeze into the CSR arrays.
+
+        Returns:
+            CSRMovieGraph: This graph
+        """
+        if self._pending:
+            frozen = CSRMovieGraph.from_adjacency(self.adj_list, self.nodes_data)
+            self.offsets, self.neighbors, self.weights = (
+                frozen.offsets, frozen.neighbors, frozen.weights)
+            self._pending = {}
+        return self
@@ -1,10 +1,29 @@
 import json
+import os
+
+from imdb_graph.core.movie_table import MovieTable
+from imdb_graph.utils import trace
+from imdb_graph.utils.constants import THRESHOLD, TOP_K
+
+# Points awarded by calculate_similarity_weight for each matching component
+GENRE_WEIGHT = 3
+RATING_WEIGHT = 3
+DIRECTOR_WEIGHT = 2
+CAST_WEIGHT = 1
+YEAR_WEIGHT = 2
+
+RATING_TOLERANCE = 1.0  # Max rating difference for the rating component
+YEAR_TOLERANCE = 5      # Max release year difference for the year component
+MIN_SHARED_CAST = 2     # Shared cast members needed for the cast component
 
 class MovieGraph:
     def __init__(self, num_nodes):
         # Initialize a 2D list with empty lists for each node
         self.adj_list = [[] for _ in range(num_nodes)]
         self.nodes_data = [None] * num_nodes
+        self.top_k_index = None
+        self.communities = None  # Community id of every node, see detect_communities
+        self.scoring = None  # Threshold and component weights of the edges, None if unknown
 
     def add_node(self, node_id, movie_data):
         # Store movie data for the node
@@ -14,11 +33,37 @@ class MovieGraph:
         # Add an edge between id1 and id2 with the given weight
         self.adj_list[id1].append((id2, weight))
         self.adj_list[id2].append((id1, weight))  # Undirected graph
+        if self.top_k_index is not None:
+            self.top_k_index.add_edge(id1, id2, weight)
+
+    def _grow_adjacency(self, count):
+        # Add empty neighbor lists for `count` new nodes
+        self.adj_list.extend([] for _ in range(count))
+        if self.top_k_index is not None:
+            self.top_k_index.grow(count)
 
     def get_neighbors(self, node_id):
         # Return the neighbors of the given node
         return self.adj_list[node_id]
 
+    def top_k(self, node_id, k=TOP_K):
+        # Return up to k most similar neighbors, heaviest first, from the top-k index.
+        # k is capped at the indexed k; build with build_graph(..., top_k=...) for more
+        from imdb_graph.core.topk import TopKIndex
+
+        if k < 1:
+            raise ValueError(f"k must be at least 1, got {k}")
+        if self.top_k_index is None:
+            self.top_k_index = TopKIndex.from_adjacency(self.adj_list, TOP_K)
+        return self.top_k_index.top_k(node_id, min(k, self.top_k_index.k))
+
+    def detect_communities(self, max_rounds=None):
+        # Label every node with a community id, 0 being the largest community
+        from imdb_graph.core.community import MAX_ROUNDS, label_propagation
+
+        self.communities = label_propagation(self, max_rounds or MAX_ROUNDS)
+        return self.communities
+
     def get_node_data(self, node_id):
         # Return the data of the given node
         return self.nodes_data[node_id]
@@ -29,6 +74,8 @@ class MovieGraph:
 
     def get_num_nodes(self):
         # Return the number of nodes with data
+        if isinstance(self.nodes_data, MovieTable):
+            return self.nodes_data.num_present()
         return len([data for data in self.nodes_data if data is not None])
 
     def get_num_edges(self):
@@ -44,11 +91,22 @@ class MovieGraph:
         for neighbors in self.adj_list:
             adj_list.append(neighbors)
 
-        with open(path, 'w') as f:
-            json.dump({
-                'adj_list': adj_list,
-                'nodes_data': self.nodes_data
-            }, f, indent=2)
+        data = {
+            'adj_list': adj_list,
+            'nodes_data': list(self.nodes_data)
+        }
+        # Store the top-k index alongside so loaders need not sort neighbor lists
+        if self.top_k_index is not None:
+            data['top_k'] = {'k': self.top_k_index.k, 'neighbors': self.top_k_index.to_lists()}
+        if self.communities is not None:
+            data['communities'] = [int(c) for c in self.communities]
+        if self.scoring is not None:
+            data['scoring'] = self.scoring
+
+        with trace.span("save_json", path=str(path)) as span:
+            with open(path, 'w') as f:
+                json.dump(data, f, indent=2)
+            span.count("bytes_written", os.path.getsize(path))
 
     @staticmethod
     def load_from_json(path):
@@ -58,39 +116,182 @@ class MovieGraph:
 
         graph = MovieGraph(len(data['nodes_data']))
         graph.adj_list = data['adj_list']
-        graph.nodes_data = data['nodes_data']
+        graph.nodes_data = MovieTable(data['nodes_data'])
+        if 'top_k' in data:
+            from imdb_graph.core.topk import TopKIndex
+
+            graph.top_k_index = TopKIndex.from_lists(data['top_k']['neighbors'], data['top_k']['k'])
+        if 'communities' in data:
+            import numpy as np
+
+            graph.communities = np.asarray(data['communities'], dtype=np.int32)
+        graph.scoring = data.get('scoring')
         return graph
 
-    def build_graph(self, movies, threshold=6):
+    def save_to_binary(self, path):
+        # Save the graph in the memory-mappable binary format
+        from imdb_graph.core.binary_format import save_binary_graph
+
+        save_binary_graph(self, path)
+
+    @staticmethod
+    def load_from_binary(path):
+        # Map a binary graph file; arrays and node data are read on demand
+        from imdb_graph.core.binary_format import load_binary_graph
+
+        return load_binary_graph(path)
+
+    def build_graph(self, movies, threshold=THRESHOLD, method="blocked", workers=1, top_k=TOP_K):
         """
         Build the graph by adding edges between movies with similarity score > threshold.
 
-        :param movies: List of movie data dictionaries.
+        The "blocked" method only scores pairs that share an index key able to
+        clear the threshold, and the "vectorized" method scores blocks of rows
+        with NumPy. Both produce exactly the same edges, in the same order, as
+        the exhaustive "pairwise" method, regardless of the number of workers.
+
+        :param movies: List of movie data dictionaries, or a MovieTable.
         :param threshold: Minimum similarity score to create an edge.
+        :param method: Build strategy, "blocked", "vectorized" or "pairwise".
+        :param workers: Number of worker processes, None to use every CPU.
+        :param top_k: Number of most similar neighbors to index per node, 0 for no index.
+        """
+        from imdb_graph.core.similarity import component_weights
+        from imdb_graph.core.topk import TopKIndex
+
+        # Store all movies as nodes in a columnar table
+        table = movies if isinstance(movies, MovieTable) else MovieTable(movies)
+
+        # add_edge keeps a bounded heap of the heaviest neighbors of every node
+        self.top_k_index = TopKIndex(len(self.adj_list), top_k) if top_k else None
+        with trace.span("build_graph", method=method, movies=len(table)) as span:
+            for i, j, score in build_edges(table, threshold, method, workers):
+                self.add_edge(i, j, score)
+                span.count("edges")
+
+        self.nodes_data = _pad_table(table, len(self.adj_list))
+        self.scoring = {'threshold': threshold, 'weights': component_weights()}
+
+    def add_movies(self, new_movies, threshold=THRESHOLD):
+        """
+        Add movies to an already built graph, scoring only pairs that involve a new movie.
+
+        Existing nodes keep their ids and the new movies take the next ones, so the
+        cost is O(new x n). The edges and neighbor order are the same as rebuilding
+        the graph from scratch over the combined movie list.
+
+        :param new_movies: List of movie data dictionaries to add.
+        :param threshold: Minimum similarity score to create an edge, as used for the original build.
+        :return: List of node ids assigned to the new movies.
         """
-        # Add all movies as nodes
-        for i, movie in enumerate(movies):
-            self.add_node(i, movie)
+        from imdb_graph.core.similarity import VectorizedScorer
+
+        table = self.nodes_data
+        if not isinstance(table, MovieTable):
+            table = MovieTable(table)
+        start = len(table)
+        table.extend(new_movies)
+        self.nodes_data = table
+        self._grow_adjacency(len(table) - start)
+        self.communities = None  # Stale once new movies join, detect again
+
+        with trace.span("add_movies", movies=len(table) - start) as span:
+            for j, k, score in VectorizedScorer(table, threshold).incremental_edges(start):
+                self.add_edge(j, k, score)
+                span.count("edges")
+        return list(range(start, len(table)))
+
+    def freeze(self):
+        """
+        Freeze the graph into a compact compressed-sparse-row representation.
+
+        :return: A CSRMovieGraph with the same nodes, edges and neighbor order.
+        """
+        from imdb_graph.core.csr import CSRMovieGraph
+
+        graph = CSRMovieGraph.from_adjacency(self.adj_list, self.nodes_data)
+        graph.top_k_index = self.top_k_index
+        graph.communities = self.communities
+        graph.scoring = self.scoring
+        return graph
+
+def _pad_table(table, num_nodes):
+    # Leave nodes beyond the given movies without data, as add_node would
+    if len(table) < num_nodes:
+        table = MovieTable(list(table) + [None] * (num_nodes - len(table)))
+    return table
+
+def pairwise_edges(movies, threshold, start=0, stop=None):
+    """Yield the edges (i, j, score) for rows start <= i < stop by comparing every pair.
+
+    :param movies: List of movie data dictionaries.
+    :param threshold: Minimum similarity score (exclusive) to create an edge.
+    :param start: First row to score.
+    :param stop: Row to stop before, defaults to all rows.
+    """
+    if stop is None:
+        stop = len(movies)
+    # Compare each pair of movies and keep those with similarity score > threshold
+    for i in range(start, stop):
+        trace.count("pairs_scored", len(movies) - i - 1)
+        for j in range(i + 1, len(movies)):
+            score = calculate_similarity_weight(movies[i], movies[j])
+            if score > threshold:
+                yield i, j, score
+
+def build_edges(movies, threshold, method="blocked", workers=1, features=None):
+    """Generate every edge of the graph with the given build method.
+
+    :param movies: List of movie data dictionaries.
+    :param threshold: Minimum similarity score (exclusive) to create an edge.
+    :param method: Build strategy, "blocked", "vectorized" or "pairwise".
+    :param workers: Number of worker processes, None to use every CPU.
+    :param features: Pre-encoded MovieFeatures, replaces movies for the vectorized method.
+    :return: Iterable of (i, j, score) edges in row order.
+    """
+    if workers is None or workers > 1:
+        from imdb_graph.core.parallel import parallel_edges
+
+        return parallel_edges(movies, threshold, method=method, workers=workers,
+                              features=features)
+    return edge_source(movies, threshold, method, features)()
+
+def edge_source(movies, threshold, method="blocked", features=None):
+    """Create the edge generator for a build method.
+
+    :param movies: List of movie data dictionaries.
+    :param threshold: Minimum similarity score (exclusive) to create an edge.
+    :param method: Build strategy, "blocked", "vectorized" or "pairwise".
+    :param features: Pre-encoded MovieFeatures, replaces movies for the vectorized method.
+    :return: Callable edges(start=0, stop=None) yielding (i, j, score) in row order.
+    """
+    if method in ("pairwise", "blocked") and isinstance(movies, MovieTable):
+        # The pure Python methods index the movie dicts over and over
+        movies = list(movies)
+    if method == "pairwise":
+        return lambda start=0, stop=None: pairwise_edges(movies, threshold, start, stop)
+    if method == "blocked":
+        from imdb_graph.core.blocking import BlockingIndex
+
+        return BlockingIndex(movies, threshold).edges
+    if method == "vectorized":
+        from imdb_graph.core.similarity import VectorizedScorer
 
-        # Compare each pair of movies and add edges if similarity score > threshold
-        for i in range(len(movies)):
-            for j in range(i + 1, len(movies)):
-                score = calculate_similarity_weight(movies[i], movies[j])
-                if score > threshold:
-                    self.add_edge(i, j, score)
+        return VectorizedScorer(movies, threshold, features=features).edges
+    raise ValueError(f"Unknown build method: {method}")
 
 def calculate_similarity_weight(m1, m2):
     score = 0
     if len(set(m1['genres']).intersection(set(m2['genres']))) > 0:
-        score += 3
+        score += GENRE_WEIGHT
     if m1['rating'] is not None and m2['rating'] is not None:
-        if abs(m1['rating'] - m2['rating']) <= 1.0:
-            score += 3
+        if abs(m1['rating'] - m2['rating']) <= RATING_TOLERANCE:
+            score += RATING_WEIGHT
     if m1['director'] == m2['director']:
-        score += 2
-    if len(set(m1['cast']).intersection(set(m2['cast']))) >= 2:
-        score += 1
+        score += DIRECTOR_WEIGHT
+    if len(set(m1['cast']).intersection(set(m2['cast']))) >= MIN_SHARED_CAST:
+        score += CAST_WEIGHT
     if m1['year'] is not None and m2['year'] is not None:
-        if abs(m1['year'] - m2['year']) <= 5:
-            score += 2
+        if abs(m1['year'] - m2['year']) <= YEAR_TOLERANCE:
+            score += YEAR_WEIGHT
     return score
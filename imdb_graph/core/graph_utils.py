@@ -1,40 +1,98 @@
 import json
-import time
+import os
 from pathlib import Path
 
 # Import from the package
 from imdb_graph.utils.constants import DATA_DIR
+from imdb_graph.core.binary_format import VERSION, binary_graph_version, binary_path_for, is_binary_graph
+from imdb_graph.utils import trace
 
 # Define the path to the JSON file
 JSON_PATH = DATA_DIR / "movie_graph.json"
 
+def find_binary_graph(json_path=JSON_PATH):
+    """Find an up-to-date binary graph for a JSON graph path.
+
+    The binary file is used when it is the given path itself, or when it sits
+    alongside the JSON file, is at least as new and was written in the current
+    format version. A binary file in another version is stale: the JSON file is
+    used instead until the graph is rebuilt.
+
+    Args:
+        json_path (Path): Path to the JSON graph file
+
+    Returns:
+        Path: The binary graph path, or None if there is none to use
+    """
+    json_path = Path(json_path)
+    if is_binary_graph(json_path):
+        return json_path
+    binary_path = binary_path_for(json_path)
+    if not is_binary_graph(binary_path):
+        return None
+    if json_path.exists() and binary_path.stat().st_mtime < json_path.stat().st_mtime:
+        return None
+    version = binary_graph_version(binary_path)
+    if json_path.exists() and version != VERSION:
+        print(f"Ignoring stale binary graph {binary_path} (format version {version}, expected "
+              f"{VERSION}), loading {json_path} instead. Rebuild the graph to rewrite it.")
+        return None
+    return binary_path
+
 def load_graph(json_path=JSON_PATH):
-    """Load the movie graph data from a JSON file.
-    
+    """Load the movie graph data, preferring the memory-mapped binary format.
+
     Args:
         json_path (Path): Path to the JSON file containing graph data
         
     Returns:
-        dict: The loaded graph data
+        dict: The loaded graph data with "adj_list" and "nodes_data" entries, a
+        "top_k" TopKIndex and "communities" ids when the file stores them
     """
+    binary_path = find_binary_graph(json_path)
+    if binary_path is not None:
+        from imdb_graph.core.graph import MovieGraph
+
+        print(f"Mapping graph data from binary file: {binary_path}")
+        with trace.span("load_graph", format="binary", path=str(binary_path)) as span:
+            graph = MovieGraph.load_from_binary(binary_path)
+            span.count("nodes", len(graph.nodes_data))
+        print(f"Binary graph mapped in {span.elapsed:.2f} seconds")
+        return {"adj_list": graph.adj_list, "nodes_data": graph.nodes_data, "graph": graph,
+                "top_k": graph.top_k_index, "communities": graph.communities}
+
     print(f"Loading graph data from JSON file: {json_path}")
-    start = time.time()
-    with open(json_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    print(f"JSON data loaded in {time.time() - start:.2f} seconds")
+    with trace.span("load_graph", format="json", path=str(json_path)) as span:
+        with open(json_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        span.count("bytes_read", os.path.getsize(json_path))
+        span.count("nodes", len(data["nodes_data"]))
+        if "top_k" in data:
+            from imdb_graph.core.topk import TopKIndex
+
+            data["top_k"] = TopKIndex.from_lists(data["top_k"]["neighbors"], data["top_k"]["k"])
+    print(f"JSON data loaded in {span.elapsed:.2f} seconds")
     return data
 
-def prepare_similar_movies(adj_list):
+def prepare_similar_movies(adj_list, top_k=None, nodes=None):
     """Prepare a dictionary to store top similar movies for each movie.
     
     Args:
         adj_list (list): Adjacency list representation of the graph
+        top_k (TopKIndex, optional): Prebuilt top-k index, read instead of sorting neighbors
+        nodes (iterable, optional): Only prepare these movie indices, defaults to all
         
     Returns:
         dict: Dictionary mapping movie index to list of top similar movies
     """
+    nodes = range(len(adj_list)) if nodes is None else [int(idx) for idx in nodes]
+    if top_k is not None and top_k.k >= 5:
+        # O(k) per movie, the neighbor lists are never touched
+        return {idx: top_k.top_k(idx, 5) for idx in nodes}
+
     top_similar_movies = {}
-    for idx, neighbors in enumerate(adj_list):
+    for idx in nodes:
+        neighbors = adj_list[idx]
         # Sort neighbors by weight in descending order
         sorted_neighbors = sorted(neighbors, key=lambda x: x[1], reverse=True)
         # Get top 5 or fewer similar movies
@@ -0,0 +1,186 @@
+"""
+Columnar, interned storage for movie node data.
+
+Titles, genres, directors and cast members are interned into one shared string
+pool, so every repeated actor name is stored once and compared as an integer.
+Year and rating live in float arrays (NaN for missing values) and the genre and
+cast lists are ragged arrays of pool ids. Rows still read back as the familiar
+movie dictionaries, so a MovieTable can stand in for a list of movies.
+"""
+import math
+from array import array
+
+# Keys stored as columns; any other key of a movie is kept aside as-is
+COLUMNS = ("id", "title", "year", "rating", "genres", "director", "cast")
+
+MISSING = -1  # Pool id used for None
+
+class StringPool:
+    """Assigns a dense integer id to every distinct string."""
+
+    def __init__(self):
+        self.strings = []
+        self.ids = {}
+
+    def __len__(self):
+        return len(self.strings)
+
+    def intern(self, value):
+        # Return the id of a string, adding it on first sight
+        if value is None:
+            return MISSING
+        string_id = self.ids.get(value)
+        if string_id is None:
+            string_id = self.ids[value] = len(self.strings)
+            self.strings.append(value)
+        return string_id
+
+    def lookup(self, string_id):
+        # Return the string for an id
+        return None if string_id == MISSING else self.strings[string_id]
+
+def _as_float(value):
+    return math.nan if value is None else float(value)
+
+def _as_number(value):
+    if math.isnan(value):
+        return None
+    return int(value) if value.is_integer() else value
+
+class MovieTable:
+    """Columnar table of movies backed by arrays and a shared string pool.
+
+    Rows may be None, mirroring nodes without data in a MovieGraph.
+
+    Args:
+        movies (iterable, optional): Movie data dictionaries to append
+    """
+
+    def __init__(self, movies=()):
+        self.pool = StringPool()
+        self.present = array('b')
+        self.ids = []
+        self.title = array('i')
+        self.year = array('d')
+        self.rating = array('d')
+        self.director = array('i')
+        self.genre_values, self.genre_offsets = array('i'), array('q', [0])
+        self.cast_values, self.cast_offsets = array('i'), array('q', [0])
+        self.extras = {}
+        self.extend(movies)
+
+    def append(self, movie):
+        """Append one movie, interning its strings.
+
+        Args:
+            movie (dict): Movie data dictionary, or None for an empty row
+
+        Returns:
+            int: Index of the new row
+        """
+        row = len(self.present)
+        self.present.append(movie is not None)
+        movie = movie or {}
+        self.ids.append(movie.get("id"))
+        self.title.append(self.pool.intern(movie.get("title")))
+        self.year.append(_as_float(movie.get("year")))
+        self.rating.append(_as_float(movie.get("rating")))
+        self.director.append(self.pool.intern(movie.get("director")))
+        self.genre_values.extend(self.pool.intern(g) for g in movie.get("genres", ()))
+        self.genre_offsets.append(len(self.genre_values))
+        self.cast_values.extend(self.pool.intern(p) for p in movie.get("cast", ()))
+        self.cast_offsets.append(len(self.cast_values))
+        extra = {key: value for key, value in movie.items() if key not in COLUMNS}
+        if extra:
+            self.extras[row] = extra
+        return row
+
+    def __setitem__(self, row, movie):
+        # Replace a row in place, or append when row is one past the end
+        if row == len(self):
+            self.append(movie)
+            return
+        if row < 0:
+            row += len(self)
+        self.present[row] = movie is not None
+        movie = movie or {}
+        self.ids[row] = movie.get("id")
+        self.title[row] = self.pool.intern(movie.get("title"))
+        self.year[row] = _as_float(movie.get("year"))
+        self.rating[row] = _as_float(movie.get("rating"))
+        self.director[row] = self.pool.intern(movie.get("director"))
+        self._splice(self.genre_values, self.genre_offsets, row,
+                     [self.pool.intern(g) for g in movie.get("genres", ())])
+        self._splice(self.cast_values, self.cast_offsets, row,
+                     [self.pool.intern(p) for p in movie.get("cast", ())])
+        extra = {key: value for key, value in movie.items() if key not in COLUMNS}
+        if extra:
+            self.extras[row] = extra
+        else:
+            self.extras.pop(row, None)
+
+    @staticmethod
+    def _splice(values, offsets, row, new_values):
+        start, end = offsets[row], offsets[row + 1]
+        values[start:end] = array(values.typecode, new_values)
+        shift = len(new_values) - (end - start)
+        if shift:
+            for k in range(row + 1, len(offsets)):
+                offsets[k] += shift
+
+    def extend(self, movies):
+        # Append every movie of an iterable
+        for movie in movies:
+            self.append(movie)
+
+    def __len__(self):
+        return len(self.present)
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self[i] for i in range(*row.indices(len(self)))]
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError("MovieTable index out of range")
+        if not self.present[row]:
+            return None
+        movie = {
+            "id": self.ids[row],
+            "title": self.get_title(row),
+            "year": _as_number(self.year[row]),
+            "rating": None if math.isnan(self.rating[row]) else self.rating[row],
+            "genres": self.get_genres(row),
+            "director": self.pool.lookup(self.director[row]),
+            "cast": self.get_cast(row),
+        }
+        movie.update(self.extras.get(row, {}))
+        return movie
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self[row]
+
+    def num_present(self):
+        # Number of rows holding a movie
+        return sum(self.present)
+
+    def get_title(self, row):
+        # Title of a movie without materializing the whole row
+        return self.pool.lookup(self.title[row])
+
+    def genre_ids(self, row):
+        # Interned genre ids of a movie
+        return self.genre_values[self.genre_offsets[row]:self.genre_offsets[row + 1]]
+
+    def cast_ids(self, row):
+        # Interned cast member ids of a movie
+        return self.cast_values[self.cast_offsets[row]:self.cast_offsets[row + 1]]
+
+    def get_genres(self, row):
+        # Genre names of a movie
+        return [self.pool.lookup(g) for g in self.genre_ids(row)]
+
+    def get_cast(self, row):
+        # Cast member names of a movie
+        return [self.pool.lookup(p) for p in self.cast_ids(row)]
@@ -0,0 +1,82 @@
+"""
+Multi-core graph construction.
+
+The upper-triangular pair space is split into row ranges holding roughly the
+same number of pairs. Each shard is scored in a worker process and the partial
+edge lists are merged in shard order, so the resulting graph is identical for
+any number of workers.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from imdb_graph.core.graph import edge_source
+
+# Shards per worker, so uneven shards still keep every worker busy
+SHARDS_PER_WORKER = 4
+
+# Edge generator of the current worker process, created once by _init_worker
+_worker_edges = None
+
+def shard_rows(num_rows, num_shards):
+    """Split rows into contiguous ranges with a balanced number of pairs.
+
+    Row i owns the pairs (i, j) with j > i, so early rows are heavier.
+
+    Args:
+        num_rows (int): Number of rows (movies)
+        num_shards (int): Desired number of shards
+
+    Returns:
+        list: (start, stop) row ranges covering every row in order
+    """
+    total = num_rows * (num_rows - 1) // 2
+    num_shards = max(1, min(num_shards, num_rows))
+    shards = []
+    start = 0
+    pairs_seen = 0
+    for i in range(num_rows):
+        pairs_seen += num_rows - 1 - i
+        # Close the shard once it reaches its share of the pairs
+        if pairs_seen * num_shards >= total * (len(shards) + 1):
+            shards.append((start, i + 1))
+            start = i + 1
+    if start < num_rows:
+        if len(shards) == num_shards:
+            # Trailing rows without pairs join the last shard
+            shards[-1] = (shards[-1][0], num_rows)
+        else:
+            shards.append((start, num_rows))
+    return shards
+
+def _init_worker(movies, threshold, method, features):
+    global _worker_edges
+    _worker_edges = edge_source(movies, threshold, method, features)
+
+def _score_shard(shard):
+    start, stop = shard
+    return list(_worker_edges(start, stop))
+
+def parallel_edges(movies, threshold, method="blocked", workers=None, features=None):
+    """Score every pair in a process pool and return the merged edge list.
+
+    Args:
+        movies (list): List of movie data dictionaries
+        threshold (float): Minimum similarity score (exclusive) to create an edge
+        method (str): Build strategy passed to edge_source
+        workers (int, optional): Number of worker processes, defaults to every CPU
+        features (MovieFeatures, optional): Pre-encoded features, replaces movies
+            for the vectorized method
+
+    Returns:
+        list: (i, j, score) edges in the same order as a serial build
+    """
+    workers = workers or os.cpu_count() or 1
+    num_rows = features.num_movies if features is not None else len(movies)
+    shards = shard_rows(num_rows, workers * SHARDS_PER_WORKER)
+    edges = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(movies, threshold, method, features)) as executor:
+        # map yields results in shard order, which keeps the merge deterministic
+        for shard_edges in executor.map(_score_shard, shards):
+            edges.extend(shard_edges)
+    return edges
@@ -0,0 +1,243 @@
+"""
+Path queries over a movie graph.
+
+GraphQuery answers "how is movie A connected to movie B" with breadth-first
+search (fewest hops), bidirectional BFS (fewest hops, exploring far fewer
+nodes) and Dijkstra (strongest similarity chain, where heavier edges cost
+less). Searches stop as soon as the target is reached, and the visited marks
+live in buffers that are reused across queries: bumping an epoch counter
+clears them in O(1) instead of reallocating per query.
+"""
+import heapq
+
+from imdb_graph.core.graph import (
+    CAST_WEIGHT,
+    DIRECTOR_WEIGHT,
+    GENRE_WEIGHT,
+    RATING_WEIGHT,
+    YEAR_WEIGHT,
+)
+
+# Highest similarity score two movies can have
+MAX_SIMILARITY = GENRE_WEIGHT + RATING_WEIGHT + DIRECTOR_WEIGHT + CAST_WEIGHT + YEAR_WEIGHT
+
+def similarity_cost(weights):
+    """Turn similarity weights into positive edge costs, the more similar the cheaper.
+
+    Args:
+        weights (float or numpy.ndarray): Edge weights
+
+    Returns:
+        float or numpy.ndarray: Costs of at least 1
+    """
+    return MAX_SIMILARITY + 1 - weights
+
+class VisitBuffer:
+    """Per-node visit marks, parents, distances and settled marks reused across searches.
+
+    A node counts as visited only if its stamp equals the current epoch, so
+    reset() starts a new search without touching the arrays.
+
+    Args:
+        size (int): Number of nodes
+    """
+
+    def __init__(self, size):
+        self.stamp = [0] * size
+        self.parent = [-1] * size
+        self.distance = [0.0] * size
+        self.closed = [0] * size
+        self.epoch = 0
+
+    def reset(self):
+        # Forget every visit of the previous search
+        self.epoch += 1
+        return self.epoch
+
+    def path_to(self, node):
+        # Follow parents back to the source, then reverse
+        path = []
+        while node != -1:
+            path.append(node)
+            node = self.parent[node]
+        return path[::-1]
+
+class GraphQuery:
+    """Path queries over the CSR arrays of a graph.
+
+    Args:
+        graph (MovieGraph): Graph to query, frozen into CSR form if needed
+        cost (callable, optional): Maps a NumPy array of weights to edge costs
+            for Dijkstra, defaults to similarity_cost
+    """
+
+    def __init__(self, graph, cost=similarity_cost):
+        graph = graph.freeze()
+        self.graph = graph
+        self.offsets = graph.offsets.tolist()
+        self.neighbors = graph.neighbors
+        self.costs = cost(graph.weights.astype(float))
+        num_nodes = len(self.offsets) - 1
+        self.forward = VisitBuffer(num_nodes)
+        self.backward = VisitBuffer(num_nodes)
+
+    def _neighbors(self, node):
+        return self.neighbors[self.offsets[node]:self.offsets[node + 1]].tolist()
+
+    def bfs(self, source, max_depth=None):
+        """List the nodes reachable from a node in breadth-first order.
+
+        Args:
+            source (int): Start node
+            max_depth (int, optional): Stop after this many hops
+
+        Returns:
+            list: (node_id, hops) pairs, starting with (source, 0)
+        """
+        buffer = self.forward
+        epoch = buffer.reset()
+        stamp = buffer.stamp
+        stamp[source] = epoch
+        order = [(source, 0)]
+        frontier, depth = [source], 0
+        while frontier and (max_depth is None or depth < max_depth):
+            depth += 1
+            next_frontier = []
+            for node in frontier:
+                for neighbor in self._neighbors(node):
+                    if stamp[neighbor] != epoch:
+                        stamp[neighbor] = epoch
+                        next_frontier.append(neighbor)
+                        order.append((neighbor, depth))
+            frontier = next_frontier
+        return order
+
+    def bfs_path(self, source, target, max_depth=None):
+        """Find a path with the fewest hops, expanding from the source only.
+
+        Args:
+            source (int): Start node
+            target (int): End node
+            max_depth (int, optional): Give up beyond this many hops
+
+        Returns:
+            list: Node ids from source to target, or None if there is no such path
+        """
+        if source == target:
+            return [source]
+        buffer = self.forward
+        epoch = buffer.reset()
+        stamp, parent = buffer.stamp, buffer.parent
+        stamp[source], parent[source] = epoch, -1
+        frontier, depth = [source], 0
+        while frontier and (max_depth is None or depth < max_depth):
+            depth += 1
+            next_frontier = []
+            for node in frontier:
+                for neighbor in self._neighbors(node):
+                    if stamp[neighbor] != epoch:
+                        stamp[neighbor], parent[neighbor] = epoch, node
+                        if neighbor == target:
+                            return buffer.path_to(target)
+                        next_frontier.append(neighbor)
+            frontier = next_frontier
+        return None
+
+    def shortest_path(self, source, target, max_depth=None):
+        """Find a path with the fewest hops, searching from both ends at once.
+
+        The smaller frontier is expanded one level at a time, and the search
+        stops as soon as the two sides meet.
+
+        Args:
+            source (int): Start node
+            target (int): End node
+            max_depth (int, optional): Give up beyond this many hops
+
+        Returns:
+            list: Node ids from source to target, or None if there is no such path
+        """
+        if source == target:
+            return [source]
+        forward, backward = self.forward, self.backward
+        epoch_f, epoch_b = forward.reset(), backward.reset()
+        forward.stamp[source], forward.parent[source] = epoch_f, -1
+        backward.stamp[target], backward.parent[target] = epoch_b, -1
+        frontiers = {True: [source], False: [target]}
+        hops = 0
+        while frontiers[True] and frontiers[False]:
+            if max_depth is not None and hops >= max_depth:
+                return None
+            hops += 1
+            # Expand the side with the smaller frontier
+            is_forward = len(frontiers[True]) <= len(frontiers[False])
+            side, other = (forward, backward) if is_forward else (backward, forward)
+            epoch, other_epoch = side.epoch, other.epoch
+            stamp, parent, other_stamp = side.stamp, side.parent, other.stamp
+            next_frontier = []
+            for node in frontiers[is_forward]:
+                for neighbor in self._neighbors(node):
+                    if stamp[neighbor] == epoch:
+                        continue
+                    stamp[neighbor], parent[neighbor] = epoch, node
+                    if other_stamp[neighbor] == other_epoch:
+                        # The two searches met: join both halves at this node
+                        return forward.path_to(neighbor) + backward.path_to(neighbor)[-2::-1]
+                    next_frontier.append(neighbor)
+            frontiers[is_forward] = next_frontier
+        return None
+
+    def strongest_path(self, source, target, max_cost=None):
+        """Find the chain of most similar movies with bidirectional Dijkstra.
+
+        Both ends are searched at once, and the search stops once the cheapest
+        unsettled nodes on the two sides cannot lead to a cheaper path than
+        the best meeting found so far.
+
+        Args:
+            source (int): Start node
+            target (int): End node
+            max_cost (float, optional): Give up on paths costing more than this
+
+        Returns:
+            tuple: (node ids from source to target, total cost), or (None, None)
+            if there is no such path
+        """
+        if source == target:
+            return [source], 0.0
+        forward, backward = self.forward, self.backward
+        for buffer, start in ((forward, source), (backward, target)):
+            epoch = buffer.reset()
+            buffer.stamp[start], buffer.parent[start], buffer.distance[start] = epoch, -1, 0.0
+        heaps = {True: [(0.0, source)], False: [(0.0, target)]}
+        best, meeting = float("inf"), -1
+        if max_cost is not None:
+            best = max_cost + 1e-9
+        while heaps[True] and heaps[False]:
+            if heaps[True][0][0] + heaps[False][0][0] >= best:
+                break
+            # Advance the side with fewer queued nodes
+            is_forward = len(heaps[True]) <= len(heaps[False])
+            side, other = (forward, backward) if is_forward else (backward, forward)
+            heap = heaps[is_forward]
+            cost, node = heapq.heappop(heap)
+            if side.closed[node] == side.epoch:
+                continue
+            side.closed[node] = side.epoch
+            epoch, other_epoch = side.epoch, other.epoch
+            stamp, parent, distance = side.stamp, side.parent, side.distance
+            start, end = self.offsets[node], self.offsets[node + 1]
+            for neighbor, edge_cost in zip(self.neighbors[start:end].tolist(),
+                                           self.costs[start:end].tolist()):
+                new_cost = cost + edge_cost
+                if stamp[neighbor] != epoch or new_cost < distance[neighbor]:
+                    stamp[neighbor], parent[neighbor], distance[neighbor] = epoch, node, new_cost
+                    heapq.heappush(heap, (new_cost, neighbor))
+                    if other.stamp[neighbor] == other_epoch:
+                        total = new_cost + other.distance[neighbor]
+                        if total < best:
+                            best, meeting = total, neighbor
+        if meeting == -1:
+            return None, None
+        path = forward.path_to(meeting) + backward.path_to(meeting)[-2::-1]
+        return path, forward.distance[meeting] + backward.distance[meeting]
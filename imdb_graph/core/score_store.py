@@ -0,0 +1,231 @@
+"""
+Threshold-independent store of scored movie pairs.
+
+A build scores every pair of movies, the quadratic part of the work, and then
+keeps only the pairs above one threshold. A ScoreStore runs the scoring pass
+once and keeps every pair scoring above a low floor, with the bitmask of the
+similarity components (genre, rating, director, cast, year) that fired for it.
+The graph at any threshold above the floor, or with re-weighted components that
+do not lift a left-out pair over the threshold, is then a vectorized filter
+over the stored pairs.
+
+Pairs are stored in the order of the pairwise build loop, so a graph derived
+from the store has the same edges and neighbor order as a direct build.
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from imdb_graph.core.movie_table import MovieTable
+from imdb_graph.core.similarity import VectorizedScorer, component_weights, score_table
+from imdb_graph.utils import trace
+from imdb_graph.utils.constants import STORE_MIN_SCORE, THRESHOLD, TOP_K
+
+STORE_FORMAT = 1  # Bumped when the saved arrays change meaning
+
+def movies_digest(movies):
+    """Fingerprint the scored features of a list of movies.
+
+    Covers the id and every column the similarity score reads (genres, rating,
+    director, cast and year), so a re-fetched movie whose data changed under
+    the same id no longer matches a store scored before the change.
+
+    Args:
+        movies (list): Movie data dictionaries, or a MovieTable
+
+    Returns:
+        str: Hex digest, equal for the same movie features in the same order
+    """
+    table = movies if isinstance(movies, MovieTable) else MovieTable(movies)
+    digest = hashlib.sha1()
+    for row in range(len(table)):
+        features = None
+        if table.present[row]:
+            features = [table.ids[row], table.year[row], table.rating[row], table.get_genres(row),
+                        table.pool.lookup(table.director[row]), table.get_cast(row)]
+        digest.update(json.dumps(features, default=str).encode())
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+class ScoreStore:
+    """Every movie pair scoring above a floor, with the components that fired for it.
+
+    Args:
+        num_movies (int): Number of movies the pairs index into
+        rows (numpy.ndarray): First movie of every pair, ascending
+        cols (numpy.ndarray): Second movie of every pair, ascending within a row
+        masks (numpy.ndarray): COMPONENT_BITS mask of every pair
+        min_score (float): Every pair scoring above it with the default weights is stored
+        digest (str, optional): movies_digest of the scored movies
+    """
+
+    def __init__(self, num_movies, rows, cols, masks, min_score=STORE_MIN_SCORE, digest=None):
+        self.num_movies = num_movies
+        self.rows = np.asarray(rows, dtype=np.int32)
+        self.cols = np.asarray(cols, dtype=np.int32)
+        self.masks = np.asarray(masks, dtype=np.uint8)
+        self.min_score = min_score
+        self.digest = digest
+
+    def __len__(self):
+        return len(self.masks)
+
+    @classmethod
+    def build(cls, movies, min_score=STORE_MIN_SCORE, features=None, tile_size=None):
+        """Score every pair of movies once and keep those above the floor.
+
+        Args:
+            movies (list): Movie data dictionaries or a MovieTable, unused when `features` is given
+            min_score (float): Lowest threshold the store has to serve
+            features (MovieFeatures, optional): Pre-encoded features for `movies`
+            tile_size (int, optional): Rows per score block, sized automatically by default
+
+        Returns:
+            ScoreStore: The store
+        """
+        scorer = VectorizedScorer(movies, min_score, tile_size=tile_size, features=features)
+        n = scorer.features.num_movies
+        parts = []
+        with trace.span("score_store", movies=n) as span:
+            for lo in range(0, n, scorer.tile_size):
+                hi = min(lo + scorer.tile_size, n)
+                parts.append(scorer.component_arrays(lo, hi))
+                span.count("pairs_scored", (hi - lo) * (2 * n - lo - hi - 1) // 2)
+            rows, cols, masks = ([np.concatenate(arrays) for arrays in zip(*parts)] if parts
+                                 else (np.zeros(0, np.int64),) * 3)
+            span.count("pairs_stored", len(masks))
+        return cls(n, rows, cols, masks, min_score, movies_digest(scorer.features.table))
+
+    def matches(self, movies):
+        """Check that the store was built over these movies, in this order.
+
+        Args:
+            movies (list): Movie data dictionaries, or a MovieTable
+
+        Returns:
+            bool: True if the pairs index into `movies`
+        """
+        return len(movies) == self.num_movies and movies_digest(movies) == self.digest
+
+    def scores(self, weights=None):
+        """Score every stored pair.
+
+        Args:
+            weights (dict, optional): Component name -> weight, overriding the defaults
+
+        Returns:
+            numpy.ndarray: Score of every pair, in storage order
+        """
+        return score_table(weights)[self.masks]
+
+    def covers(self, threshold, weights=None):
+        """Check that every pair scoring above a threshold is in the store.
+
+        Pairs are only stored when they score above min_score with the default
+        weights. Re-weighting can lift a component combination left out that
+        way over the threshold, and with only 32 combinations each is checked.
+
+        Args:
+            threshold (float): Minimum similarity score (exclusive) to create an edge
+            weights (dict, optional): Component name -> weight, overriding the defaults
+
+        Returns:
+            bool: True if no pair left out of the store can score above the threshold
+        """
+        dropped = score_table() <= self.min_score
+        return not np.any(score_table(weights)[dropped] > threshold)
+
+    def edge_arrays(self, threshold=THRESHOLD, weights=None):
+        """Select the pairs scoring above a threshold.
+
+        Args:
+            threshold (float): Minimum similarity score (exclusive) to create an edge
+            weights (dict, optional): Component name -> weight, overriding the defaults
+
+        Returns:
+            tuple: (rows, cols, scores) arrays ordered by row then column
+
+        Raises:
+            ValueError: If pairs left out of the store could score above the threshold
+        """
+        if not self.covers(threshold, weights):
+            raise ValueError(f"Pairs scoring {self.min_score:g} or less with the default weights "
+                             f"are not stored but can score above {threshold:g} with these weights, "
+                             f"rebuild the store with a lower min_score")
+        scores = self.scores(weights)
+        keep = scores > threshold
+        return self.rows[keep], self.cols[keep], scores[keep]
+
+    def edge_counts(self, thresholds, weights=None):
+        """Count the edges the graph would have at each threshold.
+
+        Args:
+            thresholds (iterable): Thresholds to try
+            weights (dict, optional): Component name -> weight, overriding the defaults
+
+        Returns:
+            list: Number of pairs scoring above each threshold
+        """
+        scores = np.sort(self.scores(weights))
+        return [int(len(scores) - np.searchsorted(scores, t, side='right')) for t in thresholds]
+
+    def to_graph(self, nodes_data, threshold=THRESHOLD, weights=None, top_k=TOP_K):
+        """Derive the graph at a threshold without scoring any pair again.
+
+        Args:
+            nodes_data (list): Movie data for every node, the movies the store was built over
+            threshold (float): Minimum similarity score (exclusive) to create an edge
+            weights (dict, optional): Component name -> weight, overriding the defaults
+            top_k (int): Number of most similar neighbors to index per node, 0 for no index
+
+        Returns:
+            CSRMovieGraph: The graph
+        """
+        from imdb_graph.core.csr import CSRMovieGraph
+
+        if len(nodes_data) != self.num_movies:
+            raise ValueError(f"The score store covers {self.num_movies} movies, "
+                             f"got {len(nodes_data)}")
+        with trace.span("filter_pairs", threshold=threshold) as span:
+            rows, cols, scores = self.edge_arrays(threshold, weights)
+            span.count("edges", len(rows))
+            graph = CSRMovieGraph.from_edge_arrays(nodes_data, rows, cols, scores, top_k)
+        graph.scoring = {'threshold': threshold, 'weights': component_weights(weights)}
+        return graph
+
+    def save(self, path):
+        """Write the store to an uncompressed .npz file.
+
+        Args:
+            path (str or Path): Destination file
+
+        Returns:
+            None
+        """
+        with trace.span("save_scores", path=str(path)) as span:
+            with open(path, 'wb') as f:
+                np.savez(f, format=STORE_FORMAT, num_movies=self.num_movies,
+                         min_score=self.min_score, digest=self.digest or "",
+                         rows=self.rows, cols=self.cols, masks=self.masks)
+            span.count("bytes_written", os.path.getsize(path))
+
+    @classmethod
+    def load(cls, path):
+        """Read a store written by save().
+
+        Args:
+            path (str or Path): Store file
+
+        Returns:
+            ScoreStore: The store
+
+        Raises:
+            ValueError: If the file was written in another store format
+        """
+        with np.load(path) as data:
+            if int(data['format']) != STORE_FORMAT:
+                raise ValueError(f"Unsupported score store format {int(data['format'])} in {path}")
+            return cls(int(data['num_movies']), data['rows'], data['cols'], data['masks'],
+                       data['min_score'].item(), str(data['digest']) or None)
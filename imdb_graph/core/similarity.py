@@ -0,0 +1,305 @@
+"""
+NumPy-vectorized similarity scoring for graph construction.
+
+Movie features are encoded into arrays (genre bitmasks, year/rating floats with
+NaN for missing values, interned director and cast ids from a MovieTable) and
+scores are computed a block of rows at a time against every later column. The
+shared cast component comes from a CastOverlapIndex, which only visits pairs
+with an actor in common. The scores match calculate_similarity_weight exactly.
+
+A block can also be summarized as a bitmask of the components that fired for
+each pair, which score_table turns back into scores for any component weights.
+"""
+import numpy as np
+
+from imdb_graph.core.cast_overlap import CastOverlapIndex
+from imdb_graph.core.graph import (
+    CAST_WEIGHT,
+    DIRECTOR_WEIGHT,
+    GENRE_WEIGHT,
+    RATING_TOLERANCE,
+    RATING_WEIGHT,
+    YEAR_TOLERANCE,
+    YEAR_WEIGHT,
+)
+from imdb_graph.core.movie_table import MovieTable
+from imdb_graph.utils import trace
+
+# Upper bound on the number of pair cells materialized per score block
+BLOCK_CELLS = 1 << 22
+
+# Bit of each similarity component in a component mask
+COMPONENT_BITS = {
+    'genre': 1,
+    'rating': 2,
+    'director': 4,
+    'cast': 8,
+    'year': 16,
+}
+
+COMPONENT_WEIGHTS = {
+    'genre': GENRE_WEIGHT,
+    'rating': RATING_WEIGHT,
+    'director': DIRECTOR_WEIGHT,
+    'cast': CAST_WEIGHT,
+    'year': YEAR_WEIGHT,
+}
+
+def component_weights(weights=None):
+    """Merge weight overrides into the default component weights.
+
+    Args:
+        weights (dict, optional): Component name -> weight, overriding the
+            default weights of the components it names
+
+    Returns:
+        dict: Weight of every component
+
+    Raises:
+        ValueError: If a name is not a similarity component
+    """
+    weights = dict(COMPONENT_WEIGHTS, **(weights or {}))
+    unknown = set(weights) - set(COMPONENT_BITS)
+    if unknown:
+        raise ValueError(f"Unknown similarity components: {', '.join(sorted(unknown))}")
+    return weights
+
+def score_table(weights=None):
+    """Map every component mask to its score.
+
+    Args:
+        weights (dict, optional): Component name -> weight, overriding the
+            default weights of the components it names
+
+    Returns:
+        numpy.ndarray: Score of each mask, indexed by the mask; int16 for
+        integer weights, float64 otherwise
+    """
+    weights = component_weights(weights)
+    masks = np.arange(1 << len(COMPONENT_BITS))
+    table = np.zeros(len(masks), dtype=np.float64)
+    for name, bit in COMPONENT_BITS.items():
+        table += ((masks & bit) != 0) * float(weights[name])
+    if np.all(table == np.round(table)) and np.abs(table).max() < 1 << 15:
+        return table.astype(np.int16)
+    return table
+
+def _unique_per_row(values, offsets):
+    """Drop repeated values within each row of a ragged array.
+
+    Returns:
+        tuple: (values, offsets) with each row's values sorted and unique
+    """
+    n = len(offsets) - 1
+    rows = np.repeat(np.arange(n, dtype=np.int64), np.diff(offsets))
+    # Shift by one so the MISSING id (-1) stays non-negative inside the key
+    span = int(values.max()) + 2 if values.size else 1
+    keys = np.unique(rows * span + (values.astype(np.int64) + 1))
+    unique_rows = keys // span
+    new_offsets = np.searchsorted(unique_rows, np.arange(n + 1)).astype(np.int64)
+    return (keys % span) - 1, new_offsets
+
+class MovieFeatures:
+    """Array-encoded movie features used by the vectorized scorer.
+
+    Features are read straight from the interned columns of a MovieTable, so
+    a build can append a stream of movies to the table and encode them
+    without ever holding the raw dicts. Call finalize() after appending more
+    movies to refresh the NumPy arrays.
+
+    Args:
+        movies (MovieTable or iterable, optional): Movies to encode
+    """
+
+    def __init__(self, movies=()):
+        self.table = movies if isinstance(movies, MovieTable) else MovieTable(movies)
+        self.finalize()
+
+    def append(self, movie):
+        """Intern the features of one more movie.
+
+        Args:
+            movie (dict): Movie data dictionary
+
+        Returns:
+            int: Index of the movie
+        """
+        return self.table.append(movie)
+
+    def finalize(self):
+        """Build the NumPy arrays from the table columns.
+
+        Returns:
+            MovieFeatures: This feature table
+        """
+        table = self.table
+        n = self.num_movies = len(table)
+        self.year = np.array(table.year, dtype=np.float64)
+        self.rating = np.array(table.rating, dtype=np.float64)
+        self.director = np.array(table.director, dtype=np.int64)
+
+        # Genres as bitmasks over a dense genre index, spilling into extra 64-bit words
+        genres, genre_offsets = _unique_per_row(np.array(table.genre_values, dtype=np.int64),
+                                                np.array(table.genre_offsets, dtype=np.int64))
+        vocabulary, genres = np.unique(genres, return_inverse=True)
+        owners = np.repeat(np.arange(n), np.diff(genre_offsets))
+        words = max(1, -(-len(vocabulary) // 64))
+        self.genre_bits = np.zeros((n, words), dtype=np.uint64)
+        bits = np.left_shift(np.uint64(1), (genres % 64).astype(np.uint64))
+        np.bitwise_or.at(self.genre_bits, (owners, genres // 64), bits)
+
+        # Cast as ragged dense person ids, indexed by person -> sorted movie ids posting lists
+        cast, self.cast_offsets = _unique_per_row(np.array(table.cast_values, dtype=np.int64),
+                                                  np.array(table.cast_offsets, dtype=np.int64))
+        people, self.cast = np.unique(cast, return_inverse=True)
+        self.cast_index = CastOverlapIndex(self.cast, self.cast_offsets, len(people))
+        return self
+
+    def cast_of(self, i):
+        # Dense person ids of movie i
+        return self.cast[self.cast_offsets[i]:self.cast_offsets[i + 1]]
+
+    def movies_with(self, person):
+        # Sorted indices of the movies featuring a person
+        return self.cast_index.movies_with(person)
+
+class VectorizedScorer:
+    """Score movie pairs in NumPy blocks and emit the edges above a threshold.
+
+    Args:
+        movies (list): List of movie data dictionaries, unused when `features` is given
+        threshold (float): Minimum similarity score (exclusive) to create an edge
+        tile_size (int, optional): Rows per score block, sized automatically by default
+        features (MovieFeatures, optional): Pre-encoded features for `movies`
+    """
+
+    def __init__(self, movies, threshold, tile_size=None, features=None):
+        self.features = features if features is not None else MovieFeatures(movies)
+        self.threshold = threshold
+        n = self.features.num_movies
+        self.tile_size = tile_size or max(1, BLOCK_CELLS // max(n, 1))
+
+    def _components(self, lo, hi, col_start, col_stop):
+        # Per-component match arrays of a block; the cast component as its (row, col) cells
+        f = self.features
+        if col_start is None:
+            col_start = lo + 1
+        if col_stop is None:
+            col_stop = f.num_movies
+        cols = slice(col_start, col_stop)
+
+        matches = {'genre': (f.genre_bits[lo:hi, None, :] & f.genre_bits[None, cols, :]).any(axis=2)}
+        with np.errstate(invalid='ignore'):
+            matches['rating'] = np.abs(f.rating[lo:hi, None] - f.rating[None, cols]) <= RATING_TOLERANCE
+            matches['year'] = np.abs(f.year[lo:hi, None] - f.year[None, cols]) <= YEAR_TOLERANCE
+        matches['director'] = f.director[lo:hi, None] == f.director[None, cols]
+
+        # Only the pairs sharing enough cast members get the cast component
+        rows, cols, _ = f.cast_index.block_pairs(lo, hi, col_start, col_stop)
+        return matches, (rows - lo, cols - col_start)
+
+    @staticmethod
+    def _combine(matches, cast_cells, values, dtype):
+        # Sum a value per matching component; with COMPONENT_BITS the sum is the mask
+        total = matches['genre'].astype(dtype) * dtype(values['genre'])
+        for name in ('rating', 'year', 'director'):
+            total += matches[name] * dtype(values[name])
+        total[cast_cells] += dtype(values['cast'])
+        return total
+
+    def score_block(self, lo, hi, col_start=None, col_stop=None):
+        """Score rows lo <= i < hi against the columns col_start <= j < col_stop.
+
+        Args:
+            lo (int): First row of the block
+            hi (int): Row to stop before
+            col_start (int, optional): First column, defaults to lo + 1
+            col_stop (int, optional): Column to stop before, defaults to all columns
+
+        Returns:
+            numpy.ndarray: int16 scores of shape (hi - lo, col_stop - col_start),
+            column offset c corresponding to movie col_start + c
+        """
+        matches, cast_cells = self._components(lo, hi, col_start, col_stop)
+        return self._combine(matches, cast_cells, COMPONENT_WEIGHTS, np.int16)
+
+    def _upper(self, lo, hi, keep):
+        # Cells of a block starting at column lo + 1 that are set in `keep` and
+        # pair i < j; row r only keeps column offsets >= r
+        offsets = np.arange(keep.shape[1])
+        rows, cols = np.nonzero(keep & (offsets[None, :] >= np.arange(hi - lo)[:, None]))
+        return rows, cols
+
+    def edge_arrays(self, lo, hi):
+        """Return the edges of rows lo <= i < hi as parallel arrays.
+
+        Args:
+            lo (int): First row
+            hi (int): Row to stop before
+
+        Returns:
+            tuple: (rows, cols, scores) arrays ordered by row then column
+        """
+        scores = self.score_block(lo, hi)
+        rows, cols = self._upper(lo, hi, scores > self.threshold)
+        return rows + lo, cols + lo + 1, scores[rows, cols]
+
+    def component_arrays(self, lo, hi):
+        """Return the pairs of rows lo <= i < hi scoring above the threshold, with their masks.
+
+        Args:
+            lo (int): First row
+            hi (int): Row to stop before
+
+        Returns:
+            tuple: (rows, cols, masks) arrays ordered by row then column
+        """
+        matches, cast_cells = self._components(lo, hi, None, None)
+        scores = self._combine(matches, cast_cells, COMPONENT_WEIGHTS, np.int16)
+        rows, cols = self._upper(lo, hi, scores > self.threshold)
+        masks = self._combine(matches, cast_cells, COMPONENT_BITS, np.uint8)
+        return rows + lo, cols + lo + 1, masks[rows, cols]
+
+    def edges(self, start=0, stop=None):
+        """Yield the edges (i, j, score) for rows start <= i < stop.
+
+        Edges come out in the same order as the exhaustive pairwise loop.
+
+        Args:
+            start (int): First row to score
+            stop (int, optional): Row to stop before, defaults to all rows
+
+        Yields:
+            tuple: (i, j, score) of Python ints with i < j and score > threshold
+        """
+        if stop is None:
+            stop = self.features.num_movies
+        for lo in range(start, stop, self.tile_size):
+            hi = min(lo + self.tile_size, stop)
+            rows, cols, scores = self.edge_arrays(lo, hi)
+            # Pairs (i, j) with lo <= i < hi and i < j
+            trace.count("pairs_scored", (hi - lo) * (2 * self.features.num_movies - lo - hi - 1) // 2)
+            yield from zip(rows.tolist(), cols.tolist(), scores.tolist())
+
+    def incremental_edges(self, start):
+        """Yield the edges between rows k >= start and every earlier movie j < k.
+
+        Used to add movies to an existing graph: only pairs involving a movie
+        at index start or later are scored.
+
+        Args:
+            start (int): Index of the first new movie
+
+        Yields:
+            tuple: (j, k, score) of Python ints ordered by k then j
+        """
+        n = self.features.num_movies
+        for lo in range(start, n, self.tile_size):
+            hi = min(lo + self.tile_size, n)
+            scores = self.score_block(lo, hi, col_start=0, col_stop=hi)
+            trace.count("pairs_scored", (hi - lo) * (lo + hi - 1) // 2)
+            # Row r is movie lo + r and only keeps earlier columns
+            mask = (scores > self.threshold) & (
+                np.arange(hi)[None, :] < np.arange(lo, hi)[:, None])
+            rows, cols = np.nonzero(mask)
+            yield from zip(cols.tolist(), (rows + lo).tolist(), scores[rows, cols].tolist())
@@ -0,0 +1,249 @@
+"""
+Subgraph selection over the CSR arrays of a graph.
+
+A selection is a sorted NumPy array of node ids, computed from the offsets and
+neighbor arrays without visiting the other nodes' movie data:
+
+- first: the first N nodes, the historical default
+- ego: every movie within `depth` hops of a center movie
+- degree: the N best connected movies
+- community: the members of one detected community
+- filter: movies of a genre and/or a range of years
+
+Only the selected nodes are then materialized, and induced_edges() gathers the
+edges between them from their neighbor slices.
+"""
+import numpy as np
+
+from imdb_graph.core.movie_table import MovieTable
+
+SELECTION_MODES = ("first", "ego", "degree", "community", "filter")
+
+def _gather(offsets, nodes):
+    # Positions in the neighbor array of every neighbor slice of the nodes,
+    # and the node each position belongs to
+    starts = offsets[nodes]
+    counts = offsets[nodes + 1] - starts
+    total = int(counts.sum())
+    ends = np.cumsum(counts)
+    positions = np.arange(total, dtype=np.int64) + np.repeat(starts - (ends - counts), counts)
+    return positions, np.repeat(nodes, counts)
+
+class SubgraphSelector:
+    """Select node subsets of a graph and extract the edges between them.
+
+    Args:
+        graph (MovieGraph): Graph to select from, frozen into CSR form if needed
+    """
+
+    def __init__(self, graph):
+        graph = graph.freeze()
+        self.graph = graph
+        self.offsets = np.asarray(graph.offsets, dtype=np.int64)
+        self.neighbors = graph.neighbors
+        self.weights = graph.weights
+        self.num_nodes = len(self.offsets) - 1
+
+    def degrees(self, nodes=None):
+        # Number of neighbors of the given nodes, or of every node
+        if nodes is None:
+            return np.diff(self.offsets)
+        return self.offsets[nodes + 1] - self.offsets[nodes]
+
+    def _most_connected(self, nodes, limit):
+        # Keep the `limit` nodes of highest degree, ties broken by node id
+        if limit is None or len(nodes) <= limit:
+            return np.sort(nodes)
+        order = np.lexsort((nodes, -self.degrees(nodes)))
+        return np.sort(nodes[order[:limit]])
+
+    def first(self, count):
+        """Select the first `count` nodes.
+
+        Args:
+            count (int): Number of nodes
+
+        Returns:
+            numpy.ndarray: Sorted node ids
+        """
+        return np.arange(min(count, self.num_nodes), dtype=np.int64)
+
+    def ego(self, center, depth=1, limit=None):
+        """Select a movie and every movie within `depth` hops of it.
+
+        Layers are added in breadth-first order. When a layer would exceed the
+        limit, its movies most strongly connected to the layers before it are kept.
+
+        Args:
+            center (int): Node id of the center movie
+            depth (int): Number of hops
+            limit (int, optional): Largest number of selected nodes
+
+        Returns:
+            numpy.ndarray: Sorted node ids
+        """
+        visited = np.zeros(self.num_nodes, dtype=bool)
+        visited[center] = True
+        selected = [np.array([center], dtype=np.int64)]
+        frontier = selected[0]
+        count = 1
+        for _ in range(depth):
+            if limit is not None and count >= limit:
+                break
+            positions, _ = _gather(self.offsets, frontier)
+            reached = np.asarray(self.neighbors[positions], dtype=np.int64)
+            strength = np.asarray(self.weights[positions], dtype=np.float64)
+            new = ~visited[reached]
+            layer, inverse = np.unique(reached[new], return_inverse=True)
+            if not len(layer):
+                break
+            if limit is not None and count + len(layer) > limit:
+                # Total weight of the edges into the previous layer decides
+                totals = np.bincount(inverse.ravel(), strength[new], len(layer))
+                layer = np.sort(layer[np.lexsort((layer, -totals))[:limit - count]])
+            visited[layer] = True
+            selected.append(layer)
+            count += len(layer)
+            frontier = layer
+        return np.sort(np.concatenate(selected))
+
+    def top_degree(self, count):
+        """Select the `count` movies with the most neighbors.
+
+        Args:
+            count (int): Number of nodes
+
+        Returns:
+            numpy.ndarray: Sorted node ids
+        """
+        return self._most_connected(np.arange(self.num_nodes, dtype=np.int64), count)
+
+    def community(self, communities, community, limit=None):
+        """Select the members of a community.
+
+        Args:
+            communities (numpy.ndarray): Community id of every node
+            community (int): Community to select, 0 being the largest
+            limit (int, optional): Largest number of nodes, the best connected are kept
+
+        Returns:
+            numpy.ndarray: Sorted node ids
+        """
+        members = np.flatnonzero(np.asarray(communities) == community)
+        return self._most_connected(members, limit)
+
+    def filter(self, nodes_data, genre=None, year_from=None, year_to=None, limit=None):
+        """Select movies of a genre and/or released within a range of years.
+
+        Args:
+            nodes_data (list or MovieTable): Movie data for every node
+            genre (str, optional): Genre the movies must have
+            year_from (int, optional): First year, inclusive
+            year_to (int, optional): Last year, inclusive
+            limit (int, optional): Largest number of nodes, the best connected are kept
+
+        Returns:
+            numpy.ndarray: Sorted node ids
+        """
+        if isinstance(nodes_data, MovieTable):
+            keep = _table_mask(nodes_data, genre, year_from, year_to)
+        else:
+            keep = np.fromiter((_matches(movie, genre, year_from, year_to) for movie in nodes_data),
+                               dtype=bool, count=len(nodes_data))
+        return self._most_connected(np.flatnonzero(keep[:self.num_nodes]), limit)
+
+    def induced_edges(self, nodes):
+        """List every undirected edge between the selected nodes once.
+
+        Args:
+            nodes (numpy.ndarray): Selected node ids
+
+        Returns:
+            dict: Parallel "from", "to" and "weight" lists of node ids, with from < to
+        """
+        nodes = np.asarray(nodes, dtype=np.int64)
+        selected = np.zeros(self.num_nodes, dtype=bool)
+        selected[nodes] = True
+        positions, rows = _gather(self.offsets, nodes)
+        columns = np.asarray(self.neighbors[positions], dtype=np.int64)
+        keep = selected[columns] & (rows < columns)
+        return {"from": rows[keep].tolist(), "to": columns[keep].tolist(),
+                "weight": np.asarray(self.weights[positions[keep]]).tolist()}
+
+def _matches(movie, genre, year_from, year_to):
+    # Whether one movie dictionary passes the filter
+    if not movie:
+        return False
+    if genre is not None and genre not in movie.get("genres", ()):
+        return False
+    if year_from is not None or year_to is not None:
+        year = movie.get("year")
+        if year is None:
+            return False
+        if year_from is not None and year < year_from:
+            return False
+        if year_to is not None and year > year_to:
+            return False
+    return True
+
+def _table_mask(table, genre, year_from, year_to):
+    # The same filter over the columns of a MovieTable, without building rows
+    keep = np.frombuffer(table.present, dtype=np.int8).astype(bool)
+    if genre is not None:
+        genre_id = table.pool.ids.get(genre)
+        if genre_id is None:
+            return np.zeros(len(table), dtype=bool)
+        offsets = np.frombuffer(table.genre_offsets, dtype=np.int64)
+        hits = np.frombuffer(table.genre_values, dtype=np.int32) == genre_id
+        # A row has the genre when its slice of genre ids contains it
+        counts = np.add.reduceat(np.append(hits, False).astype(np.int64), offsets[:-1])
+        keep &= (counts > 0) & (np.diff(offsets) > 0)
+    if year_from is not None or year_to is not None:
+        years = np.frombuffer(table.year, dtype=np.float64)
+        keep &= ~np.isnan(years)
+        if year_from is not None:
+            keep &= years >= year_from
+        if year_to is not None:
+            keep &= years <= year_to
+    return keep
+
+def find_movie(nodes_data, query):
+    """Find the node of a movie by title or node id.
+
+    Titles are matched first, an exact case-insensitive match winning over a
+    title containing the query, so numeric titles such as "1917" can be chosen.
+    "#123" (or an int) always means node 123, and a plain number that matches
+    no title falls back to the node with that id.
+
+    Args:
+        nodes_data (list or MovieTable): Movie data for every node
+        query (str or int): Title to look for, or node id
+
+    Returns:
+        int: Node id, or None if no movie matches
+    """
+    if isinstance(query, int):
+        text = f"#{query}"
+    else:
+        text = str(query).strip()
+    if text.startswith("#") and text[1:].isdigit():
+        node_id = int(text[1:])
+        return node_id if node_id < len(nodes_data) else None
+
+    lowered = text.lower()
+    if isinstance(nodes_data, MovieTable):
+        titles = (nodes_data.get_title(i) for i in range(len(nodes_data)))
+    else:
+        titles = ((movie or {}).get("title") for movie in nodes_data)
+    partial = None
+    for node_id, title in enumerate(titles):
+        if not title:
+            continue
+        title = title.lower()
+        if title == lowered:
+            return node_id
+        if partial is None and lowered in title:
+            partial = node_id
+    if partial is None and text.isdigit() and int(text) < len(nodes_data):
+        return int(text)
+    return partial
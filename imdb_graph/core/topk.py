@@ -0,0 +1,195 @@
+"""
+Top-k neighbor index.
+
+While edges are added, every node keeps a bounded min-heap of its k heaviest
+neighbors. Freezing turns the heaps into fixed-width arrays, so the k most
+similar movies of a node are read in O(k) without touching its full neighbor
+list. Ties are broken by insertion order, exactly like a stable sort of the
+neighbor list by descending weight. Graphs built straight into CSR arrays pick
+the same entries with one vectorized sort instead of heaps.
+"""
+import heapq
+
+import numpy as np
+
+from imdb_graph.core.csr import _weight_array
+from imdb_graph.core.graph import TOP_K
+
+class TopKIndex:
+    """The k heaviest neighbors of every node.
+
+    Args:
+        num_nodes (int): Number of nodes
+        k (int): Neighbors kept per node
+    """
+
+    def __init__(self, num_nodes=0, k=TOP_K):
+        self.k = k
+        self.heaps = [[] for _ in range(num_nodes)]
+        self.pushed = [0] * num_nodes
+        # Frozen form: counts[node] entries of neighbors[node] and weights[node]
+        self.counts = self.neighbors = self.weights = None
+
+    def __len__(self):
+        return len(self.heaps) if self.counts is None else len(self.counts)
+
+    @classmethod
+    def from_adjacency(cls, adj_list, k=TOP_K):
+        """Index an existing adjacency list.
+
+        Args:
+            adj_list (list): Neighbor lists of (neighbor_id, weight) pairs
+            k (int): Neighbors kept per node
+
+        Returns:
+            TopKIndex: The frozen index
+        """
+        index = cls(len(adj_list), k)
+        for node, neighbors in enumerate(adj_list):
+            for neighbor, weight in neighbors:
+                index._push(node, neighbor, weight)
+        return index.freeze()
+
+    @classmethod
+    def from_csr(cls, offsets, neighbors, weights, k=TOP_K):
+        """Index CSR arrays whose neighbors are in insertion order, without heaps.
+
+        Args:
+            offsets (numpy.ndarray): Start of each node's neighbors
+            neighbors (numpy.ndarray): Neighbor ids
+            weights (numpy.ndarray): Edge weights
+            k (int): Neighbors kept per node
+
+        Returns:
+            TopKIndex: The frozen index
+        """
+        num_nodes = len(offsets) - 1
+        degrees = np.diff(offsets)
+        nodes = np.repeat(np.arange(num_nodes), degrees)
+        # A stable sort by node, then descending weight keeps insertion order on ties
+        order = np.lexsort((-weights.astype(np.float64), nodes))
+        ranks = np.arange(len(order)) - np.repeat(offsets[:-1], degrees)
+        keep = ranks < k
+
+        index = cls(0, k)
+        index.heaps = index.pushed = None
+        index.counts = np.minimum(degrees, k).astype(np.int32)
+        index.neighbors = np.full((num_nodes, k), -1, dtype=np.int32)
+        index.neighbors[nodes[keep], ranks[keep]] = neighbors[order[keep]]
+        index.weights = np.zeros((num_nodes, k), dtype=weights.dtype)
+        index.weights[nodes[keep], ranks[keep]] = weights[order[keep]]
+        return index
+
+    @classmethod
+    def from_arrays(cls, counts, neighbors, weights):
+        """Wrap frozen arrays, e.g. mapped from a binary graph file.
+
+        Args:
+            counts (numpy.ndarray): Number of entries of each node
+            neighbors (numpy.ndarray): (num_nodes, k) neighbor ids
+            weights (numpy.ndarray): (num_nodes, k) weights
+
+        Returns:
+            TopKIndex: The frozen index
+        """
+        index = cls(0, neighbors.shape[1])
+        index.heaps = index.pushed = None
+        index.counts, index.neighbors, index.weights = counts, neighbors, weights
+        return index
+
+    @classmethod
+    def from_lists(cls, rows, k):
+        """Rebuild an index saved with to_lists.
+
+        Args:
+            rows (list): Per-node lists of [neighbor_id, weight] pairs
+            k (int): Neighbors kept per node
+
+        Returns:
+            TopKIndex: The frozen index
+        """
+        index = cls(len(rows), k)
+        for node, row in enumerate(rows):
+            for neighbor, weight in row:
+                index._push(node, neighbor, weight)
+        return index.freeze()
+
+    def to_lists(self):
+        # Per-node lists of (neighbor_id, weight) pairs, heaviest first
+        return [self.top_k(node) for node in range(len(self))]
+
+    def grow(self, count):
+        # Add `count` nodes without neighbors
+        self._thaw()
+        self.heaps.extend([] for _ in range(count))
+        self.pushed.extend([0] * count)
+
+    def add_edge(self, id1, id2, weight):
+        # Offer an undirected edge to both endpoints
+        self._thaw()
+        self._push(id1, id2, weight)
+        self._push(id2, id1, weight)
+
+    def _push(self, node, neighbor, weight):
+        # Earlier neighbors win ties, so the insertion position is negated
+        entry = (weight, -self.pushed[node], neighbor)
+        self.pushed[node] += 1
+        heap = self.heaps[node]
+        if len(heap) < self.k:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+
+    def freeze(self):
+        """Convert the heaps into fixed-width arrays.
+
+        Returns:
+            TopKIndex: This index
+        """
+        if self.counts is not None:
+            return self
+        num_nodes = len(self.heaps)
+        counts = np.zeros(num_nodes, dtype=np.int32)
+        neighbors = np.full((num_nodes, self.k), -1, dtype=np.int32)
+        weights = np.zeros((num_nodes, self.k))
+        for node, heap in enumerate(self.heaps):
+            entries = sorted(heap, reverse=True)
+            counts[node] = len(entries)
+            for rank, (weight, _, neighbor) in enumerate(entries):
+                neighbors[node, rank] = neighbor
+                weights[node, rank] = weight
+        self.counts, self.neighbors = counts, neighbors
+        self.weights = _weight_array(weights.ravel()).reshape(num_nodes, self.k)
+        self.heaps = self.pushed = None
+        return self
+
+    def _thaw(self):
+        # Turn frozen arrays back into heaps so more edges can be offered
+        if self.counts is None:
+            return
+        self.heaps = []
+        for node in range(len(self.counts)):
+            count = int(self.counts[node])
+            row = zip(self.neighbors[node, :count].tolist(), self.weights[node, :count].tolist())
+            # Indexed entries precede every neighbor added from now on
+            heap = [(weight, -rank, neighbor) for rank, (neighbor, weight) in enumerate(row)]
+            heapq.heapify(heap)
+            self.heaps.append(heap)
+        self.pushed = [self.k] * len(self.heaps)
+        self.counts = self.neighbors = self.weights = None
+
+    def top_k(self, node_id, k=None):
+        """Return the heaviest neighbors of a node.
+
+        Args:
+            node_id (int): Node to look up
+            k (int, optional): Number of neighbors, at most the indexed k
+
+        Returns:
+            list: (neighbor_id, weight) pairs, heaviest first
+        """
+        self.freeze()
+        k = self.k if k is None else min(k, self.k)
+        count = min(int(self.counts[node_id]), k)
+        return list(zip(self.neighbors[node_id, :count].tolist(),
+                        self.weights[node_id, :count].tolist()))
@@ -0,0 +1,165 @@
+"""
+On-disk response cache and fetch checkpoints.
+
+Responses are stored content-addressed: each distinct response body is written
+once under its SHA-256 digest, and a small per-key entry records the digest,
+when it was fetched and the validators (ETag / Last-Modified) needed to
+revalidate it once it is older than the TTL. A checkpoint records the ids to
+fetch once and then appends a short progress record every so often, so an
+interrupted fetch can be resumed and checkpointing costs the same however many
+movies were already fetched.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+from imdb_graph.utils.constants import TMDB_CACHE_TTL
+
+def _write_atomic(path, text):
+    # Concurrent writers each use their own temporary file
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+def _read_json(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+class ResponseCache:
+    """Content-addressed cache of API responses with a freshness TTL.
+
+    Args:
+        directory (str or Path): Cache root directory
+        ttl (float): Seconds a response is used without revalidation
+    """
+
+    def __init__(self, directory, ttl=TMDB_CACHE_TTL):
+        self.directory = str(directory)
+        self.ttl = ttl
+        os.makedirs(os.path.join(self.directory, "entries"), exist_ok=True)
+        os.makedirs(os.path.join(self.directory, "objects"), exist_ok=True)
+
+    def _entry_path(self, key):
+        return os.path.join(self.directory, "entries", f"{key}.json")
+
+    def _object_path(self, digest):
+        return os.path.join(self.directory, "objects", digest[:2], f"{digest}.json")
+
+    def get(self, key):
+        """Look up a cached response.
+
+        Args:
+            key (str): Cache key, e.g. the movie id
+
+        Returns:
+            dict: Entry with "data", "fetched_at", "etag" and "last_modified",
+            or None if the key is not cached
+        """
+        entry = _read_json(self._entry_path(key))
+        if entry is None:
+            return None
+        data = _read_json(self._object_path(entry["digest"]))
+        if data is None:
+            return None
+        entry["data"] = data
+        return entry
+
+    def is_fresh(self, entry):
+        # Whether an entry can be used without asking the server
+        return time.time() - entry["fetched_at"] < self.ttl
+
+    def put(self, key, data, etag=None, last_modified=None):
+        """Store a response body and its validators.
+
+        Args:
+            key (str): Cache key
+            data (dict): Decoded response body
+            etag (str, optional): ETag header of the response
+            last_modified (str, optional): Last-Modified header of the response
+
+        Returns:
+            dict: The stored entry
+        """
+        body = json.dumps(data, sort_keys=True, separators=(",", ":"))
+        digest = hashlib.sha256(body.encode("utf-8")).hexdigest()
+        object_path = self._object_path(digest)
+        if not os.path.exists(object_path):
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            _write_atomic(object_path, body)
+        entry = {"digest": digest, "fetched_at": time.time(),
+                 "etag": etag, "last_modified": last_modified}
+        _write_atomic(self._entry_path(key), json.dumps(entry))
+        return dict(entry, data=data)
+
+    def touch(self, key, entry):
+        """Mark a revalidated entry as fresh again.
+
+        Args:
+            key (str): Cache key
+            entry (dict): Entry returned by get()
+
+        Returns:
+            None
+        """
+        entry["fetched_at"] = time.time()
+        stored = {k: v for k, v in entry.items() if k != "data"}
+        _write_atomic(self._entry_path(key), json.dumps(stored))
+
+def save_checkpoint(path, ids):
+    """Atomically start a checkpoint with every movie id to fetch.
+
+    Args:
+        path (str or Path): Checkpoint file path
+        ids (list): Every movie id to fetch, in ranking order
+
+    Returns:
+        None
+    """
+    _write_atomic(str(path), json.dumps({"ids": ids}) + "\n")
+
+def update_checkpoint(path, position, offset):
+    """Append a progress record to a checkpoint started by save_checkpoint.
+
+    Args:
+        path (str or Path): Checkpoint file path
+        position (int): Number of ids processed so far, in ranking order
+        offset (int): Size in bytes of the output file holding their movies
+
+    Returns:
+        None
+    """
+    with open(str(path), "a", encoding="utf-8") as f:
+        f.write(json.dumps({"position": position, "offset": offset}) + "\n")
+
+def load_checkpoint(path):
+    """Load a checkpoint and its latest progress record.
+
+    Args:
+        path (str or Path): Checkpoint file path
+
+    Returns:
+        dict: {"ids": [...], "position": n, "offset": bytes}, or None if there is no checkpoint
+    """
+    try:
+        with open(str(path), "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return None
+    records = []
+    for line in lines:
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            break  # A record cut short by the interruption
+    if not records or "ids" not in records[0]:
+        return None
+    checkpoint = {"ids": records[0]["ids"], "position": 0, "offset": 0}
+    if len(records) > 1:
+        checkpoint.update(records[-1])
+    return checkpoint
@@ -1,74 +1,127 @@
-import requests
 import json
-import time
 import os
-from dotenv import load_dotenv
+import sys
 
-# Load environment variables from .env file
-load_dotenv(os.path.join(os.path.dirname(__file__), '../.env'))
-API_KEY = os.getenv('TMDB_API_KEY')
-BASE_URL = "https://api.themoviedb.org/3"
+from imdb_graph.data.cache import ResponseCache, load_checkpoint, save_checkpoint, update_checkpoint
+from imdb_graph.data.movie_io import append_movie, write_movies_jsonl
+from imdb_graph.utils.constants import DATA_DIR, TMDB_BASE_URL
+
+ENV_FILE = os.path.join(os.path.dirname(__file__), '../.env')
+BASE_URL = TMDB_BASE_URL
 MOVIE_COUNT = 1000  # Fetch top 10 for testing
-OUTPUT_FILE = os.path.join(os.path.dirname(__file__), "../data/movies_data.json")
+OUTPUT_FILE = os.path.join(DATA_DIR, "movies_data.json")
+OUTPUT_JSONL_FILE = os.path.splitext(OUTPUT_FILE)[0] + ".jsonl"
+CHECKPOINT_FILE = os.path.join(DATA_DIR, "fetch_checkpoint.json")
+CACHE_DIR = os.path.join(DATA_DIR, "cache")
+CHECKPOINT_INTERVAL = 50  # Movies fetched between checkpoints
+
+_fetcher = None
+
+def get_api_key():
+    # Read the key from the environment, loading the .env file first;
+    # dotenv is only imported by the commands that talk to TMDB
+    from dotenv import load_dotenv
+
+    load_dotenv(ENV_FILE)
+    return os.getenv('TMDB_API_KEY')
+
+def get_fetcher():
+    # Shared fetcher so one-off calls reuse the pooled session
+    global _fetcher
+    from imdb_graph.data.fetcher import TMDBFetcher
+
+    if _fetcher is None:
+        _fetcher = TMDBFetcher(get_api_key(), base_url=BASE_URL)
+    return _fetcher
 
 def get_movie_ids(pages=1):
-    ids = []
-    for page in range(1, pages + 1):
-        url = (
-            f"{BASE_URL}/discover/movie"
-            f"?api_key={API_KEY}"
-            f"&page={page}"
-            f"&sort_by=vote_average.desc"
-            f"&vote_count.gte=1000"
-        )
-        resp = requests.get(url)
-        if resp.status_code != 200:
-            print(f"Error fetching page {page}: {resp.status_code}")
-            continue
-        data = resp.json()
-        ids += [m["id"] for m in data.get("results", [])]
-        time.sleep(0.2)  
-    return ids[:MOVIE_COUNT]  # Only return the top N ids
+    # Discover pages are fetched concurrently
+    return get_fetcher().discover_ids(pages=pages, limit=MOVIE_COUNT)  # Only return the top N ids
 
 def get_movie_details(movie_id):
-    url = f"{BASE_URL}/movie/{movie_id}?api_key={API_KEY}&append_to_response=credits"
-    resp = requests.get(url)
-    if resp.status_code != 200:
-        return None
-    data = resp.json()
-    # Extract director
-    director = ""
-    for crew in data.get("credits", {}).get("crew", []):
-        if crew["job"] == "Director":
-            director = crew["name"]
-            break
-    # Extract top 5 cast
-    cast = [c["name"] for c in data.get("credits", {}).get("cast", [])[:5]]
-    return {
-        "id": movie_id,
-        "title": data.get("title"),
-        "year": int(data.get("release_date", "0000-00-00")[:4]) if data.get("release_date") else None,
-        "rating": data.get("vote_average"),
-        "genres": [g["name"] for g in data.get("genres", [])],
-        "director": director,
-        "cast": cast,
-    }
+    return get_fetcher().get_movie_details(movie_id)
+
+def _read_checkpointed_movies(path, offset):
+    # Movies written to the JSON Lines file before the checkpoint
+    if not offset:
+        return []
+    with open(path, "rb") as f:
+        lines = f.read(offset).decode("utf-8").splitlines()
+    return [json.loads(line) for line in lines if line.strip()]
+
+def fetch_to_jsonl(fetcher, ids, jsonl_path=OUTPUT_JSONL_FILE, checkpoint_path=CHECKPOINT_FILE,
+                   checkpoint=None):
+    """Fetch movies into a JSON Lines file, checkpointing progress as it goes.
+
+    When resuming, the ids processed before the checkpoint go through the
+    fetcher again: fresh cache entries are reused and stale ones revalidated
+    with their ETag, and the movie already written is kept if the API fails.
+    Anything written after the checkpoint is dropped and fetched again.
+
+    Args:
+        fetcher (TMDBFetcher): Fetcher, usually with a response cache
+        ids (list): Every movie id to fetch, in ranking order
+        jsonl_path (str): JSON Lines output file, movies are appended as they arrive
+        checkpoint_path (str): Checkpoint file
+        checkpoint (dict, optional): Checkpoint returned by load_checkpoint to resume from
+
+    Returns:
+        list: Movie data dictionaries in ranking order
+    """
+    position = offset = 0
+    if checkpoint and (not checkpoint["offset"] or os.path.exists(jsonl_path)):
+        position, offset = checkpoint["position"], checkpoint["offset"]
+    saved = {movie["id"]: movie for movie in _read_checkpointed_movies(jsonl_path, offset)}
+    if not checkpoint:
+        save_checkpoint(checkpoint_path, ids)
 
-def main():
-    print("Fetching top-rated movie IDs...")
-    ids = get_movie_ids(pages=50)  # 50 pages x 20 movies per page = 1000 movies
-    print(f"Found {len(ids)} movie IDs.")
     movies = []
-    for i, movie_id in enumerate(ids):
-        details = get_movie_details(movie_id)
+    for movie_id, details in fetcher.fetch_movies(ids[:position]):
+        details = details or saved.get(movie_id)
         if details:
             movies.append(details)
-        print(f"Fetched {i+1}/{len(ids)}", end="\r")
-        time.sleep(0.2)
+
+    # Stream each movie to the JSON Lines file as soon as it is fetched
+    with open(jsonl_path, "r+" if offset else "w", encoding="utf-8") as jsonl:
+        jsonl.truncate(offset)
+        jsonl.seek(offset)
+        for i, (movie_id, details) in enumerate(fetcher.fetch_movies(ids[position:]),
+                                                start=position + 1):
+            if details:
+                movies.append(details)
+                append_movie(jsonl, details)
+                jsonl.flush()
+            if i % CHECKPOINT_INTERVAL == 0:
+                update_checkpoint(checkpoint_path, i, jsonl.tell())
+            print(f"Fetched {i}/{len(ids)}", end="\r")
+        jsonl.flush()
+        update_checkpoint(checkpoint_path, len(ids), jsonl.tell())
+    return movies
+
+def main():
+    # --resume continues from the last checkpoint instead of rediscovering ids
+    from imdb_graph.data.fetcher import TMDBFetcher
+
+    checkpoint = load_checkpoint(CHECKPOINT_FILE) if "--resume" in sys.argv else None
+    cache = ResponseCache(CACHE_DIR)
     os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
+    with TMDBFetcher(get_api_key(), base_url=BASE_URL, cache=cache) as fetcher:
+        if checkpoint:
+            ids = checkpoint["ids"]
+            print(f"Resuming: {checkpoint['position']} of {len(ids)} movies already processed.")
+        else:
+            print("Fetching top-rated movie IDs...")
+            ids = fetcher.discover_ids(pages=50, limit=MOVIE_COUNT)  # 50 pages x 20 movies per page = 1000 movies
+            print(f"Found {len(ids)} movie IDs.")
+        movies = fetch_to_jsonl(fetcher, ids, checkpoint=checkpoint)
+
+    # Keep the ranking order, and rewrite movies that changed on revalidation
+    rank = {movie_id: i for i, movie_id in enumerate(ids)}
+    movies.sort(key=lambda movie: rank[movie["id"]])
+    write_movies_jsonl(movies, OUTPUT_JSONL_FILE)
     with open(OUTPUT_FILE, "w") as f:
         json.dump(movies, f, indent=2)
-    print(f"\nSaved {len(movies)} movies to {OUTPUT_FILE}")
+    print(f"\nSaved {len(movies)} movies to {OUTPUT_FILE} and {OUTPUT_JSONL_FILE}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,247 @@
+"""
+Concurrent TMDB fetcher.
+
+Requests go through one pooled HTTP session from a thread pool. A token-bucket
+rate limiter keeps the overall request rate within the API's allowance, and
+responses with status 429 or 5xx are retried with exponential backoff,
+honoring Retry-After when the server sends it.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from imdb_graph.utils.constants import (
+    TMDB_BASE_URL,
+    TMDB_FETCH_WORKERS,
+    TMDB_REQUEST_RATE,
+)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_BACKOFF = 30.0  # Seconds
+
+class TokenBucket:
+    """Thread-safe token bucket allowing `rate` acquisitions per second.
+
+    Args:
+        rate (float): Tokens added per second
+        capacity (float, optional): Maximum burst size, defaults to one second of tokens
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        # Block until a token is available, then take it
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+def parse_movie_details(movie_id, data):
+    """Extract the fields used by the graph from a TMDB movie response.
+
+    Args:
+        movie_id (int): TMDB movie id
+        data (dict): Movie response with appended credits
+
+    Returns:
+        dict: Movie data dictionary
+    """
+    # Extract director
+    director = ""
+    for crew in data.get("credits", {}).get("crew", []):
+        if crew["job"] == "Director":
+            director = crew["name"]
+            break
+    # Extract top 5 cast
+    cast = [c["name"] for c in data.get("credits", {}).get("cast", [])[:5]]
+    return {
+        "id": movie_id,
+        "title": data.get("title"),
+        "year": int(data.get("release_date", "0000-00-00")[:4]) if data.get("release_date") else None,
+        "rating": data.get("vote_average"),
+        "genres": [g["name"] for g in data.get("genres", [])],
+        "director": director,
+        "cast": cast,
+    }
+
+class TMDBFetcher:
+    """Fetch TMDB data concurrently over a pooled, rate-limited session.
+
+    Args:
+        api_key (str): TMDB API key
+        base_url (str): API root, e.g. a local stub server in tests
+        workers (int): Number of concurrent requests
+        rate (float): Maximum requests per second across all workers
+        max_retries (int): Retries for 429/5xx responses and connection errors
+        backoff (float): Initial backoff in seconds, doubled on every retry
+        cache (ResponseCache, optional): On-disk cache of movie detail responses
+    """
+
+    def __init__(self, api_key, base_url=TMDB_BASE_URL, workers=TMDB_FETCH_WORKERS,
+                 rate=TMDB_REQUEST_RATE, max_retries=5, backoff=0.5, cache=None):
+        self.api_key = api_key
+        self.cache = cache
+        self.base_url = base_url.rstrip("/")
+        self.workers = workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.limiter = TokenBucket(rate)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        # Stop the worker threads and release pooled connections
+        self.executor.shutdown(wait=True)
+        self.session.close()
+
+    def _retry_delay(self, attempt, response=None):
+        delay = min(MAX_BACKOFF, self.backoff * (2 ** attempt))
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                delay = max(delay, float(retry_after))
+            except ValueError:
+                pass
+        return delay
+
+    def get_response(self, path, headers=None, **params):
+        """GET an API path, retrying throttled and failed requests.
+
+        Args:
+            path (str): Path below the API root, e.g. "/movie/550"
+            headers (dict, optional): Extra request headers, e.g. validators
+            **params: Query parameters besides the API key
+
+        Returns:
+            requests.Response: A 200 or 304 response, or None if the request failed
+        """
+        params["api_key"] = self.api_key
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            try:
+                resp = self.session.get(f"{self.base_url}{path}", params=params,
+                                        headers=headers, timeout=30)
+            except requests.RequestException:
+                resp = None
+            if resp is not None and resp.status_code in (200, 304):
+                return resp
+            if resp is not None and resp.status_code not in RETRY_STATUSES:
+                return None
+            if attempt < self.max_retries:
+                time.sleep(self._retry_delay(attempt, resp))
+        return None
+
+    def get_json(self, path, **params):
+        """GET an API path and decode the JSON response.
+
+        Args:
+            path (str): Path below the API root, e.g. "/movie/550"
+            **params: Query parameters besides the API key
+
+        Returns:
+            dict: Decoded response, or None if the request failed
+        """
+        resp = self.get_response(path, **params)
+        return resp.json() if resp is not None and resp.status_code == 200 else None
+
+    def _discover_page(self, page):
+        return self.get_json("/discover/movie", page=page, sort_by="vote_average.desc",
+                             **{"vote_count.gte": 1000})
+
+    def discover_ids(self, pages=1, limit=None):
+        """Collect movie ids from the discover endpoint, fetching pages concurrently.
+
+        Args:
+            pages (int): Maximum number of result pages to read
+            limit (int, optional): Maximum number of ids to return
+
+        Returns:
+            list: Movie ids in ranking order
+        """
+        first = self._discover_page(1)
+        if first is None:
+            print("Error fetching page 1")
+            return []
+        pages = min(pages, first.get("total_pages", pages))
+        results = [first] + list(self.executor.map(self._discover_page, range(2, pages + 1)))
+
+        ids = []
+        for page, data in enumerate(results, start=1):
+            if data is None:
+                print(f"Error fetching page {page}")
+                continue
+            ids += [m["id"] for m in data.get("results", [])]
+        return ids[:limit] if limit is not None else ids
+
+    def get_movie_details(self, movie_id):
+        """Fetch one movie with its credits, going through the cache when there is one.
+
+        Fresh cached responses are used as-is, stale ones are revalidated with
+        a conditional request, and a stale copy is served if the API fails.
+
+        Args:
+            movie_id (int): TMDB movie id
+
+        Returns:
+            dict: Movie data dictionary, or None if the request failed
+        """
+        key = str(movie_id)
+        entry = self.cache.get(key) if self.cache is not None else None
+        if entry is not None and self.cache.is_fresh(entry):
+            return parse_movie_details(movie_id, entry["data"])
+
+        headers = {}
+        if entry is not None and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry is not None and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        resp = self.get_response(f"/movie/{movie_id}", headers=headers or None,
+                                 append_to_response="credits")
+
+        if resp is None:
+            data = entry["data"] if entry is not None else None
+        elif resp.status_code == 304 and entry is not None:
+            self.cache.touch(key, entry)
+            data = entry["data"]
+        elif resp.status_code == 200:
+            data = resp.json()
+            if self.cache is not None:
+                self.cache.put(key, data, resp.headers.get("ETag"), resp.headers.get("Last-Modified"))
+        else:
+            data = None
+        return parse_movie_details(movie_id, data) if data is not None else None
+
+    def fetch_movies(self, movie_ids):
+        """Fetch many movies concurrently.
+
+        Args:
+            movie_ids (iterable): TMDB movie ids
+
+        Yields:
+            tuple: (movie_id, details or None) in the order of movie_ids
+        """
+        movie_ids = list(movie_ids)
+        yield from zip(movie_ids, self.executor.map(self.get_movie_details, movie_ids))
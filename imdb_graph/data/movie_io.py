@@ -0,0 +1,104 @@
+"""
+Streaming readers and writers for movie data files.
+
+Movie data is stored either as a JSON array (movies_data.json) or as JSON Lines
+(movies_data.jsonl, one movie per line). The readers yield one movie at a time,
+so a build never needs the whole list of movie dicts in memory.
+"""
+import json
+
+CHUNK_SIZE = 1 << 16
+WHITESPACE = " \t\r\n"
+
+def iter_movies(path):
+    """Yield the movies stored in a JSON array or JSON Lines file.
+
+    Args:
+        path (str or Path): Path to a .json or .jsonl movie file
+
+    Yields:
+        dict: One movie data dictionary at a time
+    """
+    if str(path).endswith(".jsonl"):
+        return iter_json_lines(path)
+    return iter_json_array(path)
+
+def iter_json_lines(path):
+    """Yield one JSON value per non-empty line of a JSON Lines file.
+
+    Args:
+        path (str or Path): Path to the file
+
+    Yields:
+        dict: Decoded values in file order
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+def iter_json_array(path, chunk_size=CHUNK_SIZE):
+    """Yield the elements of a top-level JSON array without loading the whole file.
+
+    Args:
+        path (str or Path): Path to the file
+        chunk_size (int): Number of characters read at a time
+
+    Yields:
+        dict: Decoded array elements in file order
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buffer = f.read(chunk_size).lstrip(WHITESPACE)
+        if not buffer.startswith("["):
+            raise ValueError(f"{path} does not contain a JSON array")
+        pos = 1
+        while True:
+            # Skip whitespace and separators between elements
+            while pos < len(buffer) and buffer[pos] in WHITESPACE + ",":
+                pos += 1
+            if pos < len(buffer) and buffer[pos] == "]":
+                return
+            try:
+                if pos == len(buffer):
+                    raise json.JSONDecodeError("Need more data", buffer, pos)
+                item, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # The element continues past the buffer, read the next chunk
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    raise ValueError(f"{path} ends in the middle of a JSON array")
+                buffer = buffer[pos:] + chunk
+                pos = 0
+                continue
+            yield item
+
+def append_movie(f, movie):
+    """Write one movie as a JSON Lines record.
+
+    Args:
+        f (file): Text file opened for writing
+        movie (dict): Movie data dictionary
+
+    Returns:
+        None
+    """
+    f.write(json.dumps(movie, ensure_ascii=False) + "\n")
+
+def write_movies_jsonl(movies, path):
+    """Write movies to a JSON Lines file.
+
+    Args:
+        movies (iterable): Movie data dictionaries
+        path (str or Path): Output file path
+
+    Returns:
+        int: Number of movies written
+    """
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for movie in movies:
+            append_movie(f, movie)
+            count += 1
+    return count
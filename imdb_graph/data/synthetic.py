@@ -0,0 +1,152 @@
+"""
+Seeded synthetic movie catalogs for benchmarks.
+
+The generated movies have the shape of fetched TMDB data, with distributions
+chosen to look like a real catalog rather than uniform noise:
+
+- genres: one to three per movie, Drama and Comedy far more common than Western
+- directors: a heavy-tailed (log-normal) number of movies per director
+- cast: five credited actors of log-normal popularity, and directors tend to
+  recast actors from their own troupe
+- years: more movies in recent decades
+- ratings: roughly normal around 6.3, a few movies without a rating
+"""
+import numpy as np
+
+# Share of movies with each genre, close to TMDB's catalog
+GENRE_FREQUENCIES = {
+    "Drama": 0.45, "Comedy": 0.30, "Thriller": 0.17, "Action": 0.16, "Romance": 0.13,
+    "Crime": 0.12, "Horror": 0.10, "Adventure": 0.09, "Documentary": 0.08,
+    "Science Fiction": 0.06, "Family": 0.06, "Mystery": 0.06, "Fantasy": 0.06,
+    "Animation": 0.05, "History": 0.03, "Music": 0.03, "War": 0.03, "Western": 0.02,
+}
+GENRE_COUNTS = (0.40, 0.35, 0.25)   # Share of movies with one, two and three genres
+MOVIES_PER_DIRECTOR = 4             # Average, the distribution is heavy-tailed
+ACTORS_PER_MOVIE = 1.5              # Size of the actor pool relative to the movie count
+CAST_SIZE = 5                       # Actors credited per movie, as the fetcher keeps
+TROUPE_SIZE = 8                     # Regular actors of each director
+TROUPE_SHARE = 0.4                  # Chance that a cast slot goes to the director's troupe
+DIRECTOR_SPREAD = 0.9               # Log-normal sigma of movies per director
+ACTOR_SPREAD = 1.0                  # Log-normal sigma of credits per actor
+FIRST_YEAR, LAST_YEAR = 1930, 2024
+YEAR_GROWTH = 25.0                  # Years for the number of releases to grow e-fold
+RATING_MEAN, RATING_STD = 6.3, 1.1
+MISSING_RATING = 0.03               # Share of movies without a rating
+MISSING_YEAR = 0.01                 # Share of movies without a release year
+
+TITLE_ADJECTIVES = [
+    "Last", "Dark", "Silent", "Broken", "Hidden", "Lost", "Golden", "Final", "Wild",
+    "Secret", "Red", "Cold", "Long", "Little", "Crimson", "Electric", "Forgotten",
+    "Midnight", "Burning", "Endless", "Hollow", "Perfect", "Quiet", "Savage", "Distant",
+]
+TITLE_NOUNS = [
+    "Night", "River", "City", "Road", "Heart", "Summer", "Kingdom", "Game", "Storm",
+    "House", "Shadow", "Dream", "Island", "Promise", "Garden", "Frontier", "Mirror",
+    "Empire", "Horizon", "Letter", "Season", "Station", "Harbor", "Signal", "Winter",
+]
+FIRST_NAMES = [
+    "James", "Mary", "John", "Linda", "Michael", "Sarah", "David", "Emma", "Robert",
+    "Olivia", "Daniel", "Sofia", "Thomas", "Anna", "Carlos", "Yuki", "Pierre", "Ingrid",
+    "Ravi", "Chen", "Fatima", "Lars", "Marta", "Kofi", "Elena", "Hugo", "Aiko", "Nina",
+]
+LAST_NAMES = [
+    "Smith", "Johnson", "Brown", "Garcia", "Miller", "Davis", "Martin", "Lee", "Walker",
+    "Young", "King", "Wright", "Lopez", "Hill", "Scott", "Green", "Adams", "Baker",
+    "Nakamura", "Dubois", "Rossi", "Novak", "Larsen", "Okafor", "Silva", "Kowalski",
+    "Müller", "Haddad", "Ivanova", "Tanaka", "Moreau", "Jensen", "Costa", "Fischer",
+]
+
+def _popularity(count, spread, rng):
+    # Chance of picking each of `count` people, a few of them far more often
+    weights = rng.lognormal(0.0, spread, size=count)
+    return weights / weights.sum()
+
+def _person_names(count, rng):
+    # Distinct names, numbered once the first and last names run out
+    firsts = rng.integers(len(FIRST_NAMES), size=count)
+    lasts = rng.integers(len(LAST_NAMES), size=count)
+    names = []
+    seen = set()
+    for first, last in zip(firsts.tolist(), lasts.tolist()):
+        name = f"{FIRST_NAMES[first]} {LAST_NAMES[last]}"
+        if name in seen:
+            name = f"{name} {len(names)}"
+        seen.add(name)
+        names.append(name)
+    return names
+
+def _titles(count, rng):
+    # "Adjective Noun" titles, some with "The" and a few sequels, repeats allowed
+    adjectives = rng.integers(len(TITLE_ADJECTIVES), size=count).tolist()
+    nouns = rng.integers(len(TITLE_NOUNS), size=(count, 2)).tolist()
+    styles = rng.random(count).tolist()
+    titles = []
+    for adjective, (noun, other), style in zip(adjectives, nouns, styles):
+        title = f"{TITLE_ADJECTIVES[adjective]} {TITLE_NOUNS[noun]}"
+        if style < 0.3:
+            title = f"The {title}"
+        elif style < 0.4:
+            title = f"{TITLE_NOUNS[other]} of the {title}"
+        elif style < 0.45:
+            title = f"{title} 2"
+        titles.append(title)
+    return titles
+
+def generate_movies(count, seed=0):
+    """Generate a synthetic movie catalog.
+
+    The same count and seed always give the same movies.
+
+    Args:
+        count (int): Number of movies
+        seed (int): Random seed
+
+    Returns:
+        list: Movie dictionaries with id, title, year, rating, genres, director and cast
+    """
+    rng = np.random.default_rng(seed)
+
+    # Genres: weighted sampling without replacement through Gumbel-top-k keys
+    genre_names = list(GENRE_FREQUENCIES)
+    genre_weights = np.log(np.array(list(GENRE_FREQUENCIES.values())))
+    keys = genre_weights + rng.gumbel(size=(count, len(genre_names)))
+    genre_order = np.argsort(-keys, axis=1)[:, :len(GENRE_COUNTS)].tolist()
+    genre_counts = (rng.choice(len(GENRE_COUNTS), size=count, p=GENRE_COUNTS) + 1).tolist()
+
+    # Directors and actors with heavy-tailed popularity
+    num_directors = max(1, count // MOVIES_PER_DIRECTOR)
+    num_actors = max(CAST_SIZE, int(count * ACTORS_PER_MOVIE))
+    director_names = _person_names(num_directors, rng)
+    actor_names = _person_names(num_actors, rng)
+    actor_popularity = _popularity(num_actors, ACTOR_SPREAD, rng)
+    directors = rng.choice(num_directors, size=count, p=_popularity(num_directors, DIRECTOR_SPREAD, rng))
+    troupes = rng.choice(num_actors, size=(num_directors, TROUPE_SIZE), p=actor_popularity)
+    # A few spare candidates per movie replace actors drawn twice
+    candidates = rng.choice(num_actors, size=(count, CAST_SIZE + 3), p=actor_popularity)
+    from_troupe = rng.random((count, CAST_SIZE + 3)) < TROUPE_SHARE
+    troupe_picks = troupes[directors[:, None], rng.integers(TROUPE_SIZE, size=(count, CAST_SIZE + 3))]
+    candidates = np.where(from_troupe, troupe_picks, candidates).tolist()
+
+    # Release years grow exponentially towards the present, ratings are roughly normal
+    span = LAST_YEAR - FIRST_YEAR + 1
+    year_weights = np.exp(np.arange(span) / YEAR_GROWTH)
+    years = (FIRST_YEAR + rng.choice(span, size=count, p=year_weights / year_weights.sum())).tolist()
+    ratings = np.clip(rng.normal(RATING_MEAN, RATING_STD, size=count), 1.0, 9.8).round(1).tolist()
+    missing_rating = (rng.random(count) < MISSING_RATING).tolist()
+    missing_year = (rng.random(count) < MISSING_YEAR).tolist()
+    titles = _titles(count, rng)
+    directors = directors.tolist()
+
+    movies = []
+    for i in range(count):
+        cast = list(dict.fromkeys(candidates[i]))[:CAST_SIZE]
+        movies.append({
+            "id": i + 1,
+            "title": titles[i],
+            "year": None if missing_year[i] else years[i],
+            "rating": None if missing_rating[i] else ratings[i],
+            "genres": [genre_names[g] for g in genre_order[i][:genre_counts[i]]],
+            "director": director_names[directors[i]],
+            "cast": [actor_names[a] for a in cast],
+        })
+    return movies
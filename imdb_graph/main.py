@@ -1,59 +1,187 @@
-import json
 import sys
 import os
 from pathlib import Path
 
-# Import from the new package structure
-from imdb_graph.core.graph import MovieGraph
-from imdb_graph.utils.constants import DEFAULT_OUTPUT_DIR
-
-THRESHOLD = 7  # Minimum similarity score to create an edge
+# Only light modules are imported here, so --help and mistyped commands return
+# at once; each command imports numpy, the graph code or pyvis when it runs
+from imdb_graph.utils.constants import DEFAULT_OUTPUT_DIR, THRESHOLD, TOP_K
+from imdb_graph.utils import trace
 
 # Define default data paths
 DATA_DIR = Path(__file__).parent.parent / "data"
 MOVIES_DATA_PATH = DATA_DIR / "movies_data.json"
+MOVIES_JSONL_PATH = DATA_DIR / "movies_data.jsonl"
 MOVIE_GRAPH_PATH = DATA_DIR / "movie_graph.json"
+MOVIE_GRAPH_BINARY_PATH = DATA_DIR / "movie_graph.bin"
+SCORE_STORE_PATH = DATA_DIR / "pair_scores.npz"
 
 # Load movie data
 def load_movies(path=MOVIES_DATA_PATH):
-    """Load movie data from JSON file.
+    """Load movie data from a JSON or JSON Lines file.
     
     Args:
-        path: Path to the JSON file containing movie data
+        path: Path to the JSON or JSON Lines file containing movie data
         
     Returns:
         list: List of movie dictionaries
     """
-    with open(path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    from imdb_graph.data.movie_io import iter_movies
+
+    return list(iter_movies(path))
+
+def find_movies_file():
+    """Find the movie data file, preferring the JSON Lines variant.
+
+    Returns:
+        Path: Path to the movie data file, or None if there is none
+    """
+    for path in (MOVIES_JSONL_PATH, MOVIES_DATA_PATH):
+        if path.exists():
+            return path
+    return None
+
+def _get_option(name, default=None):
+    """Read a `--name value` or `--name=value` option from the command line.
+
+    Args:
+        name (str): Option name including the leading dashes
+        default: Value returned when the option is absent
+
+    Returns:
+        str: The option value, or the default
+    """
+    for i, arg in enumerate(sys.argv):
+        if arg == name and i + 1 < len(sys.argv):
+            return sys.argv[i + 1]
+        if arg.startswith(name + "="):
+            return arg[len(name) + 1:]
+    return default
+
+def update_graph(movies, top_k=TOP_K):
+    """Add the movies that are missing from the saved graph to it.
+
+    Args:
+        movies (iterable): Movie dictionaries, old and new
+        top_k (int): Number of most similar neighbors to index per node
+
+    Returns:
+        MovieGraph: The updated graph, or None if there is no saved graph
+
+    Raises:
+        ValueError: If the saved graph was built with other component weights
+    """
+    from imdb_graph.core.graph import MovieGraph
+    from imdb_graph.core.graph_utils import find_binary_graph
+    from imdb_graph.core.similarity import component_weights
+    from imdb_graph.core.topk import TopKIndex
+
+    binary_path = find_binary_graph(MOVIE_GRAPH_PATH)
+    if binary_path is not None:
+        graph = MovieGraph.load_from_binary(binary_path)
+    elif MOVIE_GRAPH_PATH.exists():
+        graph = MovieGraph.load_from_json(MOVIE_GRAPH_PATH)
+    else:
+        print("No existing graph found, running a full build.")
+        return None
+
+    # New edges must follow the rule of the saved ones; graphs without it used the defaults
+    scoring = graph.scoring or {'threshold': THRESHOLD, 'weights': component_weights()}
+    if scoring['weights'] != component_weights():
+        weights = ",".join(f"{name}={weight:g}" for name, weight in scoring['weights'].items())
+        raise ValueError(f"The saved graph was built with the component weights {weights}, "
+                         f"run rethreshold with --weights {weights} instead of an incremental build")
+    threshold = scoring['threshold']
+    if threshold != THRESHOLD:
+        print(f"Using the saved graph's threshold of {threshold:g}.")
+
+    known_ids = {data['id'] for data in graph.nodes_data if data is not None}
+    new_movies = [movie for movie in movies if movie['id'] not in known_ids]
+    print(f"Adding {len(new_movies)} new movies to the existing graph of {len(known_ids)} movies...")
+    graph.add_movies(new_movies, threshold=threshold)
+    graph = graph.freeze()
+    if not top_k:
+        graph.top_k_index = None
+    elif graph.top_k_index is None or graph.top_k_index.k != top_k:
+        graph.top_k_index = TopKIndex.from_adjacency(graph.adj_list, top_k)
+    return graph
 
 def main():
-    """Build the movie graph from raw data and save it to JSON."""
+    """Build the movie graph from raw data and save it to JSON and binary files."""
+    from imdb_graph.core.csr import CSRMovieGraph
+    from imdb_graph.data.movie_io import iter_movies
+
     print("Loading movies...")
     
     # Ensure data directory exists
     os.makedirs(DATA_DIR, exist_ok=True)
     
-    if not MOVIES_DATA_PATH.exists():
+    movies_path = find_movies_file()
+    if movies_path is None:
         print(f"Error: Movie data file not found at {MOVIES_DATA_PATH}")
         print("Please run the data fetch script first or provide the correct path.")
         return
-    
-    movies = load_movies(MOVIES_DATA_PATH)
-    print(f"Loaded {len(movies)} movies.")
+    print(f"Streaming movies from {movies_path}")
 
-    # Initialize the graph with the number of movies
-    graph = MovieGraph(len(movies))
+    # Number of worker processes, 0 uses every CPU
+    try:
+        workers = int(_get_option("--workers", 1)) or None
+    except ValueError:
+        print("Error: --workers expects a number. Using a single worker.")
+        workers = 1
+
+    # Most similar neighbors kept per movie in the stored top-k index
+    try:
+        top_k = int(_get_option("--top-k", TOP_K))
+    except ValueError:
+        print(f"Error: --top-k expects a number. Using {TOP_K}.")
+        top_k = TOP_K
 
-    # Build the graph using the new method
-    print("Building the graph (this may take a while)...")
-    graph.build_graph(movies, threshold=THRESHOLD)
+    # Only score pairs involving new movies when updating a saved graph
+    graph = None
+    if "--incremental" in sys.argv:
+        try:
+            graph = update_graph(iter_movies(movies_path), top_k)
+        except ValueError as e:
+            print(f"Error: {e}.")
+            print("Rebuild the graph without --incremental to use the default weights.")
+            return
+
+    if graph is None:
+        # Build a compact CSR graph, interning movie features as they stream in
+        print("Building the graph (this may take a while)...")
+        graph = CSRMovieGraph.build_from_stream(iter_movies(movies_path), threshold=THRESHOLD,
+                                                workers=workers, top_k=top_k)
 
     print(f"Graph built: {graph.get_num_nodes()} nodes, {graph.get_num_edges()} edges.")
+    save_graph(graph)
+
+def save_graph(graph):
+    """Detect communities, print a summary and save the graph to JSON and binary files.
+
+    Args:
+        graph (CSRMovieGraph): The built graph
+    """
+    import numpy as np
 
-    # Print sample neighbors for the first 3 movies
-    for movie in movies[:3]:
-        neighbors = graph.get_neighbors(movie['id'])
+    from imdb_graph.core.community import community_summaries
+
+    # Label communities for coloring and cluster summaries, stored with the graph
+    print("Detecting communities...")
+    with trace.span("detect_communities") as span:
+        communities = graph.detect_communities()
+        num_communities = int(communities.max()) + 1 if len(communities) else 0
+        span.count("communities", num_communities)
+    print(f"Found {num_communities} communities in {span.elapsed:.2f} seconds.")
+    degrees = np.diff(graph.offsets)
+    for summary in community_summaries(communities, graph.nodes_data, degrees, limit=5):
+        print(f"  Cluster {summary['community']} ({summary['size']} movies): "
+              f"{', '.join(summary['top_genres']) or 'N/A'}, "
+              f"e.g. {', '.join(summary['examples'][:3])}")
+
+    # Print sample neighbors for the first 3 nodes
+    for node_id in range(min(3, len(graph.nodes_data))):
+        movie = graph.get_node_data(node_id)
+        neighbors = graph.get_neighbors(node_id)
         print(f"\nMovie: {movie['title']} ({movie['year']})")
         print("Neighbors:")
         for neighbor_id, weight in neighbors[:5]:
@@ -64,16 +192,113 @@ def main():
     graph.save_to_json(MOVIE_GRAPH_PATH)
     print(f"Graph saved to {MOVIE_GRAPH_PATH}")
 
+    # Save the memory-mappable binary copy, which loaders prefer when present
+    graph.save_to_binary(MOVIE_GRAPH_BINARY_PATH)
+    print(f"Binary graph saved to {MOVIE_GRAPH_BINARY_PATH}")
+
+def _parse_weights(text):
+    """Parse `--weights genre=3,cast=2` into a component weight mapping.
+
+    Args:
+        text (str): Comma-separated name=weight items
+
+    Returns:
+        dict: Component name -> weight
+
+    Raises:
+        ValueError: If an item is not name=number
+    """
+    weights = {}
+    for item in text.split(","):
+        name, sep, value = item.partition("=")
+        if not sep:
+            raise ValueError(f"expected name=weight, got {item!r}")
+        weights[name.strip()] = float(value)
+    return weights
+
+def rethreshold_graph():
+    """Rebuild the graph at another threshold or component weights from the saved pair scores."""
+    from imdb_graph.core.score_store import ScoreStore
+    from imdb_graph.core.similarity import MovieFeatures, score_table
+    from imdb_graph.data.movie_io import iter_movies
+    from imdb_graph.utils.constants import STORE_MIN_SCORE
+
+    os.makedirs(DATA_DIR, exist_ok=True)
+    movies_path = find_movies_file()
+    if movies_path is None:
+        print(f"Error: Movie data file not found at {MOVIES_DATA_PATH}")
+        print("Please run the data fetch script first or provide the correct path.")
+        return
+    try:
+        threshold = float(_get_option("--threshold", THRESHOLD))
+        top_k = int(_get_option("--top-k", TOP_K))
+        min_score = float(_get_option("--min-score", min(STORE_MIN_SCORE, threshold)))
+        weights = _parse_weights(_get_option("--weights")) if _get_option("--weights") else None
+        score_table(weights)  # Rejects unknown component names
+    except ValueError as e:
+        print(f"Error: --threshold, --top-k, --min-score and --weights expect numbers ({e}).")
+        return
+
+    print(f"Streaming movies from {movies_path}")
+    features = MovieFeatures()
+    for movie in iter_movies(movies_path):
+        features.append(movie)
+    features.finalize()
+
+    # Every pair is scored once; later runs only filter the stored pairs
+    store = None
+    if SCORE_STORE_PATH.exists() and "--rescore" not in sys.argv:
+        store = ScoreStore.load(SCORE_STORE_PATH)
+        if not store.matches(features.table):
+            print("The saved pair scores are for other movies, scoring them again.")
+            store = None
+        elif weights is None and not store.covers(threshold):
+            print(f"The saved pair scores stop at {store.min_score:g}, scoring them again.")
+            store = None
+    if store is None:
+        print("Scoring every pair of movies once (this may take a while)...")
+        store = ScoreStore.build(None, min_score, features=features)
+        store.save(SCORE_STORE_PATH)
+        print(f"Saved {len(store)} scored pairs to {SCORE_STORE_PATH}")
+
+    # Re-weighting must not lift pairs left out of the store over the threshold
+    if not store.covers(threshold, weights):
+        print(f"Error: pairs scoring {store.min_score:g} or less with the default weights are "
+              f"not stored but can score above {threshold:g} with these weights.")
+        print("Rebuild the store with a lower floor, e.g. --rescore --min-score 0.")
+        return
+
+    # Edges at the neighboring thresholds, to help pick one
+    scores = store.scores(weights)
+    lowest = min(int(store.min_score), int(scores.min())) if len(scores) else 0
+    thresholds = list(range(lowest, int(scores.max()) if len(scores) else 0))
+    print("Edges by threshold:")
+    for value, count in zip(thresholds, store.edge_counts(thresholds, weights)):
+        print(f"  score > {value}: {count} edges")
+
+    graph = store.to_graph(features.table, threshold, weights, top_k)
+    print(f"Graph at threshold {threshold:g}: {graph.get_num_nodes()} nodes, "
+          f"{graph.get_num_edges()} edges.")
+    save_graph(graph)
+
 def visualize_graph():
     """Run the visualization module to create an interactive graph."""
     try:
         from imdb_graph.visualization.visualize import create_movie_network
         
+        # The level-of-detail view covers every movie, without a limit
+        if "--lod" in sys.argv:
+            from imdb_graph.visualization.visualize import create_catalog_network
+            
+            output_file = create_catalog_network(_get_option("--output"))
+            print(f"\nVisualization created: {output_file}")
+            return
+        
         # Default to 250 movies
         movie_limit = 250
         
         # Parse command line arguments if provided
-        if len(sys.argv) > 2:
+        if len(sys.argv) > 2 and not sys.argv[2].startswith("--"):
             try:
                 movie_limit = int(sys.argv[2])
                 print(f"Creating visualization with {movie_limit} movies...")
@@ -81,8 +306,55 @@ def visualize_graph():
                 print(f"Error: {sys.argv[2]} is not a valid number of movies.")
                 print("Using default value of 250 movies.")
         
+        # Color by primary genre, or by the communities detected at build time
+        color_by = _get_option("--color-by", "genre")
+        if color_by not in ("genre", "community"):
+            print("Error: --color-by expects 'genre' or 'community'. Using genre.")
+            color_by = "genre"
+        
+        # Write the page in bulk, or through pyvis with --renderer pyvis
+        renderer = _get_option("--renderer", "bulk")
+        if renderer not in ("bulk", "pyvis"):
+            print("Error: --renderer expects 'bulk' or 'pyvis'. Using bulk.")
+            renderer = "bulk"
+        
+        # Positions are precomputed unless --layout physics asks the browser to settle them
+        layout = _get_option("--layout", "precomputed")
+        if layout not in ("precomputed", "physics"):
+            print("Error: --layout expects 'precomputed' or 'physics'. Using precomputed.")
+            layout = "precomputed"
+        
+        # Pick the movies: the first N, an ego network, the best connected, a community or a filter
+        select = _get_option("--select", "first")
+        if select not in ("first", "ego", "degree", "community", "filter"):
+            print("Error: --select expects 'first', 'ego', 'degree', 'community' or 'filter'. Using first.")
+            select = "first"
+        movie = _get_option("--movie")
+        if select == "ego" and movie is None:
+            print("Error: --select ego needs --movie <title or #node id>.")
+            return
+        try:
+            depth = int(_get_option("--depth", 1))
+            community = int(_get_option("--community", 0))
+        except ValueError:
+            print("Error: --depth and --community expect numbers.")
+            return
+        years = None
+        if _get_option("--years") is not None:
+            # "1990-1999", "1990-" or "-1999"
+            first_year, _, last_year = _get_option("--years").partition("-")
+            try:
+                years = (int(first_year) if first_year else None,
+                         int(last_year) if last_year else None)
+            except ValueError:
+                print("Error: --years expects a range such as 1990-1999.")
+                return
+        
         # Create the visualization
-        output_file = create_movie_network(movie_limit=movie_limit)
+        output_file = create_movie_network(movie_limit=movie_limit, color_by=color_by,
+                                           renderer=renderer, layout=layout, select=select,
+                                           movie=movie, depth=depth, community=community,
+                                           genre=_get_option("--genre"), years=years)
         print(f"\nVisualization created: {output_file}")
         print(f"Open this file in your web browser to explore the movie graph.")
     except ImportError as e:
@@ -91,26 +363,120 @@ def visualize_graph():
     except Exception as e:
         print(f"Error creating visualization: {e}")
 
+def serve_graph():
+    """Serve the saved graph over HTTP until interrupted."""
+    from imdb_graph.core.graph_utils import find_binary_graph
+    from imdb_graph.server.service import run_server
+    from imdb_graph.utils.constants import SERVER_HOST, SERVER_PORT
+
+    if not MOVIE_GRAPH_PATH.exists() and find_binary_graph(MOVIE_GRAPH_PATH) is None:
+        print(f"Error: Graph data file not found at {MOVIE_GRAPH_PATH}")
+        print("Please run the graph building script first.")
+        return
+    try:
+        port = int(_get_option("--port", SERVER_PORT))
+    except ValueError:
+        print(f"Error: --port expects a number. Using {SERVER_PORT}.")
+        port = SERVER_PORT
+    run_server(MOVIE_GRAPH_PATH, host=_get_option("--host", SERVER_HOST), port=port)
+
+def _trace_path(command):
+    """Return where --trace should write the timing trace, or None without the flag.
+
+    Args:
+        command (str): The command being run, names the default trace file
+
+    Returns:
+        Path: Trace file path, or None if tracing was not requested
+    """
+    if not any(arg == "--trace" or arg.startswith("--trace=") for arg in sys.argv):
+        return None
+    path = _get_option("--trace")
+    if path is None or path.startswith("--"):
+        return DATA_DIR / f"trace_{command}.json"
+    return Path(path)
+
+def fetch_movies():
+    """Fetch movie data from TMDB into the data directory."""
+    from imdb_graph.data.data_fetch import main as fetch_main
+
+    fetch_main()
+
+def print_usage():
+    """Print the available commands and example invocations."""
+    print("Available commands:")
+    print("  build     - Build the movie graph from raw data")
+    print("  visualize - Create a visualization of the movie graph")
+    print("  serve     - Serve recommendations from the saved graph over HTTP")
+    print("  fetch     - Fetch movie data from TMDB (needs TMDB_API_KEY)")
+    print("  rethreshold - Rebuild the graph at another threshold from the saved pair scores")
+    print("\nExample usage:")
+    print("  python -m imdb_graph.main build")
+    print("  python -m imdb_graph.main build --workers 8  # Build with 8 processes")
+    print("  python -m imdb_graph.main build --incremental  # Only add new movies")
+    print("  python -m imdb_graph.main build --top-k 10  # Index the 10 most similar movies")
+    print("  python -m imdb_graph.main rethreshold --threshold 8  # No rescoring after the first run")
+    print("  python -m imdb_graph.main rethreshold --weights cast=3,year=1  # Re-weight components")
+    print("  python -m imdb_graph.main rethreshold --rescore --min-score 0  # Store every matching pair")
+    print("  python -m imdb_graph.main visualize")
+    print("  python -m imdb_graph.main visualize 100  # Visualize with 100 movies")
+    print("  python -m imdb_graph.main visualize 100 --color-by community  # Color by cluster")
+    print("  python -m imdb_graph.main visualize --lod  # Every movie, clusters expand on zoom")
+    print("  python -m imdb_graph.main visualize 300 --select ego --movie \"Heat\" --depth 2  # Around one movie")
+    print("  python -m imdb_graph.main visualize 500 --select degree  # Best connected movies")
+    print("  python -m imdb_graph.main visualize --select community --community 3")
+    print("  python -m imdb_graph.main visualize --select filter --genre Drama --years 1990-1999")
+    print("  python -m imdb_graph.main serve --port 8000  # Serve /neighbors, /similar and /path")
+    print("  python -m imdb_graph.main fetch --resume  # Continue an interrupted fetch")
+    print("  python -m imdb_graph.main build --trace  # Write timing spans to data/trace_build.json")
+    print("  python -m imdb_graph.main visualize 500 --trace out.json  # Trace a render")
+
+# Command name -> function; each imports what it needs when it runs
+COMMANDS = {
+    "build": main,
+    "visualize": visualize_graph,
+    "serve": serve_graph,
+    "fetch": fetch_movies,
+    "rethreshold": rethreshold_graph,
+}
+
 def _run_command():
-    """Entry point for command-line usage."""
+    """Entry point for command-line usage.
+
+    Returns:
+        int: Exit status, 2 for an unknown command
+    """
     command = "build"  # Default command
     
     # Check if a command was provided
     if len(sys.argv) > 1:
         command = sys.argv[1].lower()
     
-    if command == "build":
-        main()
-    elif command == "visualize":
-        visualize_graph()
-    else:
-        print("Invalid command. Available commands:")
-        print("  build     - Build the movie graph from raw data")
-        print("  visualize - Create a visualization of the movie graph")
-        print("\nExample usage:")
-        print("  python -m imdb_graph.main build")
-        print("  python -m imdb_graph.main visualize")
-        print("  python -m imdb_graph.main visualize 100  # Visualize with 100 movies")
+    # Help never runs a command, whatever else is on the line
+    if command == "help" or "--help" in sys.argv or "-h" in sys.argv:
+        print_usage()
+        return 0
+    
+    if command not in COMMANDS:
+        print(f"Invalid command: {command}")
+        print_usage()
+        return 2
+    
+    # Record nested timing spans and write them as a Chrome trace
+    trace_path = _trace_path(command)
+    if trace_path is None:
+        COMMANDS[command]()
+        return 0
+    trace.enable()
+    try:
+        with trace.span(command):
+            COMMANDS[command]()
+    finally:
+        trace.disable()
+        print(f"\nTiming spans:\n{trace.format_summary()}")
+        print(f"Trace written to {trace.write_chrome_trace(trace_path)} "
+              f"(open it in chrome://tracing or https://ui.perfetto.dev)")
+    return 0
 
 if __name__ == "__main__":
-    _run_command()
+    sys.exit(_run_command())
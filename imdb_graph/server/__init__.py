@@ -0,0 +1,6 @@
+"""
+Server module for IMDB Movie Graph.
+
+This package contains the local recommendation service, which loads the graph
+once and answers neighbor, similarity and path queries over HTTP.
+"""
@@ -0,0 +1,343 @@
+"""
+Local recommendation service.
+
+The graph is loaded once and kept warm. Requests are answered by a small
+asyncio HTTP/1.1 server (keep-alive, GET only) that needs nothing beyond the
+standard library and the local graph file:
+
+    GET /neighbors?id=0,1,2         Every neighbor of each movie
+    GET /similar?id=0,1&k=5         The k most similar movies of each movie
+    GET /path?from=0&to=42          Fewest hops, or mode=strongest for Dijkstra
+    GET /recommend?id=0,1&k=10      Personalized PageRank seeded from the movies
+    GET /stats                      Request counts, latency and cache hit rate
+
+Ids are graph node ids and several can be looked up in one request. Encoded
+responses are kept in an LRU cache keyed by the normalized query.
+"""
+import asyncio
+import json
+import time
+from collections import OrderedDict, deque
+from urllib.parse import parse_qs, urlsplit
+
+from imdb_graph.core.graph import TOP_K
+from imdb_graph.core.pagerank import PersonalizedPageRank
+from imdb_graph.core.query import GraphQuery
+from imdb_graph.utils.constants import (
+    MAX_BATCH_SIZE,
+    MAX_RECOMMENDATIONS,
+    SERVER_CACHE_SIZE,
+    SERVER_HOST,
+    SERVER_PORT,
+)
+from imdb_graph.utils import trace
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+LATENCY_SAMPLES = 2048  # Recent request latencies kept for percentiles
+
+class LRUCache:
+    """Least-recently-used cache with hit and miss counters.
+
+    Args:
+        capacity (int): Maximum number of entries
+    """
+
+    def __init__(self, capacity=SERVER_CACHE_SIZE):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        # Return a cached value and mark it as recently used, or None
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        # Store a value, evicting the least recently used entry when full
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+class ServiceStats:
+    """Request, latency and throughput counters."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.requests = 0
+        self.errors = 0
+        self.by_endpoint = {}
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    def record(self, endpoint, status, seconds):
+        # Count one handled request
+        self.requests += 1
+        self.errors += status >= 400
+        self.by_endpoint[endpoint] = self.by_endpoint.get(endpoint, 0) + 1
+        self.latencies.append(seconds)
+
+    def snapshot(self):
+        """Summarize the counters.
+
+        Returns:
+            dict: Request counts, throughput and latency percentiles in milliseconds
+        """
+        uptime = time.perf_counter() - self.started
+        latencies = sorted(self.latencies)
+
+        def percentile(fraction):
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] * 1000
+
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "by_endpoint": dict(self.by_endpoint),
+            "uptime_s": round(uptime, 3),
+            "throughput_rps": round(self.requests / uptime, 2) if uptime > 0 else 0.0,
+            "latency_ms": {"p50": round(percentile(0.5), 3), "p95": round(percentile(0.95), 3),
+                           "p99": round(percentile(0.99), 3)},
+        }
+
+def _parse_ids(params, name="id"):
+    # Ids may be repeated (?id=1&id=2) or comma separated (?id=1,2)
+    ids = [int(value) for raw in params.get(name, []) for value in raw.split(",") if value]
+    if not ids:
+        raise ValueError(f"Missing '{name}' parameter")
+    if len(ids) > MAX_BATCH_SIZE:
+        raise ValueError(f"At most {MAX_BATCH_SIZE} ids per request")
+    return ids
+
+def _parse_int(params, name, default=None):
+    values = params.get(name)
+    if not values:
+        if default is None:
+            raise ValueError(f"Missing '{name}' parameter")
+        return default
+    return int(values[0])
+
+def _parse_k(params, default, maximum=None):
+    # Number of results asked for, at least one and at most `maximum`
+    k = _parse_int(params, "k", default)
+    if k < 1:
+        raise ValueError("'k' must be at least 1")
+    if maximum is not None and k > maximum:
+        raise ValueError(f"'k' must be at most {maximum}")
+    return k
+
+class RecommendationService:
+    """Answers recommendation queries against a loaded graph, without any transport.
+
+    Args:
+        graph (MovieGraph): Graph to serve, frozen into CSR form if needed
+        cache_size (int): Number of responses kept in the LRU cache
+    """
+
+    def __init__(self, graph, cache_size=SERVER_CACHE_SIZE):
+        from imdb_graph.core.topk import TopKIndex
+
+        self.graph = graph.freeze()
+        # /similar never asks for more than the index holds, so requests never rebuild it
+        if self.graph.top_k_index is None:
+            self.graph.top_k_index = TopKIndex.from_csr(
+                self.graph.offsets, self.graph.neighbors, self.graph.weights, TOP_K)
+        self.query = GraphQuery(self.graph)
+        self.pagerank = PersonalizedPageRank(self.graph)
+        self.num_nodes = len(self.graph.nodes_data)
+        self.cache = LRUCache(cache_size)
+        self.stats = ServiceStats()
+        self.routes = {
+            "/neighbors": self.neighbors,
+            "/similar": self.similar,
+            "/path": self.path,
+            "/recommend": self.recommend,
+        }
+
+    def _check(self, node_id):
+        if not 0 <= node_id < self.num_nodes:
+            raise ValueError(f"Unknown movie id {node_id}")
+        return node_id
+
+    def _movie(self, node_id, weight=None):
+        data = self.graph.get_node_data(node_id) or {}
+        movie = {"id": node_id, "movie_id": data.get("id"), "title": data.get("title")}
+        if weight is not None:
+            movie["weight"] = weight
+        return movie
+
+    def neighbors(self, params):
+        # Every neighbor of each requested movie
+        return {"results": {
+            str(node_id): [self._movie(n, w) for n, w in self.graph.get_neighbors(self._check(node_id))]
+            for node_id in _parse_ids(params)
+        }}
+
+    def similar(self, params):
+        # The k most similar movies of each requested movie, from the top-k index
+        k = min(_parse_k(params, TOP_K), self.graph.top_k_index.k)
+        return {"results": {
+            str(node_id): [self._movie(n, w) for n, w in self.graph.top_k(self._check(node_id), k)]
+            for node_id in _parse_ids(params)
+        }}
+
+    def path(self, params):
+        # How two movies are connected: fewest hops, or the strongest similarity chain
+        source = self._check(_parse_int(params, "from"))
+        target = self._check(_parse_int(params, "to"))
+        mode = params.get("mode", ["hops"])[0]
+        if mode == "strongest":
+            nodes, cost = self.query.strongest_path(source, target)
+        elif mode == "hops":
+            nodes, cost = self.query.shortest_path(source, target), None
+        else:
+            raise ValueError(f"Unknown path mode: {mode}")
+        return {"path": [self._movie(n) for n in nodes] if nodes is not None else None,
+                "cost": cost}
+
+    def recommend(self, params):
+        # Movies closest to all requested movies by personalized PageRank
+        seeds = [self._check(node_id) for node_id in _parse_ids(params)]
+        k = _parse_k(params, 10, MAX_RECOMMENDATIONS)
+        return {"results": [dict(self._movie(n), score=score)
+                            for n, score in self.pagerank.recommend(seeds, k)]}
+
+    def handle(self, method, target):
+        """Answer one request.
+
+        Args:
+            method (str): HTTP method
+            target (str): Request target, path and query string
+
+        Returns:
+            tuple: (HTTP status, encoded JSON body)
+        """
+        start = time.perf_counter()
+        url = urlsplit(target)
+        payload = None
+        if method != "GET":
+            status, body = 405, {"error": "Only GET is supported"}
+        elif url.path == "/stats":
+            status, body = 200, dict(self.stats.snapshot(),
+                                     cache={"size": len(self.cache), "hits": self.cache.hits,
+                                            "misses": self.cache.misses})
+        elif url.path not in self.routes:
+            status, body = 404, {"error": f"Unknown endpoint {url.path}"}
+        else:
+            params = parse_qs(url.query)
+            key = (url.path, tuple(sorted((name, tuple(values)) for name, values in params.items())))
+            status, payload = 200, self.cache.get(key)
+            if payload is None:
+                try:
+                    payload = json.dumps(self.routes[url.path](params)).encode("utf-8")
+                    self.cache.put(key, payload)
+                except ValueError as e:
+                    status, body = 400, {"error": str(e)}
+        if payload is None:
+            payload = json.dumps(body).encode("utf-8")
+        self.stats.record(url.path, status, time.perf_counter() - start)
+        return status, payload
+
+    async def handle_connection(self, reader, writer):
+        # Serve HTTP/1.1 requests on one connection until the client is done
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                parts = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                if int(headers.get("content-length", 0) or 0):
+                    await reader.readexactly(int(headers["content-length"]))
+
+                if len(parts) == 3:
+                    status, payload = self.handle(parts[0], parts[1])
+                else:
+                    status, payload = 400, b'{"error": "Malformed request line"}'
+                keep_alive = (len(parts) == 3 and parts[2] == "HTTP/1.1"
+                              and headers.get("connection", "").lower() != "close")
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1")
+                    + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host=SERVER_HOST, port=SERVER_PORT):
+        """Start listening.
+
+        Args:
+            host (str): Interface to bind
+            port (int): Port to bind, 0 picks a free one
+
+        Returns:
+            asyncio.base_events.Server: The listening server
+        """
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+def load_service_graph(json_path):
+    """Load the saved graph for serving, preferring the memory-mapped binary file.
+
+    Args:
+        json_path (Path): Path to the JSON graph file
+
+    Returns:
+        MovieGraph: The loaded graph
+    """
+    from imdb_graph.core.graph import MovieGraph
+    from imdb_graph.core.graph_utils import find_binary_graph
+
+    binary_path = find_binary_graph(json_path)
+    if binary_path is not None:
+        return MovieGraph.load_from_binary(binary_path)
+    return MovieGraph.load_from_json(json_path)
+
+def run_server(json_path, host=SERVER_HOST, port=SERVER_PORT):
+    """Load the graph once and serve it until interrupted.
+
+    Args:
+        json_path (Path): Path to the JSON graph file
+        host (str): Interface to bind
+        port (int): Port to bind
+
+    Returns:
+        None
+    """
+    with trace.span("load_service_graph", path=str(json_path)) as span:
+        service = RecommendationService(load_service_graph(json_path))
+    print(f"Graph loaded in {span.elapsed:.2f} seconds "
+          f"({service.num_nodes} nodes, {service.graph.get_num_edges()} edges)")
+
+    async def serve():
+        server = await service.start(host, port)
+        print(f"Serving on http://{host}:{port} (/neighbors, /similar, /path, /recommend, /stats)")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    print(f"\nServer stopped. {json.dumps(service.stats.snapshot())}")
@@ -1,8 +1,15 @@
 /**
  * Search functionality for IMDB Movie Graph visualization.
- * 
+ *
  * This script adds interactive search capabilities to the movie graph,
  * allowing users to find and highlight specific movies in the visualization.
+ *
+ * Searches are lookups in the index written by html_enhancer.py
+ * (window.searchIndex): every query word must be the prefix of a title,
+ * director or cast token, found by binary search in the sorted token list,
+ * and queries of three or more characters also match anywhere in a title
+ * through its trigrams. Pages that only name the index script
+ * (window.searchIndexSrc) load it the first time the search box is used.
  */
 
 document.addEventListener('DOMContentLoaded', function() {
@@ -13,98 +20,219 @@ document.addEventListener('DOMContentLoaded', function() {
       console.error("Network visualization not found");
       return;
     }
-    
+
     const nodes = network.body.data.nodes;
-    
+    const MAX_RESULTS = 100;
+    const HIGHLIGHT_COLOR = '#FFFF00';
+    // Same word characters as the \w+ tokens of the Python index
+    const WORD_PATTERN = /[\p{L}\p{N}_]+/gu;
+
+    let index = null;
+    let lowerLabels = null;
+    let indexLoading = false;
+    // Original colors of the highlighted nodes, the only ones to reset
+    const highlighted = new Map();
+
+    function useIndex(searchIndex) {
+      index = searchIndex;
+      lowerLabels = index.labels.map(label => label.toLowerCase());
+    }
+
+    function indexFromNodes() {
+      // Pages written without an index get a title-only one, built once
+      const ids = nodes.getIds();
+      const labels = ids.map(id => String(nodes.get(id).label || ''));
+      const tokenEntries = new Map();
+      const trigrams = {};
+      labels.forEach((label, entry) => {
+        const title = label.toLowerCase();
+        (title.match(WORD_PATTERN) || []).forEach(token => {
+          if (!tokenEntries.has(token)) tokenEntries.set(token, new Set());
+          tokenEntries.get(token).add(entry);
+        });
+        const chars = Array.from(title);
+        const seen = new Set();
+        for (let i = 0; i + 3 <= chars.length; i++) {
+          const gram = chars.slice(i, i + 3).join('');
+          if (!seen.has(gram)) {
+            seen.add(gram);
+            (trigrams[gram] = trigrams[gram] || []).push(entry);
+          }
+        }
+      });
+      // Sorted by code point, like the Python index, for the binary search
+      const tokens = Array.from(tokenEntries.keys()).sort((a, b) => (a < b ? -1 : a > b ? 1 : 0));
+      return {
+        ids: ids,
+        labels: labels,
+        tokens: tokens,
+        postings: tokens.map(token => Array.from(tokenEntries.get(token))),
+        trigrams: trigrams
+      };
+    }
+
+    function ensureIndex() {
+      // Returns true when the index is ready, otherwise searches again once it is
+      if (index) return true;
+      if (window.searchIndex) {
+        useIndex(window.searchIndex);
+        return true;
+      }
+      if (!window.searchIndexSrc) {
+        useIndex(indexFromNodes());
+        return true;
+      }
+      if (!indexLoading) {
+        indexLoading = true;
+        const script = document.createElement('script');
+        script.src = window.searchIndexSrc;
+        script.onload = function() {
+          useIndex(window.searchIndex);
+          if (searchInput.value.length >= 2) searchAndHighlight();
+        };
+        document.body.appendChild(script);
+      }
+      return false;
+    }
+
+    function lowerBound(tokens, value) {
+      let low = 0, high = tokens.length;
+      while (low < high) {
+        const mid = (low + high) >> 1;
+        if (tokens[mid] < value) low = mid + 1; else high = mid;
+      }
+      return low;
+    }
+
+    function prefixEntries(prefix) {
+      // Entries with a token starting with the prefix, from a contiguous token range
+      const entries = new Set();
+      for (let t = lowerBound(index.tokens, prefix);
+           t < index.tokens.length && index.tokens[t].startsWith(prefix); t++) {
+        index.postings[t].forEach(entry => entries.add(entry));
+      }
+      return entries;
+    }
+
+    function trigramEntries(text) {
+      // Titles containing the text: intersect the postings of its trigrams, then confirm
+      const chars = Array.from(text);
+      let candidates = null;
+      for (let i = 0; i + 3 <= chars.length; i++) {
+        const posting = index.trigrams[chars.slice(i, i + 3).join('')];
+        if (!posting) return [];
+        if (candidates === null || posting.length < candidates.length) candidates = posting;
+      }
+      return candidates.filter(entry => lowerLabels[entry].includes(text));
+    }
+
+    function lookup(text) {
+      // Title matches first, then the movies matched by their director or cast
+      const words = text.match(WORD_PATTERN) || [];
+      let prefixMatches = null;
+      words.forEach(word => {
+        const entries = prefixEntries(word);
+        prefixMatches = prefixMatches === null ? entries
+          : new Set(Array.from(prefixMatches).filter(entry => entries.has(entry)));
+      });
+      const titleMatches = new Set(text.length >= 3 ? trigramEntries(text) : []);
+      const rest = [];
+      (prefixMatches || []).forEach(entry => {
+        if (titleMatches.has(entry)) return;
+        if (lowerLabels[entry].includes(text)) titleMatches.add(entry); else rest.push(entry);
+      });
+      const byEntry = (a, b) => a - b;
+      return Array.from(titleMatches).sort(byEntry).concat(rest.sort(byEntry));
+    }
+
+    function resetHighlights() {
+      // Only nodes highlighted before are touched; collapsed clusters may have removed them
+      highlighted.forEach((color, id) => {
+        if (nodes.get(id)) {
+          nodes.update({id: id, color: color});
+        }
+      });
+      highlighted.clear();
+    }
+
+    function highlight(id) {
+      resetHighlights();
+      const node = nodes.get(id);
+      if (!node) return;
+      highlighted.set(id, node.color);
+
+      // Highlight selected node with a much more vibrant color
+      nodes.update({
+          id: id,
+          color: HIGHLIGHT_COLOR
+      });
+
+      // Focus on the selected node
+      network.focus(id, {
+          scale: 1.2,
+          animation: {
+              duration: 800,
+              easingFunction: 'easeInOutQuad'
+          }
+      });
+
+      // Add the highlight class for animation
+      const nodeDOM = document.querySelector(`[data-id="${id}"]`);
+      if (nodeDOM) {
+          nodeDOM.classList.add('highlight');
+          // Remove highlight class after animation completes
+          setTimeout(() => {
+              nodeDOM.classList.remove('highlight');
+          }, 4500);
+      }
+    }
+
+    function showResult(entry) {
+      const id = index.ids[entry];
+      if (!nodes.get(id) && index.groups && typeof window.showCluster === 'function') {
+        // Level-of-detail pages load the movie's cluster first
+        window.showCluster(index.groups[entry], () => highlight(id));
+      } else {
+        highlight(id);
+      }
+    }
+
     // Function to search and highlight nodes
     function searchAndHighlight() {
-      const searchText = document.getElementById('searchInput').value.toLowerCase();
+      const searchText = document.getElementById('searchInput').value.toLowerCase().trim();
       const searchResults = document.getElementById('searchResults');
       searchResults.innerHTML = '';
-      
+
       if (searchText.length < 2) {
           searchResults.style.display = 'none';
           return;
       }
-      
+      if (!ensureIndex()) {
+          return;
+      }
+
       // Clear any previous highlights
-      nodes.getIds().forEach(id => {
-          const node = nodes.get(id);
-          if (node.originalColor) {
-              nodes.update({
-                  id: id,
-                  color: node.originalColor
-              });
-          }
-      });
-      
+      resetHighlights();
+
       // Find matching nodes
-      const matchingNodes = [];
-      nodes.getIds().forEach(id => {
-          const node = nodes.get(id);
-          if (node.label && node.label.toLowerCase().includes(searchText)) {
-              matchingNodes.push({
-                  id: id,
-                  label: node.label
-              });
-          }
-      });
-      
+      const matches = lookup(searchText);
+
       // Display results
-      if (matchingNodes.length > 0) {
+      if (matches.length > 0) {
           searchResults.style.display = 'block';
           const resultsTitle = document.createElement('div');
           resultsTitle.id = 'searchTitle';
-          resultsTitle.textContent = `Found ${matchingNodes.length} movies`;
+          resultsTitle.textContent = matches.length > MAX_RESULTS
+            ? `Found ${matches.length} movies, showing ${MAX_RESULTS}`
+            : `Found ${matches.length} movies`;
           searchResults.appendChild(resultsTitle);
-          
-          matchingNodes.forEach(node => {
+
+          matches.slice(0, MAX_RESULTS).forEach(entry => {
               const resultItem = document.createElement('div');
               resultItem.className = 'resultItem';
-              resultItem.textContent = node.label;
+              resultItem.textContent = index.labels[entry];
               resultItem.onclick = function() {
-                  // Store original colors if not already stored
-                  nodes.getIds().forEach(id => {
-                      const n = nodes.get(id);
-                      if (!n.originalColor) {
-                          n.originalColor = n.color;
-                          nodes.update(n);
-                      }
-                  });
-                  
-                  // Reset all nodes to original color
-                  nodes.getIds().forEach(id => {
-                      const n = nodes.get(id);
-                      nodes.update({
-                          id: id,
-                          color: n.originalColor
-                      });
-                  });
-                  
-                  // Highlight selected node with a much more vibrant color
-                  nodes.update({
-                      id: node.id,
-                      color: '#FFFF00'
-                  });
-                  
-                  // Focus on the selected node
-                  network.focus(node.id, {
-                      scale: 1.2,
-                      animation: {
-                          duration: 800,
-                          easingFunction: 'easeInOutQuad'
-                      }
-                  });
-                  
-                  // Add the highlight class for animation
-                  const nodeDOM = document.querySelector(`[data-id="${node.id}"]`);
-                  if (nodeDOM) {
-                      nodeDOM.classList.add('highlight');
-                      // Remove highlight class after animation completes
-                      setTimeout(() => {
-                          nodeDOM.classList.remove('highlight');
-                      }, 4500);
-                  }
+                  showResult(entry);
               };
               searchResults.appendChild(resultItem);
           });
@@ -117,21 +245,20 @@ document.addEventListener('DOMContentLoaded', function() {
           searchResults.appendChild(noResults);
       }
     }
-    
-    // Save original colors for all nodes
-    nodes.getIds().forEach(id => {
-      const node = nodes.get(id);
-      node.originalColor = node.color;
-      nodes.update(node);
-    });
-    
+
+    const searchContainer = document.getElementById('searchContainer');
     const searchInput = document.getElementById('searchInput');
     const searchBtn = document.getElementById('searchBtn');
     const searchResults = document.getElementById('searchResults');
-    
+
+    // Start loading an external index as soon as the search box is used
+    searchInput.addEventListener('focus', function() {
+      ensureIndex();
+    });
+
     // Search button click handler
     searchBtn.addEventListener('click', searchAndHighlight);
-    
+
     // Handle enter key in search box
     searchInput.addEventListener('keyup', function(e) {
       if (e.key === 'Enter') {
@@ -143,27 +270,17 @@ document.addEventListener('DOMContentLoaded', function() {
         // Clear results when input is empty
         searchResults.style.display = 'none';
         searchResults.innerHTML = '';
-        
-        // Reset all nodes to original color
-        nodes.getIds().forEach(id => {
-            const node = nodes.get(id);
-            if (node.originalColor) {
-                nodes.update({
-                    id: id,
-                    color: node.originalColor
-                });
-            }
-        });
+        resetHighlights();
       }
     });
-    
+
     // Clear results when clicking outside
     document.addEventListener('click', function(e) {
       if (!searchContainer.contains(e.target) && !searchResults.contains(e.target)) {
         searchResults.style.display = 'none';
       }
     });
-    
+
     // Add keyboard shortcut for search ('/' key)
     document.addEventListener('keydown', function(e) {
       // Check if user is not typing in an input field
@@ -175,17 +292,7 @@ document.addEventListener('DOMContentLoaded', function() {
       if (e.key === 'Escape') {
         searchInput.value = '';
         searchResults.style.display = 'none';
-        
-        // Reset all nodes to original color
-        nodes.getIds().forEach(id => {
-            const node = nodes.get(id);
-            if (node.originalColor) {
-                nodes.update({
-                    id: id,
-                    color: node.originalColor
-                });
-            }
-        });
+        resetHighlights();
       }
     });
   }, 1000); // Wait for network to be initialized
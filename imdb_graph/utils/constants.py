@@ -8,6 +8,24 @@ OUTPUT_DIR = PROJECT_ROOT / "output"
 TEMPLATES_DIR = PROJECT_ROOT / "templates"
 DEFAULT_OUTPUT_DIR = OUTPUT_DIR
 
+# TMDB API access
+TMDB_BASE_URL = "https://api.themoviedb.org/3"
+TMDB_REQUEST_RATE = 40    # Requests per second, below the API's rate limit
+TMDB_FETCH_WORKERS = 16   # Concurrent requests over the pooled session
+TMDB_CACHE_TTL = 7 * 24 * 3600  # Seconds before a cached response is revalidated
+
+# Graph build
+THRESHOLD = 7  # Minimum similarity score (exclusive) to create an edge
+TOP_K = 5      # Most similar neighbors indexed per node at build time
+STORE_MIN_SCORE = 5  # Pairs scoring this or less are left out of the score store
+
+# Local recommendation service
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8000
+SERVER_CACHE_SIZE = 4096  # Responses kept in the LRU cache
+MAX_BATCH_SIZE = 100      # Movie ids accepted in one batched lookup
+MAX_RECOMMENDATIONS = 100 # Largest k accepted by /recommend
+
 # Genre color mapping
 GENRE_COLORS = {
     'Action': '#FF5733',
@@ -42,6 +60,14 @@ GENRE_COLORS = {
 }
 DEFAULT_COLOR = '#1f78b4'
 
+# Community color palette, cycled by community id (0 is the largest community)
+COMMUNITY_COLORS = [
+    '#E6194B', '#3CB44B', '#FFE119', '#4363D8', '#F58231', '#911EB4',
+    '#46F0F0', '#F032E6', '#BCF60C', '#FABEBE', '#008080', '#E6BEFF',
+    '#9A6324', '#FFFAC8', '#800000', '#AAFFC3', '#808000', '#FFD8B1',
+    '#000075', '#A9A9A9'
+]
+
 # Define the network visualization options as a constant
 NETWORK_OPTIONS = '''{
   "physics": {
@@ -0,0 +1,193 @@
+"""
+Timing spans for the build and render pipeline.
+
+A span times a block of code and can carry counters such as pairs scored,
+edges emitted or bytes written:
+
+    with trace.span("save_json", path=str(path)) as span:
+        ...
+        span.count("bytes_written", size)
+    print(f"Saved in {span.elapsed:.2f} seconds")
+
+Spans always time themselves, so progress messages can report their duration.
+They are only recorded once tracing is enabled (the --trace flag of
+imdb_graph.main): spans then nest per thread, and write_chrome_trace() exports
+them for chrome://tracing or https://ui.perfetto.dev. Disabled, a span costs
+two perf_counter() calls and counters are dropped.
+
+Counters of work done in worker processes stay in those processes; only the
+process that enabled tracing records spans.
+"""
+import json
+import os
+import threading
+import time
+
+_enabled = False
+_events = []                    # Finished spans, in the order they ended
+_origin = time.perf_counter()   # Trace timestamps are relative to this instant
+_local = threading.local()
+
+def enable():
+    """Start recording spans, dropping any recorded before."""
+    global _enabled
+    clear()
+    _enabled = True
+
+def disable():
+    """Stop recording spans; the recorded ones are kept until clear()."""
+    global _enabled
+    _enabled = False
+
+def is_enabled():
+    """Whether spans are being recorded.
+
+    Returns:
+        bool: True once enable() was called
+    """
+    return _enabled
+
+def clear():
+    """Drop the recorded spans and restart the trace clock."""
+    global _origin
+    _events.clear()
+    _origin = time.perf_counter()
+
+def _stack():
+    # Open spans of the calling thread, innermost last
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+class Span:
+    """A timed block of code, used through span().
+
+    Args:
+        name (str): Name shown in the trace
+        args (dict): Values and counters attached to the span
+    """
+
+    __slots__ = ("name", "args", "start", "end", "depth", "thread")
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+        self.start = self.end = None
+        self.depth = None   # Nesting level, set only when the span is recorded
+        self.thread = None
+
+    def __enter__(self):
+        if _enabled:
+            stack = _stack()
+            self.depth = len(stack)
+            self.thread = threading.get_native_id()
+            stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end = time.perf_counter()
+        if self.depth is not None:
+            stack = _stack()
+            if stack and stack[-1] is self:
+                stack.pop()
+            if exc_type is not None:
+                self.args["error"] = exc_type.__name__
+            _events.append(self)
+        return False
+
+    @property
+    def elapsed(self):
+        """Seconds since the span started, or its duration once it ended."""
+        end = self.end if self.end is not None else time.perf_counter()
+        return end - self.start
+
+    def count(self, name, value=1):
+        """Add to a counter of the span.
+
+        Args:
+            name (str): Counter name, e.g. "edges"
+            value (int): Amount to add
+        """
+        if self.depth is not None:
+            self.args[name] = self.args.get(name, 0) + value
+
+def span(name, **args):
+    """Time a block of code.
+
+    Args:
+        name (str): Name shown in the trace
+        **args: Values attached to the span, e.g. the file it reads
+
+    Returns:
+        Span: Context manager, with the duration in its `elapsed` attribute
+    """
+    return Span(name, args)
+
+def count(name, value=1):
+    """Add to a counter of the innermost open span of the calling thread.
+
+    Lets code deep inside a stage count its work without passing the span
+    around. Does nothing when tracing is disabled or no span is open.
+
+    Args:
+        name (str): Counter name, e.g. "pairs_scored"
+        value (int): Amount to add
+    """
+    if _enabled:
+        stack = _stack()
+        if stack:
+            stack[-1].count(name, value)
+
+def chrome_trace():
+    """Convert the recorded spans to the Chrome trace event format.
+
+    Returns:
+        dict: {"traceEvents": [...]} of complete ("X") events, timestamps in microseconds
+    """
+    pid = os.getpid()
+    events = [{"name": "process_name", "ph": "M", "pid": pid, "tid": 0,
+               "args": {"name": "imdb_graph"}}]
+    for recorded in sorted(_events, key=lambda s: s.start):
+        events.append({
+            "name": recorded.name,
+            "cat": "imdb_graph",
+            "ph": "X",
+            "ts": round((recorded.start - _origin) * 1e6, 1),
+            "dur": round((recorded.end - recorded.start) * 1e6, 1),
+            "pid": pid,
+            "tid": recorded.thread,
+            "args": recorded.args,
+        })
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+def write_chrome_trace(path):
+    """Write the recorded spans as a Chrome trace JSON file.
+
+    Args:
+        path (str or Path): Output file, created with its directory if needed
+
+    Returns:
+        str: The path written
+    """
+    path = str(path)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(chrome_trace(), f, default=str)
+    return path
+
+def format_summary():
+    """Format the recorded spans as an indented tree of durations and counters.
+
+    Returns:
+        str: One line per span, children below their parent
+    """
+    lines = []
+    for recorded in sorted(_events, key=lambda s: (s.thread, s.start)):
+        counters = ", ".join(f"{key}={value}" for key, value in recorded.args.items())
+        line = f"{'  ' * recorded.depth}{recorded.name}: {recorded.end - recorded.start:.3f} s"
+        lines.append(f"{line} ({counters})" if counters else line)
+    return "\n".join(lines)
@@ -1,15 +1,22 @@
-import time
+import json
+import re
+from collections import defaultdict
 from pathlib import Path
 import os
 
 # Import from the package
 from imdb_graph.utils.constants import PROJECT_ROOT
+from imdb_graph.utils import trace
 
 # Path to static resources
 STATIC_DIR = Path(__file__).parent.parent / "static"
 CSS_FILE = STATIC_DIR / "css" / "search.css"
 JS_FILE = STATIC_DIR / "js" / "search.js"
 
+# Words of titles, directors and cast members; search.js splits queries the same way
+TOKEN_PATTERN = re.compile(r"\w+")
+TRIGRAM_SIZE = 3
+
 def read_file(path):
     """Read the contents of a file.
     
@@ -22,24 +29,8 @@ def read_file(path):
     with open(path, 'r', encoding='utf-8') as f:
         return f.read()
 
-def enhance_html_with_search(filename):
-    """Enhance the HTML file with search functionality.
-    
-    Args:
-        filename (str or Path): Path to the HTML file
-        
-    Returns:
-        None
-    """
-    # Convert to string if it's a Path object
-    if not isinstance(filename, str):
-        filename = str(filename)
-        
-    print(f"Enhancing HTML file with search functionality: {filename}")
-    start_time = time.time()
-    
-    # Define search HTML
-    search_html = """
+# Search box injected at the top of the page body
+SEARCH_HTML = """
 <div id="searchContainer">
   <div style="width: 100%; margin-bottom: 10px;">
     <h3 style="margin: 0 0 8px 0; color: white; font-size: 18px; font-weight: 500;">Movie Explorer</h3>
@@ -51,25 +42,122 @@ def enhance_html_with_search(filename):
   </div>
 </div>
 <div id="searchResults"></div>
+"""
+
+def build_search_index(movies, ids=None, groups=None):
+    """Build the client-side search index of the given movies.
+
+    Titles, directors and cast members are split into lowercase word tokens,
+    kept sorted so a prefix is a binary search, each with the list of entries
+    it occurs in. Titles are also indexed by their character trigrams, so a
+    query found in the middle of a word still is a lookup instead of a scan.
+
+    Args:
+        movies (list): Movie dictionaries, in the order of their node ids
+        ids (list, optional): Node id of every movie, defaults to its position
+        groups (list, optional): Cluster of every movie, for pages that load
+            movies on demand
+
+    Returns:
+        dict: Index with parallel "ids" and "labels" lists, sorted "tokens"
+            with their "postings", "trigrams" of the titles and the optional
+            "groups"
+    """
+    token_entries = defaultdict(set)
+    trigram_entries = defaultdict(set)
+    labels = []
+    for entry, movie in enumerate(movies):
+        movie = movie or {}
+        label = movie.get("title", f"Movie {entry+1}")
+        labels.append(label)
+        text = " ".join([label, movie.get("director") or ""] + list(movie.get("cast") or []))
+        for token in TOKEN_PATTERN.findall(text.lower()):
+            token_entries[token].add(entry)
+        title = label.lower()
+        for start in range(len(title) - TRIGRAM_SIZE + 1):
+            trigram_entries[title[start:start + TRIGRAM_SIZE]].add(entry)
+
+    tokens = sorted(token_entries)
+    trace.count("tokens", len(tokens))
+    index = {
+        "ids": list(ids) if ids is not None else list(range(len(labels))),
+        "labels": labels,
+        "tokens": tokens,
+        "postings": [sorted(token_entries[token]) for token in tokens],
+        "trigrams": {gram: sorted(entries) for gram, entries in trigram_entries.items()},
+    }
+    if groups is not None:
+        index["groups"] = [int(group) for group in groups]
+    return index
+
+def search_index_script(search_index):
+    """Encode a search index as the JavaScript that defines it.
+
+    Args:
+        search_index (dict): Index as returned by build_search_index
+
+    Returns:
+        str: Statement assigning the index to window.searchIndex
     """
+    data = json.dumps(search_index, separators=(",", ":")).replace("</", "<\\/")
+    return f"var searchIndex = {data};\n"
+
+def get_search_components(search_index=None, index_src=None):
+    """Get the HTML, CSS and JavaScript of the search functionality.
     
-    # Read the generated HTML
-    with open(filename, 'r', encoding='utf-8') as f:
-        html_content = f.read()
+    Args:
+        search_index (dict, optional): Index embedded in the page, as returned
+            by build_search_index
+        index_src (str, optional): URL of a script defining the index, loaded
+            when the search box is first used instead of with the page
     
-    # Get components for search functionality
+    Returns:
+        tuple: (search box HTML, <style> element, <script> elements)
+    """
     search_css = f"<style>\n{read_file(CSS_FILE)}\n</style>"
     search_js = f"<script type=\"text/javascript\">\n{read_file(JS_FILE)}\n</script>"
+    if search_index is not None:
+        search_js = f"<script type=\"text/javascript\">\n{search_index_script(search_index)}</script>\n{search_js}"
+    elif index_src is not None:
+        search_js = f"<script type=\"text/javascript\">\nvar searchIndexSrc = {json.dumps(index_src)};\n</script>\n{search_js}"
+    return SEARCH_HTML, search_css, search_js
+
+def enhance_html_with_search(filename, movies=None, ids=None):
+    """Enhance the HTML file with search functionality.
     
-    # Inject our search HTML into the body
-    enhanced_html = html_content.replace('<body>', f'<body>\n{search_html}')
-    # Inject our CSS into the head
-    enhanced_html = enhanced_html.replace('</head>', f'{search_css}\n</head>')
-    # Inject our JS at the end of the body
-    enhanced_html = enhanced_html.replace('</body>', f'{search_js}\n</body>')
+    Args:
+        filename (str or Path): Path to the HTML file
+        movies (list, optional): Movies shown on the page, indexed for the search
+        ids (list, optional): Node id of every movie, defaults to its position
+        
+    Returns:
+        None
+    """
+    # Convert to string if it's a Path object
+    if not isinstance(filename, str):
+        filename = str(filename)
+        
+    print(f"Enhancing HTML file with search functionality: {filename}")
     
-    # Write the modified HTML back to the file
-    with open(filename, 'w', encoding='utf-8') as f:
-        f.write(enhanced_html)
+    with trace.span("enhance_html", path=filename) as span:
+        # Read the generated HTML
+        with open(filename, 'r', encoding='utf-8') as f:
+            html_content = f.read()
+        
+        # Get components for search functionality, with the index of the shown movies
+        search_index = build_search_index(movies, ids) if movies is not None else None
+        search_html, search_css, search_js = get_search_components(search_index)
+        
+        # Inject our search HTML into the body
+        enhanced_html = html_content.replace('<body>', f'<body>\n{search_html}')
+        # Inject our CSS into the head
+        enhanced_html = enhanced_html.replace('</head>', f'{search_css}\n</head>')
+        # Inject our JS at the end of the body
+        enhanced_html = enhanced_html.replace('</body>', f'{search_js}\n</body>')
+        
+        # Write the modified HTML back to the file
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write(enhanced_html)
+        span.count("bytes_written", len(enhanced_html.encode('utf-8')))
     
-    print(f"HTML file enhanced in {time.time() - start_time:.2f} seconds")
+    print(f"HTML file enhanced in {span.elapsed:.2f} seconds")
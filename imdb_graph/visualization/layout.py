@@ -0,0 +1,255 @@
+"""
+Precomputed graph layout.
+
+Positions are computed offline so the browser can draw the graph with physics
+disabled instead of settling a force simulation itself:
+
+1. Spectral initialization: a few rounds of power iteration with the lazy
+   random-walk matrix give the two smoothest non-constant eigenvectors, which
+   already place well connected movies close together.
+2. Force-directed refinement (Fruchterman-Reingold): edges attract, and every
+   node is repelled by a random sample of the other nodes, scaled up to the
+   full node count, which keeps an iteration O(n x sample + edges).
+
+Layouts are cached on disk, keyed by the edges, the selected movies and the
+layout parameters, so rendering the same subset again costs a file read.
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from imdb_graph.utils.constants import DATA_DIR
+from imdb_graph.utils import trace
+
+LAYOUT_CACHE_DIR = DATA_DIR / "layout_cache"
+LAYOUT_VERSION = 2        # Bump when the algorithm changes to invalidate cached layouts
+SPECTRAL_ITERATIONS = 60
+LAYOUT_ITERATIONS = 80
+REPULSION_SAMPLE = 256    # Nodes each node is repelled by per iteration
+GRAVITY = 0.05            # Pull towards the center, keeps components together
+NODE_SPACING = 60         # Average distance between neighboring nodes, in pixels
+
+def spectral_positions(num_nodes, sources, targets, weights, iterations=SPECTRAL_ITERATIONS, seed=0):
+    """Place nodes on the two smoothest non-constant random-walk eigenvectors.
+
+    Args:
+        num_nodes (int): Number of nodes
+        sources (numpy.ndarray): First node of every undirected edge
+        targets (numpy.ndarray): Second node of every undirected edge
+        weights (numpy.ndarray): Edge weights
+        iterations (int): Power iteration rounds
+        seed (int): Seed of the random starting vectors
+
+    Returns:
+        numpy.ndarray: (num_nodes, 2) positions in [-1, 1]
+    """
+    rng = np.random.default_rng(seed)
+    positions = rng.standard_normal((num_nodes, 2))
+    degree = (np.bincount(sources, weights, num_nodes) + np.bincount(targets, weights, num_nodes))
+    connected = degree > 0
+    if not connected.any():
+        return _normalize(positions)
+
+    # Isolated nodes keep their random position, the walk runs on the others
+    embedding = positions[connected]
+    index = np.cumsum(connected) - 1
+    sources, targets = index[sources], index[targets]
+    degree = degree[connected]
+    count = len(degree)
+    for _ in range(iterations):
+        # Lazy random walk step
+        walked = np.empty_like(embedding)
+        for axis in range(2):
+            column = embedding[:, axis]
+            walked[:, axis] = (np.bincount(sources, weights * column[targets], count)
+                               + np.bincount(targets, weights * column[sources], count)) / degree
+        embedding = 0.5 * (embedding + walked)
+
+        # Degree-weighted Gram-Schmidt against the constant vector and each other
+        for axis in range(2):
+            column = embedding[:, axis]
+            column -= degree @ column / degree.sum()
+            if axis == 1:
+                first = embedding[:, 0]
+                column -= (degree @ (first * column)) * first
+            scale = np.sqrt(degree @ (column * column))
+            # A component too small for two directions leaves nothing to scale
+            column /= scale if scale > 1e-12 else 1.0
+    positions[connected] = embedding
+    return _normalize(positions)
+
+def force_directed_positions(positions, sources, targets, weights, iterations=LAYOUT_ITERATIONS,
+                             sample=REPULSION_SAMPLE, seed=0):
+    """Refine positions with a sampled Fruchterman-Reingold simulation.
+
+    Args:
+        positions (numpy.ndarray): (num_nodes, 2) starting positions in [-1, 1]
+        sources (numpy.ndarray): First node of every undirected edge
+        targets (numpy.ndarray): Second node of every undirected edge
+        weights (numpy.ndarray): Edge weights, stronger edges pull harder
+        iterations (int): Simulation steps
+        sample (int): Nodes each node is repelled by per step
+        seed (int): Seed of the repulsion samples
+
+    Returns:
+        numpy.ndarray: (num_nodes, 2) positions in [-1, 1]
+    """
+    rng = np.random.default_rng(seed)
+    num_nodes = len(positions)
+    if num_nodes < 2:
+        return positions.copy()
+    ideal = 1.0 / np.sqrt(num_nodes)  # Ideal edge length in the unit box
+    min_distance2 = (0.01 * ideal) ** 2
+    # Movies with the same neighbors share a spectral position, jitter them apart
+    x = positions[:, 0] + rng.normal(scale=0.1 * ideal, size=num_nodes)
+    y = positions[:, 1] + rng.normal(scale=0.1 * ideal, size=num_nodes)
+    strength = weights / (weights.max() * ideal) if len(weights) else weights
+    temperature = 0.1
+    cooling = (0.005 / temperature) ** (1.0 / max(iterations, 1))
+
+    for _ in range(iterations):
+        # Repulsion ideal^2 / d from a random sample, scaled up to every node
+        if num_nodes > sample:
+            chosen = rng.choice(num_nodes, sample, replace=False)
+            scale = num_nodes / sample
+        else:
+            chosen, scale = slice(None), 1.0
+        # |p - q|^2 = |p|^2 + |q|^2 - 2 p.q, and sum (p - q) / d^2 as two
+        # matrix products, which avoids the dx and dy temporaries
+        points = np.column_stack((x, y))
+        others = points[chosen]
+        norms = x * x + y * y
+        inverse = norms[:, None] + norms[None, chosen] - 2.0 * (points @ others.T)
+        np.reciprocal(np.maximum(inverse, min_distance2, out=inverse), out=inverse)
+        total = inverse.sum(axis=1)
+        repulsion = ideal * ideal * scale
+        force_x = repulsion * (x * total - inverse @ others[:, 0])
+        force_y = repulsion * (y * total - inverse @ others[:, 1])
+
+        # Attraction d^2 / ideal along every edge, scaled by the edge strength
+        edge_x = x[sources] - x[targets]
+        edge_y = y[sources] - y[targets]
+        pull = np.sqrt(edge_x * edge_x + edge_y * edge_y) * strength
+        edge_x *= pull
+        edge_y *= pull
+        force_x += np.bincount(targets, edge_x, num_nodes) - np.bincount(sources, edge_x, num_nodes)
+        force_y += np.bincount(targets, edge_y, num_nodes) - np.bincount(sources, edge_y, num_nodes)
+
+        gravity = GRAVITY * num_nodes * ideal
+        force_x -= gravity * x
+        force_y -= gravity * y
+        # Move along the force, by at most the current temperature
+        length = np.maximum(np.sqrt(force_x * force_x + force_y * force_y), 1e-12)
+        step = np.minimum(length, temperature) / length
+        x += force_x * step
+        y += force_y * step
+        temperature *= cooling
+    positions = np.column_stack((x, y))
+    return _normalize(positions)
+
+def _normalize(positions):
+    # Center and scale into [-1, 1]
+    positions = positions - positions.mean(axis=0)
+    extent = np.abs(positions).max()
+    return positions / extent if extent > 0 else positions
+
+def compute_layout(num_nodes, sources, targets, weights, iterations=LAYOUT_ITERATIONS, seed=0):
+    """Compute pixel positions for every node.
+
+    Args:
+        num_nodes (int): Number of nodes
+        sources (list): First node of every undirected edge
+        targets (list): Second node of every undirected edge
+        weights (list): Edge weights
+        iterations (int): Force-directed refinement steps
+        seed (int): Random seed, the layout is deterministic for a given seed
+
+    Returns:
+        numpy.ndarray: (num_nodes, 2) float32 positions, centered on the origin
+    """
+    sources = np.asarray(sources, dtype=np.int64)
+    targets = np.asarray(targets, dtype=np.int64)
+    weights = np.asarray(weights, dtype=np.float64)
+    with trace.span("compute_layout", nodes=num_nodes, edges=len(sources)):
+        positions = spectral_positions(num_nodes, sources, targets, weights, seed=seed)
+        positions = force_directed_positions(positions, sources, targets, weights, iterations,
+                                             seed=seed)
+    # Spread the unit box so neighboring nodes sit about NODE_SPACING pixels apart
+    return (positions * NODE_SPACING * np.sqrt(max(num_nodes, 1)) / 2).astype(np.float32)
+
+def layout_key(node_ids, sources, targets, weights, iterations=LAYOUT_ITERATIONS, seed=0):
+    """Hash the graph content, node subset and parameters that determine a layout.
+
+    Args:
+        node_ids (list): Stable id of every laid out node, e.g. the movie ids
+        sources (list): First node of every undirected edge
+        targets (list): Second node of every undirected edge
+        weights (list): Edge weights
+        iterations (int): Force-directed refinement steps
+        seed (int): Random seed
+
+    Returns:
+        str: Hex digest
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps([LAYOUT_VERSION, iterations, seed, list(node_ids)]).encode("utf-8"))
+    for values, dtype in ((sources, np.int64), (targets, np.int64), (weights, np.float64)):
+        digest.update(np.ascontiguousarray(values, dtype=dtype).tobytes())
+    return digest.hexdigest()
+
+def cached_layout(node_ids, sources, targets, weights, iterations=LAYOUT_ITERATIONS, seed=0,
+                  cache_dir=LAYOUT_CACHE_DIR):
+    """Compute a layout, or load it from the cache when the same one was computed before.
+
+    Args:
+        node_ids (list): Stable id of every laid out node, e.g. the movie ids
+        sources (list): First node of every undirected edge
+        targets (list): Second node of every undirected edge
+        weights (list): Edge weights
+        iterations (int): Force-directed refinement steps
+        seed (int): Random seed
+        cache_dir (str or Path): Directory of cached layouts, None to disable caching
+
+    Returns:
+        numpy.ndarray: (num_nodes, 2) float32 positions
+    """
+    if cache_dir is None:
+        return compute_layout(len(node_ids), sources, targets, weights, iterations, seed)
+
+    key = layout_key(node_ids, sources, targets, weights, iterations, seed)
+    path = os.path.join(str(cache_dir), f"{key}.npy")
+    try:
+        positions = np.load(path)
+        if positions.shape == (len(node_ids), 2):
+            print(f"Layout loaded from cache: {path}")
+            trace.count("layout_cache_hits")
+            return positions
+    except (OSError, ValueError):
+        pass
+
+    positions = compute_layout(len(node_ids), sources, targets, weights, iterations, seed)
+    os.makedirs(str(cache_dir), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp.npy"
+    np.save(tmp_path, positions)
+    os.replace(tmp_path, path)
+    return positions
+
+def static_network_options(options):
+    """Turn network options into ones for a precomputed layout.
+
+    Physics is disabled, so the browser draws the given positions at once, and
+    edges are drawn straight, which is much cheaper than smooth curves.
+
+    Args:
+        options (str): vis.js network options as JSON text
+
+    Returns:
+        str: Updated options as JSON text
+    """
+    options = json.loads(options)
+    options["physics"] = dict(options.get("physics", {}), enabled=False)
+    options.setdefault("edges", {})["smooth"] = False
+    options.setdefault("layout", {})["improvedLayout"] = False
+    return json.dumps(options, indent=2)
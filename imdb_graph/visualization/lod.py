@@ -0,0 +1,263 @@
+"""
+Level-of-detail visualization of the whole catalog.
+
+Movies are grouped by the communities detected at build time, and
+communities larger than LOD_MAX_GROUP_SIZE are cut into angular slices of
+their spectral embedding so every group stays small enough to draw. The page
+only ships one super-node per group, sized by its movie count, and the links
+between groups. Each group's movies, positions and internal edges are written
+to their own shard script, which the page loads when the group is
+double-clicked or zoomed into:
+
+    <output_dir>/index.html
+    <output_dir>/search_index.js
+    <output_dir>/shards/cluster_<group>.js
+
+The search index of every movie is its own script too, loaded the first time
+the search box is used, and searching a movie expands its group.
+
+Positions come from the cached layout stage: the overview lays out the group
+graph, and every shard lays out its group around the group's super-node.
+"""
+import html
+import os
+from pathlib import Path
+
+import numpy as np
+
+from imdb_graph.core.community import community_summaries, label_propagation
+from imdb_graph.core.graph_utils import prepare_similar_movies
+from imdb_graph.utils.constants import NETWORK_OPTIONS, OUTPUT_DIR, TEMPLATES_DIR
+from imdb_graph.utils import trace
+from imdb_graph.visualization.html_enhancer import (
+    build_search_index, get_search_components, search_index_script
+)
+from imdb_graph.visualization.layout import (
+    LAYOUT_CACHE_DIR, NODE_SPACING, cached_layout, spectral_positions, static_network_options
+)
+from imdb_graph.visualization.network_builder import (
+    create_movie_tooltip, get_community_color, get_undirected_edges
+)
+from imdb_graph.visualization.renderer import fill_template, to_script_json
+
+LOD_TEMPLATE_PATH = TEMPLATES_DIR / "movie_graph_lod_template.html"
+LOD_OUTPUT_DIR = OUTPUT_DIR / "catalog"
+LOD_MAX_GROUP_SIZE = 1500   # Movies per shard, larger communities are split
+LOD_MIN_GROUP_SIZE = 5      # Smaller communities, e.g. isolated movies, share groups
+LOD_EXPAND_SCALE = 0.8      # Zoom scale at which visible groups are expanded
+LOD_COLLAPSE_SCALE = 0.2    # Zoom scale below which every group collapses
+LOD_MAX_EXPANDED = 6        # Groups expanded by zooming at the same time
+
+def split_groups(communities, sources, targets, weights, max_size=LOD_MAX_GROUP_SIZE,
+                 min_size=LOD_MIN_GROUP_SIZE):
+    """Assign every node to a group of at most `max_size` nodes.
+
+    Communities that fit are kept whole, and those under `min_size` nodes are
+    pooled so isolated movies do not each get their own shard. Larger ones are
+    ordered by angle around the center of their spectral embedding and cut into
+    equal slices, which keeps each slice a connected-looking region.
+
+    Args:
+        communities (numpy.ndarray): Community id of every node
+        sources (numpy.ndarray): First node of every undirected edge
+        targets (numpy.ndarray): Second node of every undirected edge
+        weights (numpy.ndarray): Edge weights
+        max_size (int): Largest group size
+        min_size (int): Communities below this size are pooled together
+
+    Returns:
+        numpy.ndarray: Group id of every node, 0 being the largest group
+    """
+    groups = np.asarray(communities, dtype=np.int64).copy()
+    num_nodes = len(groups)
+    next_group = int(groups.max()) + 1 if num_nodes else 0
+    sizes = np.bincount(groups) if num_nodes else np.zeros(0, dtype=np.int64)
+    small = sizes[groups] < min_size
+    if small.sum() > 1:
+        groups[small] = next_group
+        next_group += 1
+        sizes = np.bincount(groups)
+    for community in np.flatnonzero(sizes > max_size):
+        members = np.flatnonzero(groups == community)
+        local = np.full(num_nodes, -1, dtype=np.int64)
+        local[members] = np.arange(len(members))
+        inside = (local[sources] >= 0) & (local[targets] >= 0)
+        positions = spectral_positions(len(members), local[sources[inside]],
+                                       local[targets[inside]], weights[inside])
+        order = members[np.argsort(np.arctan2(positions[:, 1], positions[:, 0]), kind="stable")]
+        for chunk in np.array_split(order, -(-len(members) // max_size))[1:]:
+            groups[chunk] = next_group
+            next_group += 1
+
+    # Renumber groups by decreasing size, then by smallest member
+    labels, first_member, inverse, counts = np.unique(
+        groups, return_index=True, return_inverse=True, return_counts=True)
+    rank = np.empty(len(labels), dtype=np.int64)
+    rank[np.lexsort((first_member, -counts))] = np.arange(len(labels))
+    return rank[inverse]
+
+def _group_tooltip(summary):
+    lines = [f"Cluster {summary['community']}", f"{summary['size']} movies"]
+    if summary["top_genres"]:
+        lines.append(f"Genres: {', '.join(summary['top_genres'])}")
+    if summary["top_directors"]:
+        lines.append(f"Directors: {', '.join(summary['top_directors'])}")
+    if summary["years"]:
+        lines.append(f"Years: {summary['years'][0]}-{summary['years'][1]}")
+    if summary["mean_rating"] is not None:
+        lines.append(f"Mean rating: {summary['mean_rating']}")
+    lines.append("")
+    lines.append("Examples:")
+    lines.extend(f"- {title}" for title in summary["examples"])
+    return "\n".join(lines)
+
+def create_lod_network(movie_graph, output_dir=LOD_OUTPUT_DIR, max_group_size=LOD_MAX_GROUP_SIZE,
+                       layout_cache_dir=LAYOUT_CACHE_DIR):
+    """Write the level-of-detail overview page and one detail shard per group.
+
+    Args:
+        movie_graph (dict): Graph data as returned by load_graph
+        output_dir (str or Path): Directory for index.html and the shards
+        max_group_size (int): Largest number of movies in one shard
+        layout_cache_dir (str or Path): Directory of cached layouts, None to disable caching
+
+    Returns:
+        Path: Path to the overview page
+    """
+    with trace.span("lod_network") as lod_span:
+        output_dir = Path(output_dir)
+        shard_dir = output_dir / "shards"
+        os.makedirs(shard_dir, exist_ok=True)
+        # Shards of an earlier, differently grouped graph would be stale
+        for stale in shard_dir.glob("cluster_*.js"):
+            stale.unlink()
+
+        nodes_data = movie_graph["nodes_data"]
+        adj_list = movie_graph["adj_list"]
+        num_nodes = len(nodes_data)
+        edges = get_undirected_edges(adj_list, num_nodes)
+        sources = np.asarray(edges["from"], dtype=np.int64)
+        targets = np.asarray(edges["to"], dtype=np.int64)
+        weights = np.asarray(edges["weight"], dtype=np.float64)
+
+        communities = movie_graph.get("communities")
+        if communities is None:
+            print("No communities stored with the graph, detecting them...")
+            graph = movie_graph.get("graph")
+            if graph is None:
+                from imdb_graph.core.csr import CSRMovieGraph
+
+                graph = CSRMovieGraph.from_adjacency(adj_list, nodes_data)
+            communities = label_propagation(graph)
+        communities = np.asarray(communities, dtype=np.int64)
+        groups = split_groups(communities, sources, targets, weights, max_group_size)
+        num_groups = int(groups.max()) + 1 if num_nodes else 0
+        lod_span.count("movies", num_nodes)
+        lod_span.count("clusters", num_groups)
+        print(f"Grouped {num_nodes} movies into {num_groups} clusters")
+
+        # Every node's movie id keys the cached layouts
+        movies = [nodes_data[i] or {} for i in range(num_nodes)]
+        movie_ids = [movie.get("id", i) for i, movie in enumerate(movies)]
+        degrees = np.bincount(sources, minlength=num_nodes) + np.bincount(targets, minlength=num_nodes)
+        summaries = community_summaries(groups, movies, degrees)
+
+        # Links between groups, counted and summed per group pair
+        group_from, group_to = groups[sources], groups[targets]
+        cross = group_from != group_to
+        low = np.minimum(group_from[cross], group_to[cross])
+        high = np.maximum(group_from[cross], group_to[cross])
+        pairs, pair_index, pair_counts = np.unique(low * num_groups + high, return_inverse=True,
+                                                   return_counts=True)
+        pair_weights = np.bincount(pair_index.ravel(), weights[cross], len(pairs))
+        pair_from, pair_to = pairs // max(num_groups, 1), pairs % max(num_groups, 1)
+
+        # Overview layout, spread so groups of typical size do not overlap
+        sizes = np.bincount(groups, minlength=num_groups)
+        group_keys = [f"{size}:{movie_ids[int(first)]}" for size, first in
+                      zip(sizes.tolist(), np.unique(groups, return_index=True)[1].tolist())]
+        centers = cached_layout(group_keys, pair_from, pair_to, pair_weights,
+                                cache_dir=layout_cache_dir).astype(np.float64)
+        radii = NODE_SPACING * np.sqrt(sizes) / 2
+        centers *= max(1.0, 2 * float(np.median(radii)) / NODE_SPACING) if num_groups else 1.0
+
+        clusters = []
+        for group, summary in enumerate(summaries):
+            genre = summary["top_genres"][0] if summary["top_genres"] else "Cluster"
+            clusters.append({
+                "id": f"c{group}",
+                "cluster": group,
+                "label": f"{genre} ({summary['size']})",
+                "title": _group_tooltip(summary),
+                "color": get_community_color(group),
+                "size": float(min(10 + 2 * np.sqrt(summary["size"]), 80)),
+                "x": round(float(centers[group, 0]), 1),
+                "y": round(float(centers[group, 1]), 1),
+            })
+
+        # One shard per group: its movies around the group center and its own edges
+        top_similar_movies = prepare_similar_movies(adj_list, movie_graph.get("top_k"))
+        inside = ~cross
+        order = np.argsort(group_from[inside], kind="stable")
+        inner_sources, inner_targets = sources[inside][order], targets[inside][order]
+        inner_weights = weights[inside][order]
+        bounds = np.searchsorted(group_from[inside][order], np.arange(num_groups + 1))
+        members_by_group = np.argsort(groups, kind="stable")
+        member_bounds = np.searchsorted(groups[members_by_group], np.arange(num_groups + 1))
+        local = np.empty(num_nodes, dtype=np.int64)
+        for group in range(num_groups):
+            members = members_by_group[member_bounds[group]:member_bounds[group + 1]]
+            local[members] = np.arange(len(members))
+            span = slice(bounds[group], bounds[group + 1])
+            positions = cached_layout([movie_ids[i] for i in members.tolist()],
+                                      local[inner_sources[span]], local[inner_targets[span]],
+                                      inner_weights[span], cache_dir=layout_cache_dir)
+            positions = positions + centers[group]
+            shard_nodes = []
+            for node_id, (x, y) in zip(members.tolist(), positions.tolist()):
+                movie = movies[node_id]
+                shard_nodes.append({
+                    "id": node_id,
+                    "cluster": group,
+                    "label": movie.get("title", f"Movie {node_id+1}"),
+                    "title": create_movie_tooltip(movie, node_id, top_similar_movies, nodes_data,
+                                                  int(communities[node_id])),
+                    "color": get_community_color(group),
+                    "size": 15,
+                    "x": round(x, 1),
+                    "y": round(y, 1),
+                })
+            shard = {"nodes": shard_nodes,
+                     "edges": {"from": inner_sources[span].tolist(), "to": inner_targets[span].tolist(),
+                               "weight": inner_weights[span].tolist()}}
+            with open(shard_dir / f"cluster_{group}.js", "w", encoding="utf-8") as f:
+                f.write(f"loadShard({group}, {to_script_json(shard)});\n")
+                lod_span.count("bytes_written", f.tell())
+            if (group + 1) % 100 == 0:
+                print(f"Wrote {group + 1}/{num_groups} shards...")
+
+        search_index = build_search_index(movies, groups=groups.tolist())
+        with open(output_dir / "search_index.js", "w", encoding="utf-8") as f:
+            f.write(search_index_script(search_index))
+
+        with open(LOD_TEMPLATE_PATH, "r", encoding="utf-8") as f:
+            template = f.read()
+        search_html, search_css, search_js = get_search_components(index_src="search_index.js")
+        overview = {"clusters": clusters,
+                    "edges": {"from": pair_from.tolist(), "to": pair_to.tolist(),
+                              "count": pair_counts.tolist()}}
+        lod = {"shardDir": "shards", "expandScale": LOD_EXPAND_SCALE,
+               "collapseScale": LOD_COLLAPSE_SCALE, "maxExpanded": LOD_MAX_EXPANDED}
+        output_filename = fill_template(template, {
+            "TITLE": html.escape("IMDB Movie Graph - Catalog"),
+            "OVERVIEW": to_script_json(overview),
+            "OPTIONS": static_network_options(NETWORK_OPTIONS),
+            "LOD": to_script_json(lod),
+            "SEARCH_HTML": search_html,
+            "SEARCH_CSS": search_css,
+            "SEARCH_JS": search_js,
+        }, output_dir / "index.html")
+
+    print(f"Level-of-detail graph written in {lod_span.elapsed:.2f} seconds: "
+          f"{num_groups} clusters, {len(pairs)} cluster links, {num_nodes} movies in shards")
+    return output_filename
@@ -1,14 +1,57 @@
-import time
-from imdb_graph.utils.constants import GENRE_COLORS, DEFAULT_COLOR
+from imdb_graph.utils.constants import GENRE_COLORS, COMMUNITY_COLORS, DEFAULT_COLOR
+from imdb_graph.utils import trace
+from imdb_graph.core.movie_table import MovieTable
 
-def create_movie_tooltip(movie, idx, top_similar_movies, nodes_data):
+def get_movie_title(nodes_data, idx):
+    """Get the title of a movie without materializing the whole row when possible.
+    
+    Args:
+        nodes_data (list or MovieTable): Movie data for every node
+        idx (int): Movie index
+        
+    Returns:
+        str: Movie title
+    """
+    if isinstance(nodes_data, MovieTable):
+        return nodes_data.get_title(idx)
+    return nodes_data[idx].get("title", f"Movie {idx+1}")
+
+def get_community_color(community):
+    """Get the color of a community.
+    
+    Args:
+        community (int): Community id
+        
+    Returns:
+        str: Color from the community palette, cycled by id
+    """
+    return COMMUNITY_COLORS[int(community) % len(COMMUNITY_COLORS)]
+
+def get_node_color(movie, community=None):
+    """Get the color of a movie node.
+    
+    Args:
+        movie (dict): Movie data
+        community (int, optional): Community id, colors by community instead of genre
+        
+    Returns:
+        str: Node color
+    """
+    if community is not None:
+        return get_community_color(community)
+    genres = movie.get("genres", [])
+    primary_genre = genres[0] if genres else 'N/A'
+    return GENRE_COLORS.get(primary_genre, DEFAULT_COLOR)
+
+def create_movie_tooltip(movie, idx, top_similar_movies, nodes_data, community=None):
     """Create a tooltip for a movie node.
     
     Args:
         movie (dict): Movie data
         idx (int): Movie index
         top_similar_movies (dict): Dictionary of top similar movies
-        nodes_data (list): List of all movie data
+        nodes_data (list or MovieTable): List of all movie data
+        community (int, optional): Community id of the movie
         
     Returns:
         str: Tooltip text
@@ -18,7 +61,10 @@ def create_movie_tooltip(movie, idx, top_similar_movies, nodes_data):
     primary_genre = genres[0] if genres else 'N/A'
     
     # Create a plain text tooltip since HTML formatting isn't working correctly
-    tooltip = f"{label}\nGenre: {primary_genre}\n\nTop Similar Movies:"
+    tooltip = f"{label}\nGenre: {primary_genre}"
+    if community is not None:
+        tooltip += f"\nCluster: {community}"
+    tooltip += "\n\nTop Similar Movies:"
     
     # Add top 5 similar movies to the tooltip with plain text formatting
     if idx in top_similar_movies and top_similar_movies[idx]:
@@ -27,7 +73,7 @@ def create_movie_tooltip(movie, idx, top_similar_movies, nodes_data):
         for i in range(similar_count):
             neighbor_id, weight = top_similar_movies[idx][i]
             if neighbor_id < len(nodes_data):  # Ensure neighbor_id is valid
-                similar_movie = nodes_data[neighbor_id].get("title", f"Movie {neighbor_id+1}")
+                similar_movie = get_movie_title(nodes_data, neighbor_id)
                 # Use plain text formatting with newlines instead of HTML
                 tooltip += f"\n{i+1}. {similar_movie} ({weight:.2f})"
     else:
@@ -35,66 +81,185 @@ def create_movie_tooltip(movie, idx, top_similar_movies, nodes_data):
     
     return tooltip
 
-def add_nodes_to_network(net, nodes_data, top_similar_movies, limit=None):
+def _selected_nodes(num_nodes, limit=None, node_ids=None):
+    # Node ids to show: the given selection, or the first `limit` nodes
+    if node_ids is not None:
+        return [int(idx) for idx in node_ids]
+    return list(range(min(limit, num_nodes) if limit else num_nodes))
+
+def add_nodes_to_network(net, nodes_data, top_similar_movies, limit=None, communities=None,
+                         node_ids=None):
     """Add movie nodes to the network.
     
     Args:
         net (Network): Pyvis Network object
-        nodes_data (list): List of movie data
+        nodes_data (list or MovieTable): List of movie data
         top_similar_movies (dict): Dictionary of top similar movies
         limit (int, optional): Limit the number of nodes to add
+        communities (list, optional): Community id of every node, colors nodes by
+            community instead of by primary genre
+        node_ids (list, optional): Selected node ids, added instead of the first `limit` nodes
         
     Returns:
         None
     """
-    nodes_to_use = nodes_data[:limit] if limit else nodes_data
-    total_nodes = len(nodes_to_use)
+    node_ids = _selected_nodes(len(nodes_data), limit, node_ids)
+    total_nodes = len(node_ids)
     print(f"Processing {total_nodes} nodes...")
     
-    start_time = time.time()
-    for idx, movie in enumerate(nodes_to_use):
-        label = movie.get("title", f"Movie {idx+1}")
-        genres = movie.get("genres", [])
-        primary_genre = genres[0] if genres else 'N/A'
-        color = GENRE_COLORS.get(primary_genre, DEFAULT_COLOR)
-        
-        tooltip = create_movie_tooltip(movie, idx, top_similar_movies, nodes_data)
-        
-        net.add_node(idx, label=label, title=tooltip, color=color, size=15)
-        
-        if (idx + 1) % 100 == 0:
-            print(f"Added {idx + 1}/{total_nodes} nodes ({(idx + 1)/total_nodes*100:.1f}%)...")
+    with trace.span("add_nodes", nodes=total_nodes) as span:
+        for count, idx in enumerate(node_ids):
+            movie = nodes_data[idx] or {}
+            label = movie.get("title", f"Movie {idx+1}")
+            community = int(communities[idx]) if communities is not None else None
+            color = get_node_color(movie, community)
+            
+            tooltip = create_movie_tooltip(movie, idx, top_similar_movies, nodes_data, community)
+            
+            net.add_node(idx, label=label, title=tooltip, color=color, size=15)
+            
+            if (count + 1) % 100 == 0:
+                print(f"Added {count + 1}/{total_nodes} nodes ({(count + 1)/total_nodes*100:.1f}%)...")
     
-    print(f"All nodes added in {time.time() - start_time:.2f} seconds")
+    print(f"All nodes added in {span.elapsed:.2f} seconds")
 
-def add_edges_to_network(net, adj_list, limit=None):
+def add_edges_to_network(net, adj_list, limit=None, node_ids=None):
     """Add edges to the network.
     
     Args:
         net (Network): Pyvis Network object
         adj_list (list): Adjacency list representation of the graph
         limit (int, optional): Limit connections to nodes within this limit
+        node_ids (list, optional): Selected node ids, only edges between them are added
         
     Returns:
         int: Number of edges added
     """
-    edges_limit = limit if limit else len(adj_list)
-    total_nodes = min(len(adj_list), edges_limit)
+    node_ids = _selected_nodes(len(adj_list), limit, node_ids)
+    selected = set(node_ids)
+    total_nodes = len(node_ids)
     print("Adding edges...")
     edge_count = 0
-    start_time = time.time()
-    
-    for idx, neighbors in enumerate(adj_list[:edges_limit]):
-        for neighbor in neighbors:
-            neighbor_id = neighbor[0]
-            weight = neighbor[1]
-            if neighbor_id < edges_limit:  # Only connect within the limit
-                edge_width = weight / 20
-                net.add_edge(idx, neighbor_id, width=edge_width, title=f"Similarity: {weight:.2f}")
-                edge_count += 1
-        
-        if (idx + 1) % 100 == 0:
-            print(f"Processed edges for {idx + 1}/{total_nodes} nodes, added {edge_count} edges so far...")
     
-    print(f"All edges added in {time.time() - start_time:.2f} seconds. Total edges: {edge_count}")
+    with trace.span("add_edges") as span:
+        for count, idx in enumerate(node_ids):
+            for neighbor in adj_list[idx]:
+                neighbor_id = neighbor[0]
+                weight = neighbor[1]
+                if neighbor_id in selected:  # Only connect selected movies
+                    edge_width = weight / 20
+                    net.add_edge(idx, neighbor_id, width=edge_width, title=f"Similarity: {weight:.2f}")
+                    edge_count += 1
+            
+            if (count + 1) % 100 == 0:
+                print(f"Processed edges for {count + 1}/{total_nodes} nodes, added {edge_count} edges so far...")
+        span.count("edges", edge_count)
+    
+    print(f"All edges added in {span.elapsed:.2f} seconds. Total edges: {edge_count}")
     return edge_count
+
+def get_undirected_edges(adj_list, num_nodes):
+    """List every undirected edge between the first `num_nodes` nodes once.
+    
+    Args:
+        adj_list (list or AdjacencyView): Adjacency list representation of the graph
+        num_nodes (int): Only keep edges between nodes below this id
+        
+    Returns:
+        dict: Parallel "from", "to" and "weight" lists, with from < to
+    """
+    graph = getattr(adj_list, "graph", None)
+    if graph is not None and not graph._pending:
+        # CSR-backed view: select the edges straight from the arrays
+        import numpy as np
+        
+        offsets = np.asarray(graph.offsets[:num_nodes + 1])
+        neighbors = np.asarray(graph.neighbors[:offsets[-1]], dtype=np.int64)
+        rows = np.repeat(np.arange(num_nodes), np.diff(offsets))
+        keep = (rows < neighbors) & (neighbors < num_nodes)
+        weights = np.asarray(graph.weights[:offsets[-1]])[keep]
+        return {"from": rows[keep].tolist(), "to": neighbors[keep].tolist(),
+                "weight": weights.tolist()}
+    
+    edges = {"from": [], "to": [], "weight": []}
+    for idx, neighbors in enumerate(adj_list[:num_nodes]):
+        for neighbor_id, weight in neighbors:
+            # Each undirected edge appears in both neighbor lists, keep one copy
+            if idx < neighbor_id < num_nodes:
+                edges["from"].append(idx)
+                edges["to"].append(int(neighbor_id))
+                edges["weight"].append(weight)
+    return edges
+
+def get_induced_edges(adj_list, node_ids):
+    """List every undirected edge between the selected nodes once.
+    
+    Args:
+        adj_list (list or AdjacencyView): Adjacency list representation of the graph
+        node_ids (list): Selected node ids
+        
+    Returns:
+        dict: Parallel "from", "to" and "weight" lists, with from < to
+    """
+    graph = getattr(adj_list, "graph", None)
+    if graph is not None and not graph._pending:
+        # CSR-backed view: gather the selected neighbor slices from the arrays
+        from imdb_graph.core.subgraph import SubgraphSelector
+        
+        return SubgraphSelector(graph).induced_edges(node_ids)
+    
+    selected = set(int(idx) for idx in node_ids)
+    edges = {"from": [], "to": [], "weight": []}
+    for idx in sorted(selected):
+        for neighbor_id, weight in adj_list[idx]:
+            if idx < neighbor_id and neighbor_id in selected:
+                edges["from"].append(idx)
+                edges["to"].append(int(neighbor_id))
+                edges["weight"].append(weight)
+    return edges
+
+def build_network_payload(nodes_data, adj_list, top_similar_movies, limit=None, communities=None,
+                          node_ids=None):
+    """Build the vis.js node and edge arrays in bulk, without a pyvis Network.
+    
+    Undirected edges are listed once, from the lower to the higher node id.
+    
+    Args:
+        nodes_data (list or MovieTable): List of movie data
+        adj_list (list or AdjacencyView): Adjacency list representation of the graph
+        top_similar_movies (dict): Dictionary of top similar movies
+        limit (int, optional): Limit the number of nodes, and edges to nodes within it
+        communities (list, optional): Community id of every node, colors nodes by community
+        node_ids (list, optional): Sorted selected node ids, used instead of the
+            first `limit` nodes; only these movies are read
+        
+    Returns:
+        tuple: (list of vis.js node dictionaries, dict of parallel edge lists from
+        get_undirected_edges or get_induced_edges)
+    """
+    with trace.span("build_payload") as span:
+        with trace.span("edges"):
+            if node_ids is None:
+                node_ids = _selected_nodes(len(nodes_data), limit)
+                edges = get_undirected_edges(adj_list, len(node_ids))
+            else:
+                node_ids = _selected_nodes(len(nodes_data), node_ids=node_ids)
+                edges = get_induced_edges(adj_list, node_ids)
+        
+        with trace.span("nodes"):
+            nodes = []
+            for idx in node_ids:
+                movie = nodes_data[idx] or {}
+                community = int(communities[idx]) if communities is not None else None
+                nodes.append({
+                    "id": idx,
+                    "label": movie.get("title", f"Movie {idx+1}"),
+                    "title": create_movie_tooltip(movie, idx, top_similar_movies, nodes_data, community),
+                    "color": get_node_color(movie, community),
+                    "size": 15,
+                })
+        span.count("nodes", len(nodes))
+        span.count("edges", len(edges["from"]))
+    
+    print(f"Built {len(nodes)} nodes and {len(edges['from'])} edges in {span.elapsed:.2f} seconds")
+    return nodes, edges
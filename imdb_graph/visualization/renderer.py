@@ -0,0 +1,84 @@
+import html
+import json
+import os
+import re
+from pathlib import Path
+
+# Import from the package
+from imdb_graph.utils.constants import NETWORK_OPTIONS, TEMPLATES_DIR
+from imdb_graph.utils import trace
+from imdb_graph.visualization.html_enhancer import get_search_components
+
+TEMPLATE_PATH = TEMPLATES_DIR / "movie_graph_template.html"
+PLACEHOLDER = re.compile(r"\{\{(\w+)\}\}")
+
+def to_script_json(value):
+    """Encode a value as JSON that is safe to embed in a <script> element.
+
+    Args:
+        value: JSON-serializable value
+
+    Returns:
+        str: Compact JSON text with "</" escaped
+    """
+    return json.dumps(value, separators=(",", ":")).replace("</", "<\\/")
+
+def fill_template(template, values, output_filename):
+    """Fill the {{NAME}} placeholders of a page template and write the page.
+
+    Args:
+        template (str): Template text
+        values (dict): Text for every placeholder name
+        output_filename (str or Path): Path to the output HTML file
+
+    Returns:
+        Path: Path to the written file
+    """
+    # One pass over the template, so placeholder-like text inside the data is left alone
+    page = PLACEHOLDER.sub(lambda match: values[match.group(1)], template)
+
+    output_filename = Path(output_filename)
+    with open(output_filename, 'w', encoding='utf-8') as f:
+        f.write(page)
+    return output_filename
+
+def render_network_html(nodes, edges, output_filename, options=NETWORK_OPTIONS,
+                        template_path=TEMPLATE_PATH, title="IMDB Movie Graph", search_index=None):
+    """Write a standalone vis.js page with the node and edge arrays in one bulk write.
+
+    The page includes the search functionality directly, so it needs no
+    enhancement pass afterwards.
+
+    Args:
+        nodes (list): vis.js node dictionaries
+        edges (dict): Parallel "from", "to" and "weight" lists, each undirected
+            edge listed once
+        output_filename (str or Path): Path to the output HTML file
+        options (str): vis.js network options as JSON text
+        template_path (str or Path): Page template with {{NAME}} placeholders
+        title (str): Page title
+        search_index (dict, optional): Search index of the nodes, as returned
+            by build_search_index; the search builds a title-only one without it
+
+    Returns:
+        Path: Path to the generated HTML file
+    """
+    with trace.span("render_html", path=str(output_filename)) as span:
+        with open(template_path, 'r', encoding='utf-8') as f:
+            template = f.read()
+
+        search_html, search_css, search_js = get_search_components(search_index)
+        values = {
+            "TITLE": html.escape(title),
+            "NODES": to_script_json(nodes),
+            "EDGES": to_script_json(edges),
+            "OPTIONS": options,
+            "SEARCH_HTML": search_html,
+            "SEARCH_CSS": search_css,
+            "SEARCH_JS": search_js,
+        }
+        output_filename = fill_template(template, values, output_filename)
+        span.count("bytes_written", os.path.getsize(output_filename))
+
+    print(f"Rendered {len(nodes)} nodes and {len(edges['from'])} edges in {span.elapsed:.2f} seconds")
+    return output_filename
@@ -1,14 +1,21 @@
-import time
 import sys
 import os
 from pathlib import Path
-from pyvis.network import Network
+
+import numpy as np
 
 # Import modular components from the new package structure
 from imdb_graph.utils.constants import NETWORK_OPTIONS
-from imdb_graph.core.graph_utils import load_graph, prepare_similar_movies
-from imdb_graph.visualization.network_builder import add_nodes_to_network, add_edges_to_network
-from imdb_graph.visualization.html_enhancer import enhance_html_with_search as enhance_html
+from imdb_graph.utils import trace
+from imdb_graph.core.graph_utils import load_graph, prepare_similar_movies, find_binary_graph
+from imdb_graph.visualization.network_builder import (
+    add_nodes_to_network, add_edges_to_network, build_network_payload
+)
+from imdb_graph.visualization.layout import LAYOUT_CACHE_DIR, cached_layout, static_network_options
+from imdb_graph.visualization.renderer import render_network_html
+from imdb_graph.visualization.html_enhancer import (
+    build_search_index, enhance_html_with_search as enhance_html
+)
 
 # Define default paths
 DATA_DIR = Path(__file__).parent.parent.parent / "data"
@@ -30,12 +37,83 @@ def configure_network_options(net):
     # Set physics options and other network configurations using the constant
     net.set_options(NETWORK_OPTIONS)
 
-def create_movie_network(movie_limit=250, output_filename=None):
+def select_movies(movie_graph, select="first", limit=250, movie=None, depth=1, community=None,
+                  genre=None, years=None):
+    """Select the movies to visualize with index arrays over the graph.
+    
+    Args:
+        movie_graph (dict): Graph data as returned by load_graph
+        select (str): "first" N movies, "ego" network of `movie`, top "degree"
+            movies, members of a "community", or a "filter" on genre and years
+        limit (int): Largest number of movies
+        movie (str or int, optional): Title or node id of the ego network center
+        depth (int): Hops around the center of an ego network
+        community (int, optional): Community to select, 0 being the largest
+        genre (str, optional): Genre of the filtered movies
+        years (tuple, optional): First and last year of the filtered movies,
+            either may be None
+        
+    Returns:
+        numpy.ndarray: Sorted node ids, or None if the selection is not possible
+    """
+    from imdb_graph.core.subgraph import SubgraphSelector, find_movie
+    
+    nodes_data = movie_graph["nodes_data"]
+    if select == "first":
+        # No need for the CSR arrays to take a prefix
+        return np.arange(min(limit, len(nodes_data)), dtype=np.int64)
+    
+    graph = movie_graph.get("graph")
+    if graph is None:
+        from imdb_graph.core.csr import CSRMovieGraph
+        
+        graph = CSRMovieGraph.from_adjacency(movie_graph["adj_list"], nodes_data)
+    selector = SubgraphSelector(graph)
+    
+    if select == "ego":
+        center = find_movie(nodes_data, movie) if movie is not None else None
+        if center is None:
+            print(f"Error: No movie title matches {movie!r} and it is not a node id "
+                  f"(write node ids as #<id>, below {len(nodes_data)}).")
+            return None
+        print(f"Selecting movies within {depth} hops of {nodes_data[center].get('title')}...")
+        return selector.ego(center, depth, limit)
+    if select == "degree":
+        return selector.top_degree(limit)
+    if select == "community":
+        communities = movie_graph.get("communities")
+        if communities is None:
+            print("Error: No communities stored with the graph. Rebuild the graph to detect them.")
+            return None
+        return selector.community(communities, community or 0, limit)
+    if select == "filter":
+        year_from, year_to = years or (None, None)
+        return selector.filter(nodes_data, genre, year_from, year_to, limit)
+    print(f"Error: Unknown selection {select!r}.")
+    return None
+
+def create_movie_network(movie_limit=250, output_filename=None, color_by="genre", renderer="bulk",
+                         layout="precomputed", select="first", movie=None, depth=1, community=None,
+                         genre=None, years=None, graph_path=JSON_PATH,
+                         layout_cache_dir=LAYOUT_CACHE_DIR):
     """Create a network visualization of movies.
     
     Args:
         movie_limit (int): Number of movies to include in the visualization
         output_filename (str, optional): Name of the output HTML file
+        color_by (str): Color nodes by primary "genre" or by detected "community"
+        renderer (str): "bulk" writes the vis.js arrays straight into the page
+            template, "pyvis" builds the page through a pyvis Network
+        layout (str): "precomputed" positions nodes in Python and disables physics
+            (bulk renderer only), "physics" lets the browser settle the layout
+        select (str): How movies are selected, see select_movies
+        movie (str or int, optional): Title or node id of the ego network center
+        depth (int): Hops around the center of an ego network
+        community (int, optional): Community to show with select="community"
+        genre (str, optional): Genre to show with select="filter"
+        years (tuple, optional): First and last year to show with select="filter"
+        graph_path (str or Path): Saved graph, JSON or binary
+        layout_cache_dir (str or Path): Directory of cached layouts, None to disable caching
         
     Returns:
         str: Path to the generated HTML file
@@ -43,25 +121,83 @@ def create_movie_network(movie_limit=250, output_filename=None):
     # Create output directory if it doesn't exist
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     
+    print("Starting visualization process...")
+    
+    # Check if the graph data exists in either format
+    graph_path = Path(graph_path)
+    if not graph_path.exists() and find_binary_graph(graph_path) is None:
+        print(f"Error: Graph data file not found at {graph_path}")
+        print("Please run the graph building script first.")
+        return None
+    
+    movie_graph = load_graph(graph_path)
+    nodes_data = movie_graph["nodes_data"]
+    adj_list = movie_graph["adj_list"]
+    
+    # Only the selected movies are read and rendered
+    with trace.span("select_movies", mode=select) as span:
+        node_ids = select_movies(movie_graph, select, movie_limit, movie, depth, community, genre, years)
+        span.count("movies", len(node_ids) if node_ids is not None else 0)
+    if node_ids is None:
+        return None
+    if not len(node_ids):
+        print("Error: No movies match the selection.")
+        return None
+    print(f"Selected {len(node_ids)} movies ({select}) in {span.elapsed:.2f} seconds")
+    
     if output_filename is None:
-        output_filename = OUTPUT_DIR / f"{movie_limit}_movies.html"
+        if select == "first":
+            output_filename = OUTPUT_DIR / f"{movie_limit}_movies.html"
+        else:
+            output_filename = OUTPUT_DIR / f"{select}_{len(node_ids)}_movies.html"
     else:
         # Make sure the output_filename is a Path object
         output_filename = Path(output_filename)
         if not output_filename.is_absolute():
             output_filename = OUTPUT_DIR / output_filename
     
-    print("Starting visualization process...")
+    # Prepare similarity data from the stored top-k index when there is one
+    top_similar_movies = prepare_similar_movies(adj_list, movie_graph.get("top_k"), node_ids)
     
-    # Check if the graph data exists
-    if not JSON_PATH.exists():
-        print(f"Error: Graph data file not found at {JSON_PATH}")
-        print("Please run the graph building script first.")
-        return None
+    # Community ids come from the build; fall back to genre colors without them
+    communities = None
+    if color_by == "community":
+        communities = movie_graph.get("communities")
+        if communities is None:
+            print("No communities stored with the graph, coloring by genre. Rebuild the graph to detect them.")
     
-    movie_graph = load_graph(JSON_PATH)
+    if renderer == "bulk":
+        # Build the node and edge arrays directly and write the page in one go
+        nodes, edges = build_network_payload(nodes_data, adj_list, top_similar_movies,
+                                             communities=communities, node_ids=node_ids)
+        movies = [nodes_data[idx] or {} for idx in node_ids.tolist()]
+        options = NETWORK_OPTIONS
+        if layout == "precomputed":
+            # Positions are cached per graph content and movie subset
+            print("Computing layout...")
+            with trace.span("layout") as span:
+                movie_ids = [movie.get("id", idx) for idx, movie in zip(node_ids.tolist(), movies)]
+                # The layout works on positions within the selection
+                sources = np.searchsorted(node_ids, np.asarray(edges["from"], dtype=np.int64))
+                targets = np.searchsorted(node_ids, np.asarray(edges["to"], dtype=np.int64))
+                positions = cached_layout(movie_ids, sources, targets, edges["weight"],
+                                          cache_dir=layout_cache_dir)
+                for node, (x, y) in zip(nodes, positions.tolist()):
+                    node["x"], node["y"] = round(x, 1), round(y, 1)
+                options = static_network_options(NETWORK_OPTIONS)
+            print(f"Layout ready in {span.elapsed:.2f} seconds")
+        print(f"Generating HTML file: {output_filename}")
+        with trace.span("write_html") as span:
+            with trace.span("search_index"):
+                search_index = build_search_index(movies, node_ids.tolist())
+            render_network_html(nodes, edges, output_filename, options, search_index=search_index)
+        print(f"HTML file generated in {span.elapsed:.2f} seconds")
+        print(f"Done! Open {output_filename} in your browser to view the graph with search functionality.")
+        return output_filename
     
-    # Create a Pyvis Network object
+    # Create a Pyvis Network object; pyvis (and Jinja) only load for this renderer
+    from pyvis.network import Network
+
     print("Creating network object...")
     net = Network(
         notebook=False, 
@@ -72,34 +208,54 @@ def create_movie_network(movie_limit=250, output_filename=None):
         cdn_resources='remote'
     )
     
-    # Use specified number of movies for the graph
-    nodes_data = movie_graph["nodes_data"][:movie_limit]
-    adj_list = movie_graph["adj_list"][:movie_limit]
-    
-    # Prepare similarity data
-    top_similar_movies = prepare_similar_movies(adj_list)
-    
     # Add nodes and edges
-    add_nodes_to_network(net, nodes_data, top_similar_movies, movie_limit)
-    add_edges_to_network(net, adj_list, movie_limit)
+    add_nodes_to_network(net, nodes_data, top_similar_movies, communities=communities,
+                         node_ids=node_ids)
+    add_edges_to_network(net, adj_list, node_ids=node_ids)
     
     # Configure network options
     configure_network_options(net)
     
     # Generate the HTML file
     print(f"Generating HTML file: {output_filename}")
-    start_time = time.time()
+    with trace.span("write_html", renderer="pyvis") as span:
+        # Convert Path to string if needed
+        output_path_str = str(output_filename)
+        with trace.span("pyvis_show"):
+            net.show(output_path_str, notebook=False)
+        
+        # Enhance the HTML with search functionality
+        enhance_html(output_filename, [nodes_data[idx] or {} for idx in node_ids.tolist()],
+                     node_ids.tolist())
+    
+    print(f"HTML file generated in {span.elapsed:.2f} seconds")
+    print(f"Done! Open {output_filename} in your browser to view the graph with search functionality.")
+    
+    return output_filename
+
+def create_catalog_network(output_dir=None):
+    """Create the level-of-detail visualization of every movie in the graph.
     
-    # Convert Path to string if needed
-    output_path_str = str(output_filename)
-    net.show(output_path_str, notebook=False)
+    Args:
+        output_dir (str, optional): Directory for the overview page and its shards
+        
+    Returns:
+        str: Path to the generated overview page
+    """
+    from imdb_graph.visualization.lod import LOD_OUTPUT_DIR, create_lod_network
     
-    # Enhance the HTML with search functionality
-    enhance_html(output_filename)
+    output_dir = Path(output_dir) if output_dir else LOD_OUTPUT_DIR
+    if not output_dir.is_absolute():
+        output_dir = OUTPUT_DIR / output_dir
     
-    print(f"HTML file generated in {time.time() - start_time:.2f} seconds")
-    print(f"Done! Open {output_filename} in your browser to view the graph with search functionality.")
+    # Check if the graph data exists in either format
+    if not JSON_PATH.exists() and find_binary_graph(JSON_PATH) is None:
+        print(f"Error: Graph data file not found at {JSON_PATH}")
+        print("Please run the graph building script first.")
+        return None
     
+    output_filename = create_lod_network(load_graph(JSON_PATH), output_dir)
+    print(f"Done! Open {output_filename} in your browser and zoom into a cluster to see its movies.")
     return output_filename
 
 def main():
@@ -12,6 +12,7 @@ setup(
     packages=find_packages(),
     install_requires=[
         "requests",
+        "numpy",
         "matplotlib",
         "python-dotenv",
         "pyvis",
@@ -20,6 +21,7 @@ setup(
         'console_scripts': [
             'imdb-graph-build=imdb_graph.main:main',
             'imdb-graph-visualize=imdb_graph.main:visualize_graph',
+            'imdb-graph-serve=imdb_graph.main:serve_graph',
         ],
     },
     include_package_data=True,
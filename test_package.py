@@ -4,15 +4,46 @@ Test script to verify the IMDB Graph package functionality.
 This script builds a small graph and creates a visualization.
 """
 
+import asyncio
+import http.client
+import json
 import os
+import random
 import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
 from pathlib import Path
 import time
 
+import numpy as np
+
 # Import the package modules
 from imdb_graph.core.graph import MovieGraph
+from imdb_graph.core.csr import CSRMovieGraph
+from imdb_graph.core.cast_overlap import CastOverlapIndex
+from imdb_graph.core.community import community_summaries
+from imdb_graph.core.graph_utils import find_binary_graph, load_graph, prepare_similar_movies
+from imdb_graph.core.movie_table import MovieTable
+from imdb_graph.core.score_store import ScoreStore
+from imdb_graph.core.pagerank import PersonalizedPageRank
+from imdb_graph.core.query import GraphQuery
+from imdb_graph.core.subgraph import SubgraphSelector, find_movie
+from imdb_graph.server.service import RecommendationService
+from imdb_graph.data.cache import ResponseCache, load_checkpoint, save_checkpoint, update_checkpoint
+from imdb_graph.data.data_fetch import fetch_to_jsonl
+from imdb_graph.data.fetcher import TMDBFetcher
+from imdb_graph.data.movie_io import append_movie, iter_json_array, iter_movies, write_movies_jsonl
+from imdb_graph.data.synthetic import generate_movies
+from imdb_graph.visualization.html_enhancer import build_search_index
+from imdb_graph.visualization.lod import create_lod_network, split_groups
+from imdb_graph.visualization.layout import cached_layout, compute_layout, static_network_options
+from imdb_graph.visualization.network_builder import build_network_payload, get_undirected_edges
+from imdb_graph.visualization.renderer import render_network_html
 from imdb_graph.visualization.visualize import create_movie_network
-from imdb_graph.utils.constants import DATA_DIR, OUTPUT_DIR
+from imdb_graph.utils.constants import DATA_DIR, NETWORK_OPTIONS, OUTPUT_DIR, TOP_K
+from imdb_graph.utils import trace
 
 def test_graph_build():
     """Test building a small movie graph."""
@@ -76,6 +107,878 @@ def test_graph_build():
     print("✓ Graph building test passed!")
     return graph
 
+def _make_test_movies(count, seed=0):
+    """Create random movies with plenty of overlapping features."""
+    rng = random.Random(seed)
+    genres = ["Action", "Comedy", "Drama", "Horror", "Romance", "Thriller"]
+    movies = []
+    for i in range(count):
+        movies.append({
+            "id": i,
+            "title": f"Movie {i}",
+            "year": rng.choice([None, rng.randint(1990, 2020)]),
+            "genres": rng.sample(genres, rng.randint(0, 3)),
+            "director": rng.choice(["", "Director A", "Director B", f"Director {i}"]),
+            "cast": rng.sample([f"Actor {a}" for a in range(12)], rng.randint(0, 4)),
+            "rating": rng.choice([None, round(rng.uniform(5.0, 9.5), 1), 8]),
+        })
+    return movies
+
+def test_fast_builds_match_pairwise():
+    """Test that the blocked and vectorized builds produce exactly the pairwise edges."""
+    print("Testing blocked and vectorized graph building...")
+    movies = _make_test_movies(120)
+    for threshold in [-1, 0, 3, 5, 6, 7, 8, 9, 10, 11]:
+        expected = MovieGraph(len(movies))
+        expected.build_graph(movies, threshold=threshold, method="pairwise")
+        for method in ["blocked", "vectorized"]:
+            graph = MovieGraph(len(movies))
+            graph.build_graph(movies, threshold=threshold, method=method)
+            assert graph.adj_list == expected.adj_list, \
+                f"{method} edges differ at threshold {threshold}"
+    print("✓ Blocked and vectorized graph building test passed!")
+
+def test_parallel_build_is_deterministic():
+    """Test that a multi-process build matches the serial build."""
+    print("Testing parallel graph building...")
+    movies = _make_test_movies(150, seed=1)
+    expected = MovieGraph(len(movies))
+    expected.build_graph(movies, threshold=6, method="pairwise")
+    for method in ["blocked", "vectorized"]:
+        for workers in [2, 3]:
+            graph = MovieGraph(len(movies))
+            graph.build_graph(movies, threshold=6, method=method, workers=workers)
+            assert graph.adj_list == expected.adj_list, \
+                f"{method} edges differ with {workers} workers"
+    print("✓ Parallel graph building test passed!")
+
+def test_cast_overlap_index():
+    """Test that the cast index finds exactly the pairs sharing cast members."""
+    print("Testing cast overlap index...")
+    movies = generate_movies(400, seed=24)
+    movies[3]["cast"] = []
+    casts = [set(movie["cast"]) for movie in movies]
+    index = CastOverlapIndex.from_casts(movie["cast"] for movie in movies)
+
+    expected = [(i, j, len(casts[i] & casts[j])) for i in range(len(casts))
+                for j in range(i + 1, len(casts)) if len(casts[i] & casts[j]) >= 2]
+    assert expected, "The synthetic catalog should have movies sharing actors"
+    assert list(index.pairs()) == expected
+    assert list(index.pairs(block_incidences=10)) == expected, "Block size should not matter"
+
+    rows, cols, _ = index.block_pairs(50, 120, 30, 300)
+    assert list(zip(rows.tolist(), cols.tolist())) == [
+        (i, j) for i in range(50, 120) for j in range(30, 300)
+        if i != j and len(casts[i] & casts[j]) >= 2]
+
+    # "Shares actors with" lookups, most shared first
+    costars = index.shared_with(expected[0][0])
+    assert (expected[0][1], expected[0][2]) in costars
+    assert [shared for _, shared in costars] == sorted((shared for _, shared in costars), reverse=True)
+    assert index.shared_with(3) == []
+    print("✓ Cast overlap index test passed!")
+
+def test_score_store_rethreshold():
+    """Test that graphs derived from stored pair scores match direct builds."""
+    print("Testing pair score store...")
+    movies = _make_test_movies(150, seed=25)
+    store = ScoreStore.build(movies, min_score=0, tile_size=16)
+    for threshold in [0, 3, 6, 7, 9]:
+        expected = MovieGraph(len(movies))
+        expected.build_graph(movies, threshold=threshold, method="pairwise")
+        graph = store.to_graph(movies, threshold=threshold)
+        assert [graph.get_neighbors(i) for i in range(len(movies))] == expected.adj_list, \
+            f"Rethresholded edges differ at threshold {threshold}"
+
+    # Re-weighting: a heavy cast component alone decides the edges
+    rows, cols, _ = store.edge_arrays(threshold=19, weights={'cast': 20})
+    casts = CastOverlapIndex.from_casts(movie["cast"] for movie in movies)
+    assert list(zip(rows.tolist(), cols.tolist())) == [(i, j) for i, j, _ in casts.pairs()]
+    assert store.edge_counts([6, 7]) == [len(store.edge_arrays(6)[0]), len(store.edge_arrays(7)[0])]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir) / "pair_scores.npz"
+        store.save(path)
+        loaded = ScoreStore.load(path)
+
+        # An incremental build links new movies at the threshold the saved graph records
+        from imdb_graph import main as cli
+
+        saved_path = cli.MOVIE_GRAPH_PATH
+        cli.MOVIE_GRAPH_PATH = Path(tmp_dir) / "movie_graph.json"
+        try:
+            partial = ScoreStore.build(movies[:120], min_score=0).to_graph(movies[:120], threshold=5)
+            partial.save_to_json(cli.MOVIE_GRAPH_PATH)
+            partial.save_to_binary(cli.MOVIE_GRAPH_PATH.with_suffix(".bin"))
+            updated = cli.update_graph(movies)
+            assert updated.scoring == partial.scoring and updated.scoring['threshold'] == 5
+            assert list(updated.adj_list) == list(store.to_graph(movies, threshold=5).adj_list), \
+                "New movies should be linked at the saved threshold"
+
+            reweighted = store.to_graph(movies, threshold=7, weights={'cast': 4})
+            reweighted.save_to_json(cli.MOVIE_GRAPH_PATH)
+            assert MovieGraph.load_from_json(cli.MOVIE_GRAPH_PATH).scoring == reweighted.scoring
+            os.remove(cli.MOVIE_GRAPH_PATH.with_suffix(".bin"))
+            try:
+                cli.update_graph(movies)
+                assert False, "A re-weighted graph should not be updated incrementally"
+            except ValueError as e:
+                assert "cast=4" in str(e), "The error should name the saved weights"
+        finally:
+            cli.MOVIE_GRAPH_PATH = saved_path
+    assert loaded.matches(movies) and not loaded.matches(movies[::-1])
+    edited = [dict(movie) for movie in movies]
+    edited[3]["rating"] = (edited[3]["rating"] or 0) + 2.5
+    assert not loaded.matches(edited), "A changed rating under the same id should not match"
+    assert loaded.matches(MovieTable(movies)), "A MovieTable of the same movies should match"
+    assert np.array_equal(loaded.masks, store.masks) and loaded.min_score == 0
+
+    floored = ScoreStore.build(movies, min_score=6)
+    assert np.array_equal(floored.edge_arrays(6)[2], store.edge_arrays(6)[2])
+    for threshold, weights in [(5, None), (7, {'cast': 6})]:
+        # A heavy cast weight lifts director + cast + year (5 by default) to 10
+        assert not floored.covers(threshold, weights) and store.covers(threshold, weights)
+        try:
+            floored.edge_arrays(threshold, weights)
+            assert False, "Pairs left out of the store could clear the threshold"
+        except ValueError:
+            pass
+    assert floored.covers(9, {'cast': 3}), "Dropped pairs score at most 9 with these weights"
+    print("✓ Pair score store test passed!")
+
+def test_csr_graph_matches_adjacency_list():
+    """Test that the CSR graph answers like the list-based graph."""
+    print("Testing CSR graph storage...")
+    movies = _make_test_movies(80, seed=2)
+    graph = MovieGraph(len(movies))
+    graph.build_graph(movies, threshold=6)
+    built = CSRMovieGraph(len(movies))
+    built.build_graph(movies, threshold=6)
+    for csr in [graph.freeze(), built]:
+        assert csr.get_num_edges() == graph.get_num_edges(), "Edge counts should match"
+        for i in range(len(movies)):
+            assert csr.get_neighbors(i) == graph.get_neighbors(i), f"Neighbors of {i} differ"
+        assert csr.weights.dtype.itemsize == 1, "Integer weights should be stored as uint8"
+
+    # Edges added after freezing are visible and survive another freeze
+    csr = graph.freeze()
+    csr.add_edge(0, 1, 6.5)
+    assert (1, 6.5) in csr.get_neighbors(0), "Pending edge should be visible"
+    assert csr.freeze().get_num_edges() == graph.get_num_edges() + 1, "Freeze should keep pending edges"
+    assert (0, 6.5) in csr.get_neighbors(1), "Frozen edge should be visible from both ends"
+    print("✓ CSR graph storage test passed!")
+
+def test_binary_graph_round_trip():
+    """Test saving and mapping the binary graph format."""
+    print("Testing binary graph format...")
+    movies = _make_test_movies(60, seed=3)
+    graph = MovieGraph(len(movies))
+    graph.build_graph(movies, threshold=5)
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = Path(tmp) / "movie_graph.json"
+        graph.save_to_json(json_path)
+        graph.save_to_binary(json_path.with_suffix(".bin"))
+
+        mapped = MovieGraph.load_from_binary(json_path.with_suffix(".bin"))
+        assert mapped.get_num_edges() == graph.get_num_edges(), "Edge counts should match"
+        for i in range(len(movies)):
+            assert mapped.get_neighbors(i) == graph.get_neighbors(i), f"Neighbors of {i} differ"
+            assert mapped.get_node_data(i) == movies[i], f"Node data of {i} differs"
+
+        # load_graph picks up the binary file sitting next to the JSON file
+        data = load_graph(json_path)
+        assert "graph" in data, "load_graph should use the binary file"
+        assert data["nodes_data"][:3] == movies[:3], "Node data should be sliceable"
+        assert [list(n) for n in data["adj_list"][5]] == [list(n) for n in graph.adj_list[5]]
+        del data, mapped
+
+        # Files written in another format version are rejected, not misread
+        old_path = Path(tmp) / "old_graph.bin"
+        contents = bytearray(json_path.with_suffix(".bin").read_bytes())
+        contents[8:12] = (2).to_bytes(4, "little")
+        old_path.write_bytes(bytes(contents))
+        try:
+            MovieGraph.load_from_binary(old_path)
+            assert False, "A version 2 file should be rejected"
+        except ValueError as e:
+            assert "rebuild the graph" in str(e), "The error should say how to fix the file"
+
+        # A stale binary file next to the JSON file falls back to the JSON file
+        json_path.with_suffix(".bin").write_bytes(bytes(contents))
+        assert find_binary_graph(json_path) is None, "A stale binary file should be skipped"
+        data = load_graph(json_path)
+        assert "graph" not in data and data["nodes_data"][:3] == movies[:3]
+    print("✓ Binary graph format test passed!")
+
+def test_incremental_update_matches_rebuild():
+    """Test that adding movies to a built graph equals rebuilding it."""
+    print("Testing incremental graph updates...")
+    movies = _make_test_movies(90, seed=4)
+    expected = MovieGraph(len(movies))
+    expected.build_graph(movies, threshold=6)
+
+    graph = MovieGraph(70)
+    graph.build_graph(movies[:70], threshold=6)
+    new_ids = graph.add_movies(movies[70:], threshold=6)
+    assert new_ids == list(range(70, 90)), "New movies should take the next ids"
+    assert graph.adj_list == expected.adj_list, "Incremental edges should match a rebuild"
+
+    csr = CSRMovieGraph(70)
+    csr.build_graph(movies[:70], threshold=6)
+    csr.add_movies(movies[70:], threshold=6)
+    assert list(csr.freeze().adj_list) == expected.adj_list, "CSR update should match a rebuild"
+    print("✓ Incremental graph update test passed!")
+
+def test_top_k_index_matches_sorted_neighbors():
+    """Test that the stored top-k index equals sorting every neighbor list."""
+    print("Testing top-k neighbor index...")
+    movies = _make_test_movies(90, seed=9)
+    full = MovieGraph(len(movies))
+    full.build_graph(movies, threshold=4, top_k=0)
+    expected = [sorted(neighbors, key=lambda x: x[1], reverse=True)[:3]
+                for neighbors in full.adj_list]
+
+    graph = MovieGraph(70)
+    graph.build_graph(movies[:70], threshold=4, top_k=3)
+    graph.add_movies(movies[70:], threshold=4)
+    csr = CSRMovieGraph(len(movies))
+    csr.build_graph(movies, threshold=4, top_k=3)
+    assert [graph.top_k(n, 3) for n in range(90)] == expected, "Heap index differs"
+    assert [csr.top_k(n, 3) for n in range(90)] == expected, "CSR index differs"
+    assert full.top_k(5, 3) == expected[5], "Graphs without an index should sort on demand"
+    index = csr.top_k_index
+    assert csr.top_k(5, 50) == expected[5] and csr.top_k_index is index, \
+        "A k above the indexed k should be capped, not rebuild the index"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        graph.save_to_json(Path(tmp) / "graph.json")
+        graph.save_to_binary(Path(tmp) / "graph.bin")
+        from_json = MovieGraph.load_from_json(Path(tmp) / "graph.json")
+        mapped = MovieGraph.load_from_binary(Path(tmp) / "graph.bin")
+        assert [from_json.top_k(n, 3) for n in range(90)] == expected, "JSON index differs"
+        assert [mapped.top_k(n, 3) for n in range(90)] == expected, "Binary index differs"
+        del mapped
+    print("✓ Top-k neighbor index test passed!")
+
+def test_path_queries():
+    """Test BFS, bidirectional BFS and Dijkstra path queries."""
+    print("Testing path queries...")
+    # 0-1-2 is a strong chain, 0-2 a weak shortcut, 4 is isolated
+    graph = MovieGraph(5)
+    for i, j, weight in [(0, 1, 11), (1, 2, 11), (0, 2, 7), (2, 3, 8)]:
+        graph.add_edge(i, j, weight)
+    query = GraphQuery(graph)
+    assert query.bfs(0) == [(0, 0), (1, 1), (2, 1), (3, 2)]
+    assert query.bfs(0, max_depth=1) == [(0, 0), (1, 1), (2, 1)]
+    assert query.bfs_path(0, 3) == [0, 2, 3]
+    assert query.shortest_path(0, 3) == [0, 2, 3]
+    assert query.shortest_path(0, 3, max_depth=1) is None
+    assert query.shortest_path(0, 4) is None and query.bfs_path(0, 4) is None
+    assert query.strongest_path(0, 2) == ([0, 1, 2], 2.0), "Strong edges should be preferred"
+    assert query.strongest_path(0, 3, max_cost=3) == (None, None)
+
+    # Both BFS variants find equally short paths on a real graph, query after query
+    movies = _make_test_movies(150, seed=10)
+    built = CSRMovieGraph(len(movies))
+    built.build_graph(movies, threshold=6)
+    query = GraphQuery(built)
+    rng = random.Random(10)
+    for _ in range(50):
+        a, b = rng.randrange(150), rng.randrange(150)
+        one_way, both_ways = query.bfs_path(a, b), query.shortest_path(a, b)
+        assert (one_way is None) == (both_ways is None)
+        if both_ways is not None:
+            assert len(one_way) == len(both_ways) and both_ways[0] == a and both_ways[-1] == b
+            assert all(built.get_neighbors(x) and y in dict(built.get_neighbors(x))
+                       for x, y in zip(both_ways, both_ways[1:])), "Path should follow edges"
+    print("✓ Path query test passed!")
+
+def test_personalized_pagerank():
+    """Test personalized PageRank against a dense linear solve."""
+    print("Testing personalized PageRank...")
+    movies = _make_test_movies(80, seed=12)
+    graph = CSRMovieGraph(len(movies))
+    graph.build_graph(movies, threshold=7)
+    pagerank = PersonalizedPageRank(graph, tol=1e-12, max_iter=1000)
+
+    # Dense reference: r = (1 - d) t + d (P + t * dangling^T) r
+    weights = np.zeros((80, 80))
+    for j in range(80):
+        for i, w in graph.get_neighbors(j):
+            weights[j, i] += w
+    strength = weights.sum(axis=0)
+    transition = np.divide(weights, strength, out=np.zeros_like(weights), where=strength > 0)
+    for seeds in ([0], [3, 7, 11]):
+        teleport = np.zeros(80)
+        teleport[seeds] = 1 / len(seeds)
+        matrix = transition + np.outer(teleport, strength == 0)
+        expected = np.linalg.solve(np.eye(80) - 0.85 * matrix, 0.15 * teleport)
+        scores = pagerank.scores([seeds])[:, 0]
+        assert np.allclose(scores, expected, atol=1e-10), "Scores differ from the exact solution"
+
+    # Repeated seeds count once and keep the teleport mass whole
+    repeated = pagerank.scores([[3, 7, 3, 11, 7]])[:, 0]
+    assert np.allclose(repeated, pagerank.scores([[3, 7, 11]])[:, 0], atol=1e-12)
+    assert abs(repeated.sum() - 1) < 1e-9, "Scores should sum to 1 with repeated seeds"
+
+    pagerank = PersonalizedPageRank(graph)
+    batched = pagerank.recommend_batch(range(80), k=5, batch_size=7)
+    assert batched == [pagerank.recommend(i, k=5) for i in range(80)], "Batching changed results"
+    assert all(i not in dict(recs) for i, recs in enumerate(batched)), "Seeds should be excluded"
+    for k in (0, -2):
+        try:
+            pagerank.recommend(0, k=k)
+            assert False, f"k={k} should be rejected"
+        except ValueError:
+            pass
+    print("✓ Personalized PageRank test passed!")
+
+def test_community_detection():
+    """Test label propagation on planted clusters and its persistence."""
+    print("Testing community detection...")
+    rng = random.Random(15)
+    # Four dense clusters of different sizes joined by a few light edges
+    sizes = [30, 25, 20, 15]
+    members = []
+    for size in sizes:
+        start = sum(len(m) for m in members)
+        members.append(list(range(start, start + size)))
+    graph = CSRMovieGraph(sum(sizes))
+    for cluster, nodes in enumerate(members):
+        for node in nodes:
+            graph.add_node(node, {"id": node, "title": f"Movie {node}", "year": 1990 + cluster,
+                                  "rating": 7.0, "genres": [f"Genre {cluster}"], "director": "",
+                                  "cast": []})
+        for i in nodes:
+            for j in rng.sample(nodes, 6):
+                if i < j:
+                    graph.add_edge(i, j, 10)
+    for _ in range(5):
+        graph.add_edge(rng.choice(members[0]), rng.choice(members[3]), 7)
+
+    communities = graph.detect_communities()
+    for cluster, nodes in enumerate(members):
+        # Communities are numbered by decreasing size
+        assert set(communities[nodes].tolist()) == {cluster}, f"Cluster {cluster} was split"
+
+    summaries = community_summaries(communities, graph.nodes_data, limit=2)
+    assert [s["size"] for s in summaries] == [30, 25], "Summaries should be largest first"
+    assert summaries[1]["top_genres"] == ["Genre 1"] and summaries[1]["years"] == [1991, 1991]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        graph.save_to_json(Path(tmp) / "graph.json")
+        graph.save_to_binary(Path(tmp) / "graph.bin")
+        for loaded in (MovieGraph.load_from_json(Path(tmp) / "graph.json"),
+                       MovieGraph.load_from_binary(Path(tmp) / "graph.bin")):
+            assert loaded.communities.tolist() == communities.tolist(), "Communities not persisted"
+            del loaded
+    print("✓ Community detection test passed!")
+
+def test_bulk_renderer():
+    """Test the bulk vis.js payload and page renderer."""
+    print("Testing bulk renderer...")
+    movies = _make_test_movies(90, seed=16)
+    graph = CSRMovieGraph(len(movies))
+    graph.build_graph(movies, threshold=7)
+    top_similar = prepare_similar_movies(graph.adj_list, graph.top_k_index)
+
+    nodes, edges = build_network_payload(graph.nodes_data, graph.adj_list, top_similar, 60)
+    _, list_edges = build_network_payload(graph.nodes_data, list(graph.adj_list), top_similar, 60)
+    assert edges == list_edges, "CSR and list adjacency should give the same edges"
+    expected = {(i, j) for i in range(60) for j, _ in graph.get_neighbors(i) if i < j < 60}
+    pairs = list(zip(edges["from"], edges["to"]))
+    assert len(pairs) == len(set(pairs)) and set(pairs) == expected, "Edges should be listed once"
+    assert [node["id"] for node in nodes] == list(range(60))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        nodes[0]["label"] = "</script>{{NODES}}"
+        output = render_network_html(nodes, edges, Path(tmp) / "graph.html")
+        page = output.read_text(encoding="utf-8")
+    assert "{{" not in page.replace("{{NODES}}", ""), "Every placeholder should be filled"
+    assert "<\\/script>{{NODES}}" in page, "Data must not close the script or be substituted"
+    assert 'id="searchInput"' in page, "Search box should be included"
+    print("✓ Bulk renderer test passed!")
+
+def test_graph_layout():
+    """Test the precomputed layout and its cache."""
+    print("Testing graph layout...")
+    movies = _make_test_movies(300, seed=17)
+    graph = CSRMovieGraph(len(movies))
+    graph.build_graph(movies, threshold=7)
+    edges = get_undirected_edges(graph.adj_list, 300)
+    node_ids = [movie["id"] for movie in movies]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        positions = cached_layout(node_ids, edges["from"], edges["to"], edges["weight"],
+                                  cache_dir=tmp)
+        assert positions.shape == (300, 2) and np.isfinite(positions).all()
+        assert len(os.listdir(tmp)) == 1, "The layout should be cached"
+        again = cached_layout(node_ids, edges["from"], edges["to"], edges["weight"], cache_dir=tmp)
+        assert np.array_equal(positions, again), "Cached layout should be reused"
+        cached_layout(node_ids[:200], *get_undirected_edges(graph.adj_list, 200).values(),
+                      cache_dir=tmp)
+        assert len(os.listdir(tmp)) == 2, "Another subset needs its own layout"
+    assert np.array_equal(positions, compute_layout(300, edges["from"], edges["to"],
+                                                    edges["weight"])), "Layout should be deterministic"
+
+    # Similar movies end up much closer together than random pairs
+    sources, targets = np.array(edges["from"]), np.array(edges["to"])
+    edge_length = np.linalg.norm(positions[sources] - positions[targets], axis=1).mean()
+    rng = np.random.default_rng(0)
+    pairs = rng.integers(0, 300, (2, 2000))
+    random_length = np.linalg.norm(positions[pairs[0]] - positions[pairs[1]], axis=1).mean()
+    assert edge_length < 0.5 * random_length, "Neighbors should be laid out close together"
+
+    options = json.loads(static_network_options(NETWORK_OPTIONS))
+    assert options["physics"]["enabled"] is False
+    print("✓ Graph layout test passed!")
+
+def test_level_of_detail_site():
+    """Test the level-of-detail overview page and its cluster shards."""
+    print("Testing level-of-detail site...")
+    movies = _make_test_movies(400, seed=18)
+    graph = CSRMovieGraph(len(movies))
+    graph.build_graph(movies, threshold=7)
+    graph.detect_communities()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        graph.save_to_binary(Path(tmp) / "graph.bin")
+        movie_graph = load_graph(Path(tmp) / "graph.bin")
+        edges = get_undirected_edges(movie_graph["adj_list"], 400)
+        groups = split_groups(movie_graph["communities"], np.array(edges["from"]),
+                              np.array(edges["to"]), np.array(edges["weight"], float), 60)
+        assert np.bincount(groups).max() <= 60, "Groups should respect the size cap"
+
+        output = create_lod_network(movie_graph, Path(tmp) / "site", max_group_size=60,
+                                    layout_cache_dir=Path(tmp) / "layout_cache")
+        page = output.read_text(encoding="utf-8")
+        overview = json.loads(page.split("var overview = ", 1)[1].split(";\n", 1)[0])
+        assert len(overview["clusters"]) == groups.max() + 1
+
+        seen, inner_edges = set(), 0
+        for cluster in overview["clusters"]:
+            shard_path = Path(tmp) / "site" / "shards" / f"cluster_{cluster['cluster']}.js"
+            text = shard_path.read_text(encoding="utf-8")
+            shard = json.loads(text[text.index(",") + 1:text.rindex(")")])
+            ids = [node["id"] for node in shard["nodes"]]
+            assert len(ids) == int(cluster["label"].rsplit("(", 1)[1].rstrip(")"))
+            seen.update(ids)
+            inner_edges += len(shard["edges"]["from"])
+        assert seen == set(range(400)), "Every movie should be in exactly one shard"
+        cross_edges = sum(overview["edges"]["count"])
+        assert inner_edges + cross_edges == graph.get_num_edges(), "Edges should all be accounted for"
+        index_text = (Path(tmp) / "site" / "search_index.js").read_text(encoding="utf-8")
+        search_index = json.loads(index_text.split("var searchIndex = ", 1)[1].rstrip(";\n"))
+        assert search_index["groups"] == groups.tolist(), "The search should know every movie's shard"
+        assert 'var searchIndexSrc = "search_index.js"' in page
+        del movie_graph
+    print("✓ Level-of-detail site test passed!")
+
+def test_search_index():
+    """Test that lookups in the client search index find what a full scan finds."""
+    print("Testing search index...")
+    import bisect
+
+    movies = _make_test_movies(200, seed=19)
+    movies[3]["title"] = "The Dark Knight"
+    movies[4]["title"] = "Knight and Day"
+    index = build_search_index(movies)
+    assert index["tokens"] == sorted(set(index["tokens"])), "Tokens should be sorted and distinct"
+
+    def lookup(text):
+        # The lookup search.js does: word prefixes, then trigrams of the whole query
+        found = None
+        for word in text.split():
+            start = bisect.bisect_left(index["tokens"], word)
+            entries = set()
+            while start < len(index["tokens"]) and index["tokens"][start].startswith(word):
+                entries.update(index["postings"][start])
+                start += 1
+            found = entries if found is None else found & entries
+        grams = [text[i:i + 3] for i in range(len(text) - 2)]
+        if grams and all(gram in index["trigrams"] for gram in grams):
+            candidates = min((index["trigrams"][gram] for gram in grams), key=len)
+            found = (found or set()) | {e for e in candidates if text in index["labels"][e].lower()}
+        return found or set()
+
+    def scan(text):
+        matches = set()
+        for entry, movie in enumerate(movies):
+            words = " ".join([movie["title"], movie["director"]] + movie["cast"]).lower().split()
+            if text in movie["title"].lower() or all(
+                    any(token.startswith(word) for token in words) for word in text.split()):
+                matches.add(entry)
+        return matches
+
+    for text in ["knight", "ark kn", "movie 1", "movie 12", "ie 1", "director a", "actor 3",
+                 "movie 7 actor 1", "zzz"]:
+        assert lookup(text) == scan(text), f"Lookup and scan differ for {text!r}"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        nodes = [{"id": i, "label": movie["title"]} for i, movie in enumerate(movies)]
+        page = render_network_html(nodes, {"from": [], "to": [], "weight": []},
+                                   Path(tmp) / "graph.html", search_index=index).read_text(encoding="utf-8")
+    assert "var searchIndex = " in page, "The index should be embedded in the page"
+    print("✓ Search index test passed!")
+
+def test_subgraph_selection():
+    """Test the subgraph selection modes against plain Python selections."""
+    print("Testing subgraph selection...")
+    movies = _make_test_movies(250, seed=20)
+    graph = CSRMovieGraph(len(movies))
+    graph.build_graph(movies, threshold=7)
+    graph.detect_communities()
+    selector = SubgraphSelector(graph)
+    neighbors = [{n for n, _ in graph.get_neighbors(i)} for i in range(250)]
+
+    # Ego network: breadth-first layers around the center
+    reached, frontier = {5}, {5}
+    for _ in range(2):
+        frontier = set().union(*(neighbors[i] for i in frontier)) - reached
+        reached |= frontier
+    assert selector.ego(5, depth=2).tolist() == sorted(reached)
+    capped = set(selector.ego(5, depth=2, limit=len(neighbors[5]) + 3).tolist())
+    assert len(capped) == len(neighbors[5]) + 3 and capped <= reached
+    assert neighbors[5] | {5} <= capped, "The nearest layer should be kept first"
+
+    degrees = np.array([len(n) for n in neighbors])
+    top = selector.top_degree(30)
+    assert len(top) == 30 and degrees[top].min() >= np.sort(degrees)[-30]
+    members = selector.community(graph.communities, 1)
+    assert members.tolist() == np.flatnonzero(graph.communities == 1).tolist()
+
+    expected = [i for i, m in enumerate(movies)
+                if "Drama" in m["genres"] and m["year"] is not None and 1995 <= m["year"] <= 2010]
+    assert selector.filter(movies, "Drama", 1995, 2010).tolist() == expected
+    assert selector.filter(MovieTable(movies), "Drama", 1995, 2010).tolist() == expected
+    assert selector.filter(MovieTable(movies), year_to=2000, limit=10).tolist() == \
+        selector.filter(movies, year_to=2000, limit=10).tolist()
+    assert find_movie(movies, "movie 42") == 42 and find_movie(movies, "#17") == 17
+    # Numeric titles win over node ids; "#" forces a node id
+    titled = [dict(movie) for movie in movies]
+    titled[5]["title"] = "1917"
+    assert find_movie(titled, "1917") == 5 and find_movie(MovieTable(titled), "1917") == 5
+    assert find_movie(titled, "#1917") is None and find_movie(titled, 17) == 17
+    assert find_movie(titled, "99999") is None, "Unmatched numbers beyond the graph match nothing"
+
+    # Only edges between selected movies, each listed once, from either adjacency form
+    nodes, edges = build_network_payload(graph.nodes_data, graph.adj_list, {}, node_ids=top)
+    _, list_edges = build_network_payload(graph.nodes_data, list(graph.adj_list), {}, node_ids=top)
+    assert edges == list_edges and [node["id"] for node in nodes] == top.tolist()
+    chosen = set(top.tolist())
+    assert set(zip(edges["from"], edges["to"])) == {
+        (i, j) for i in chosen for j in neighbors[i] if i < j and j in chosen}
+    print("✓ Subgraph selection test passed!")
+
+def test_benchmark_suite():
+    """Test the synthetic catalog generator and a small benchmark run."""
+    print("Testing benchmark suite...")
+    import benchmark
+
+    movies = generate_movies(2000, seed=21)
+    assert movies == generate_movies(2000, seed=21), "Catalogs should be reproducible"
+    assert movies != generate_movies(2000, seed=22)
+    assert all(len(movie["cast"]) == len(set(movie["cast"])) for movie in movies)
+    directors = {}
+    for movie in movies:
+        directors[movie["director"]] = directors.get(movie["director"], 0) + 1
+    counts = sorted(directors.values())
+    assert counts[-1] >= 5 * np.median(counts), "A few directors should make many movies"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        records = benchmark.benchmark_size(300, Path(tmp), seed=21)
+        stages = [record["stage"] for record in records]
+        assert stages == ["generate", "build", "communities", "save_json", "save_binary",
+                          "load_json", "load_binary", "similar_movies", "render", "render_cached"]
+        assert all(record["seconds"] >= 0 for record in records)
+        skipped = benchmark.benchmark_size(300, Path(tmp), seed=21, max_edges=10)
+        assert skipped[-1]["skipped"], "Graphs over the edge budget should be skipped"
+
+    baseline = {"results": records}
+    slower = {"results": [dict(record, seconds=record["seconds"] * 3 + 1) for record in records]}
+    assert benchmark.compare_results(baseline, baseline) == []
+    assert len(benchmark.compare_results(baseline, slower)) == len(records)
+    print("✓ Benchmark suite test passed!")
+
+def test_trace_spans():
+    """Test that builds record nested timing spans with counters only when tracing."""
+    print("Testing trace spans...")
+    movies = _make_test_movies(120, seed=22)
+
+    with trace.span("untraced") as span:
+        CSRMovieGraph.build_from_stream(iter(movies), threshold=6)
+        span.count("movies", len(movies))
+    assert span.elapsed > 0 and span.args == {}, "Disabled spans should only time themselves"
+    assert trace.format_summary() == ""
+
+    trace.enable()
+    try:
+        with trace.span("build") as span:
+            graph = CSRMovieGraph.build_from_stream(iter(movies), threshold=6)
+    finally:
+        trace.disable()
+    chrome = trace.chrome_trace()
+    events = {event["name"]: event for event in chrome["traceEvents"] if event["ph"] == "X"}
+    assert {"build", "build_graph", "intern_movies", "score_pairs", "csr_arrays"} <= set(events)
+    assert events["score_pairs"]["args"]["pairs_scored"] == 120 * 119 // 2
+    assert events["score_pairs"]["args"]["edges"] == graph.get_num_edges()
+    assert events["intern_movies"]["args"]["movies"] == 120
+    # Children lie within their parent
+    outer, inner = events["build"], events["score_pairs"]
+    assert outer["ts"] <= inner["ts"] and inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"] + 1
+    summary = trace.format_summary().splitlines()
+    assert summary[0].startswith("build: ") and summary[1].startswith("  build_graph: ")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = trace.write_chrome_trace(Path(tmp) / "trace.json")
+        with open(path, "r", encoding="utf-8") as f:
+            assert json.load(f)["traceEvents"] == json.loads(json.dumps(chrome["traceEvents"]))
+    trace.clear()
+    print("✓ Trace spans test passed!")
+
+def test_cli_startup():
+    """Test that quick CLI commands start without importing the heavy dependencies."""
+    print("Testing CLI startup...")
+    import benchmark
+
+    records, problems = benchmark.check_startup(commands=(("--help",), ("build", "--help")),
+                                                wall_budget_ms=None)
+    assert problems == [], problems
+    assert all(record["modules"] > 0 for record in records)
+    modules = benchmark.imported_modules(["-m", "imdb_graph.main", "--help"])
+    assert "imdb_graph.utils.constants" in modules
+    assert not any(name.startswith(("numpy", "pyvis", "requests")) for name in modules)
+    print("✓ CLI startup test passed!")
+
+def test_streaming_build_matches_list_build():
+    """Test the streaming readers and the streaming build pipeline."""
+    print("Testing streaming movie loading...")
+    movies = _make_test_movies(70, seed=5)
+    expected = MovieGraph(len(movies))
+    expected.build_graph(movies, threshold=6)
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = Path(tmp) / "movies_data.json"
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(movies, f, indent=2)
+        jsonl_path = Path(tmp) / "movies_data.jsonl"
+        write_movies_jsonl(movies, jsonl_path)
+
+        # A tiny chunk size forces elements to straddle chunk boundaries
+        assert list(iter_json_array(json_path, chunk_size=7)) == movies, "JSON array stream differs"
+        assert list(iter_movies(jsonl_path)) == movies, "JSON Lines stream differs"
+
+        graph = CSRMovieGraph.build_from_stream(iter_movies(jsonl_path), threshold=6)
+    assert list(graph.adj_list) == expected.adj_list, "Streaming build edges differ"
+    assert list(graph.nodes_data) == movies, "Streaming build node data differs"
+    print("✓ Streaming movie loading test passed!")
+
+def test_movie_table_round_trip():
+    """Test the columnar movie table against plain movie dicts."""
+    print("Testing columnar movie table...")
+    movies = _make_test_movies(40, seed=6)
+    movies[3]["poster"] = "/poster.jpg"
+    table = MovieTable(movies)
+    assert len(table) == len(movies) and list(table) == movies, "Rows should read back unchanged"
+    assert table[-1] == movies[-1] and table[2:5] == movies[2:5], "Indexing should match a list"
+
+    # Shared actor names are stored once in the pool
+    names = [name for movie in movies for name in movie["cast"]]
+    assert len(table.pool) < len(names), "Repeated strings should be interned"
+
+    # Replacing rows splices the ragged columns
+    table[1] = movies[0]
+    table[2] = None
+    table.append(movies[5])
+    assert table[1] == movies[0] and table[2] is None and table[3] == movies[3]
+    assert table[len(movies)] == movies[5], "Appended row should follow the others"
+    assert table.num_present() == len(movies), "One row was cleared and one appended"
+
+    graph = MovieGraph(len(movies))
+    graph.build_graph(movies, threshold=6, method="vectorized")
+    assert isinstance(graph.nodes_data, MovieTable), "build_graph should store a MovieTable"
+    assert graph.get_node_data(7) == movies[7], "Node data should read back from the table"
+    print("✓ Columnar movie table test passed!")
+
+class _StubTMDBHandler(BaseHTTPRequestHandler):
+    """Minimal TMDB stand-in: 3 discover pages, a throttled movie and a missing one."""
+    throttled = set()
+    movie_requests = []
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if query.get("api_key") != ["test-key"]:
+            return self._send(401, {})
+        if url.path == "/discover/movie":
+            page = int(query["page"][0])
+            return self._send(200, {"total_pages": 3,
+                                    "results": [{"id": page * 10 + i} for i in range(2)]})
+        movie_id = int(url.path.rsplit("/", 1)[1])
+        etag = f'"v{movie_id}"'
+        self.movie_requests.append(movie_id)
+        if self.headers.get("If-None-Match") == etag:
+            return self._send(304, None)
+        if movie_id == 21:
+            return self._send(404, {})
+        if movie_id == 11 and movie_id not in self.throttled:
+            self.throttled.add(movie_id)
+            return self._send(429, {}, {"Retry-After": "0"})
+        self._send(200, {
+            "title": f"Movie {movie_id}",
+            "release_date": "2001-02-03",
+            "vote_average": 7.5,
+            "genres": [{"name": "Drama"}],
+            "credits": {"crew": [{"job": "Director", "name": "Director A"}],
+                        "cast": [{"name": f"Actor {a}"} for a in range(7)]},
+        }, {"ETag": etag})
+
+    def _send(self, status, body, headers=None):
+        payload = json.dumps(body).encode() if body is not None else b""
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+def test_fetcher_against_stub_server():
+    """Test the concurrent fetcher against a local stub of the TMDB API."""
+    print("Testing concurrent TMDB fetcher...")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubTMDBHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    try:
+        with TMDBFetcher("test-key", base_url=base_url, workers=4, rate=200, backoff=0.01) as fetcher:
+            ids = fetcher.discover_ids(pages=50)
+            assert ids == [10, 11, 20, 21, 30, 31], "Discovery should stop at total_pages"
+            movies = dict(fetcher.fetch_movies(ids))
+        assert movies[21] is None, "Missing movies should come back as None"
+        assert movies[11]["title"] == "Movie 11", "Throttled requests should be retried"
+        assert movies[10] == {"id": 10, "title": "Movie 10", "year": 2001, "rating": 7.5,
+                              "genres": ["Drama"], "director": "Director A",
+                              "cast": [f"Actor {a}" for a in range(5)]}
+    finally:
+        server.shutdown()
+        server.server_close()
+    print("✓ Concurrent TMDB fetcher test passed!")
+
+def test_response_cache_and_checkpoint():
+    """Test that cached movie details are reused, revalidated and checkpointed."""
+    print("Testing response cache and checkpoints...")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubTMDBHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    requests_made = _StubTMDBHandler.movie_requests
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ResponseCache(Path(tmp) / "cache")
+            with TMDBFetcher("test-key", base_url=base_url, workers=2, rate=200, cache=cache) as fetcher:
+                first = dict(fetcher.fetch_movies([10, 20, 30]))
+                del requests_made[:]
+                assert dict(fetcher.fetch_movies([10, 20, 30])) == first
+                assert requests_made == [], "Fresh cache entries should not hit the API"
+
+            # Stale entries are revalidated with their ETag and come back unchanged
+            stale = ResponseCache(Path(tmp) / "cache", ttl=0)
+            with TMDBFetcher("test-key", base_url=base_url, workers=2, rate=200, cache=stale) as fetcher:
+                assert dict(fetcher.fetch_movies([10, 20, 30])) == first
+            assert sorted(requests_made) == [10, 20, 30], "Stale entries should be revalidated"
+            assert cache.is_fresh(cache.get("10")), "A 304 should refresh the entry"
+            # Identical bodies are stored once
+            objects = list((Path(tmp) / "cache" / "objects").rglob("*.json"))
+            assert len(objects) == 3, "Each distinct response should be stored once"
+
+            # Checkpoints append progress records; a record cut short is ignored
+            checkpoint_path = Path(tmp) / "checkpoint.json"
+            assert load_checkpoint(checkpoint_path) is None
+            save_checkpoint(checkpoint_path, [10, 20, 30])
+            assert load_checkpoint(checkpoint_path) == {"ids": [10, 20, 30], "position": 0, "offset": 0}
+            update_checkpoint(checkpoint_path, 1, 120)
+            with open(checkpoint_path, "a") as f:
+                f.write('{"position": 2, "off')
+            assert load_checkpoint(checkpoint_path) == {"ids": [10, 20, 30], "position": 1, "offset": 120}
+
+            # Resuming revalidates the movies fetched before the checkpoint and
+            # drops the partial output written after it
+            jsonl_path = Path(tmp) / "movies.jsonl"
+            with open(jsonl_path, "w", encoding="utf-8") as f:
+                append_movie(f, first[10])
+                offset = f.tell()
+                f.write('{"id": 20, "tit')
+            save_checkpoint(checkpoint_path, [10, 20, 30])
+            update_checkpoint(checkpoint_path, 1, offset)
+            del requests_made[:]
+            with TMDBFetcher("test-key", base_url=base_url, workers=2, rate=200, cache=stale) as fetcher:
+                movies = fetch_to_jsonl(fetcher, [10, 20, 30], str(jsonl_path), str(checkpoint_path),
+                                        load_checkpoint(checkpoint_path))
+            assert movies == [first[10], first[20], first[30]]
+            assert 10 in requests_made, "Resumed movies should be revalidated"
+            assert list(iter_movies(jsonl_path)) == movies, "The partial line should be dropped"
+            assert load_checkpoint(checkpoint_path)["position"] == 3
+    finally:
+        server.shutdown()
+        server.server_close()
+    print("✓ Response cache and checkpoint test passed!")
+
+def test_recommendation_service():
+    """Test the HTTP recommendation service over a local socket."""
+    print("Testing recommendation service...")
+    movies = _make_test_movies(60, seed=11)
+    graph = CSRMovieGraph(len(movies))
+    graph.build_graph(movies, threshold=6)
+    service = RecommendationService(graph, cache_size=2)
+
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(service.start("127.0.0.1", 0))
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        # One keep-alive connection for every request
+        conn = http.client.HTTPConnection("127.0.0.1", server.sockets[0].getsockname()[1])
+
+        def get(target):
+            conn.request("GET", target)
+            response = conn.getresponse()
+            return response.status, json.loads(response.read())
+
+        status, body = get("/similar?id=0,1&k=3")
+        assert status == 200 and set(body["results"]) == {"0", "1"}, "Batched lookup failed"
+        assert [m["id"] for m in body["results"]["1"]] == [n for n, _ in graph.top_k(1, 3)]
+        assert get("/similar?k=3&id=0,1") == (status, body), "Equivalent queries should match"
+        assert get("/neighbors?id=2")[1]["results"]["2"] == [
+            {"id": n, "movie_id": n, "title": movies[n]["title"], "weight": w}
+            for n, w in graph.get_neighbors(2)]
+
+        a, b = 0, 1
+        path = GraphQuery(graph).shortest_path(a, b)
+        status, body = get(f"/path?from={a}&to={b}")
+        assert status == 200 and [m["id"] for m in body["path"] or []] == (path or [])
+        assert get("/neighbors?id=999")[0] == 400 and get("/nowhere")[0] == 404
+
+        stats = get("/stats")[1]
+        assert stats["requests"] == 6 and stats["errors"] == 2
+        assert stats["cache"]["hits"] == 1 and stats["cache"]["size"] == 2, "LRU should evict"
+
+        # k is at least 1 and capped at the index, which is never rebuilt for a request
+        assert get("/similar?id=0&k=-1")[0] == 400 and get("/similar?id=0&k=0")[0] == 400
+        status, body = get("/similar?id=0&k=10000000")
+        assert status == 200 and len(body["results"]["0"]) <= TOP_K
+        assert service.graph.top_k_index.k == TOP_K, "A large k should not rebuild the index"
+        assert get("/recommend?id=0&k=-2")[0] == 400 and get("/recommend?id=0&k=101")[0] == 400
+        status, body = get("/recommend?id=0&k=3")
+        assert status == 200 and len(body["results"]) <= 3
+        conn.close()
+    finally:
+        loop.call_soon_threadsafe(server.close)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.run_until_complete(server.wait_closed())
+        loop.close()
+    print("✓ Recommendation service test passed!")
+
 def test_visualization(graph):
     """Test creating a visualization from the graph."""
     print("Testing visualization...")
@@ -106,6 +1009,30 @@ def main():
     try:
         # Test graph building
         graph = test_graph_build()
+        test_fast_builds_match_pairwise()
+        test_parallel_build_is_deterministic()
+        test_cast_overlap_index()
+        test_score_store_rethreshold()
+        test_csr_graph_matches_adjacency_list()
+        test_binary_graph_round_trip()
+        test_incremental_update_matches_rebuild()
+        test_top_k_index_matches_sorted_neighbors()
+        test_path_queries()
+        test_personalized_pagerank()
+        test_community_detection()
+        test_bulk_renderer()
+        test_graph_layout()
+        test_level_of_detail_site()
+        test_search_index()
+        test_subgraph_selection()
+        test_benchmark_suite()
+        test_trace_spans()
+        test_cli_startup()
+        test_streaming_build_matches_list_build()
+        test_movie_table_round_trip()
+        test_fetcher_against_stub_server()
+        test_response_cache_and_checkpoint()
+        test_recommendation_service()
         
         # Test visualization
         output_file = test_visualization(graph)